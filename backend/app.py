@@ -1,90 +1,357 @@
-from flask import Flask, send_from_directory
+import click
+from flask import Flask, Response, send_from_directory
 import os
+import threading
+from datetime import timedelta
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from pymongo import MongoClient
 from dotenv import load_dotenv
-import os
+from utils.data_mode import DataSourceMode
+from utils.json_provider import MongoJSONProvider
+from utils.cache import LRUCache, PromptCache, RedisCache, ResponseCache
+from utils.jobs import JobQueue
+from utils.llm import build_router_from_env
+from utils.metrics import CommandMetrics, RequestMetrics, prometheus_text
+from utils.mongo import PoolMetrics, client_options, mongo_config, read_preference
+from utils.passwords import PasswordHasher
+from utils.jwt import TokenVerifier
 
 # Load environment variables
 load_dotenv()
 
-app = Flask(__name__)
-# Update CORS to allow requests from any origin during development
-# In production, specify your exact Vercel domain
-CORS(app, origins=["*"], supports_credentials=True)
-
-# JWT Configuration
-app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'fallback-secret-key')
-jwt = JWTManager(app)
-
-# MongoDB connection
-try:
-    client = MongoClient(os.getenv('MONGODB_URI', 'mongodb://localhost:27017'), serverSelectionTimeoutMS=5000)
-    # Test the connection
-    client.admin.command('ping')
-    db = client[os.getenv('DATABASE_NAME', 'project_management_db')]
-    print("✅ MongoDB connected successfully")
-except Exception as e:
-    print(f"❌ MongoDB connection failed: {e}")
-    print("⚠️  Running in demo mode without database")
-    db = None
-
-# Make db available to other modules
-app.db = db
-
-# Register routes
-print("🔧 Registering blueprints...")
-try:
+FRONTEND_BUILD = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'frontend', 'build')
+
+_NOT_CONNECTED = object()
+
+def connect_db(config, event_listeners=()):
+    """Connect to MongoDB; returns None (demo mode) when it is unreachable."""
+    try:
+        client = MongoClient(config['MONGODB_URI'], **client_options(config, event_listeners))
+        # Test the connection
+        client.admin.command('ping')
+        db = client[config['DATABASE_NAME']]
+        print("✅ MongoDB connected successfully")
+        return db
+    except Exception as e:
+        print(f"❌ MongoDB connection failed: {e}")
+        print("⚠️  Running in demo mode without database")
+        return None
+
+class ProjectManagementApp(Flask):
+    """Flask app that connects to MongoDB on first use of ``app.db``.
+
+    Creating the app (and importing this module) never touches the
+    network, so tests, CLI commands and forked workers start fast. Setting
+    ``app.db`` directly replaces the connection, e.g. with a test database.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._db = _NOT_CONNECTED
+        self._db_lock = threading.Lock()
+        self._analytics_db = None
+        self.pool_metrics = PoolMetrics()
+        self.command_metrics = CommandMetrics()
+
+    @property
+    def db(self):
+        if self._db is _NOT_CONNECTED:
+            connected = False
+            with self._db_lock:
+                if self._db is _NOT_CONNECTED:
+                    db = connect_db(self.config, [self.pool_metrics, self.command_metrics])
+                    if db is not None:
+                        self._prepare_db(db)
+                    self._db = db
+                    connected = db is not None
+            if connected and self.config['DATA_MODE_CHANGE_STREAM']:
+                self.data_mode.start_change_stream(['users', 'projects', 'tasks'])
+        return self._db
+
+    @db.setter
+    def db(self, value):
+        self._db = value
+
+    @property
+    def analytics_db(self):
+        """``db`` with MONGODB_ANALYTICS_READ_PREFERENCE for reports and list views.
+
+        With a secondary preference, reads may lag the primary by up to
+        MONGODB_MAX_STALENESS_SECONDS; writes through this handle still go to
+        the primary.
+        """
+        db = self.db
+        if db is None:
+            return None
+        cached = self._analytics_db
+        if cached is None or cached[0] is not db:
+            preference = read_preference(self.config['MONGODB_ANALYTICS_READ_PREFERENCE'],
+                                         self.config['MONGODB_MAX_STALENESS_SECONDS'])
+            cached = self._analytics_db = (db, db.with_options(read_preference=preference))
+        return cached[1]
+
+    def _prepare_db(self, db):
+        # Create the indexes the routes rely on (idempotent) when AUTO_CREATE_INDEXES=1.
+        # Off by default: this runs inside the first request of every worker, so
+        # deployments run `flask --app app ensure-indexes` as a release step instead
+        if self.config['AUTO_CREATE_INDEXES']:
+            from utils.indexes import ensure_indexes
+            for collection, created in ensure_indexes(db).items():
+                if isinstance(created, str):
+                    print(f"⚠️  Index setup for {collection} failed: {created}")
+
+    def reset_db(self):
+        """Drop the connection; the next use of ``app.db`` reconnects.
+
+        MongoClient is not fork-safe, so each gunicorn worker forked from a
+        preloaded master calls this to get its own connection pool.
+        """
+        with self._db_lock:
+            if self._db is not _NOT_CONNECTED and self._db is not None:
+                self._db.client.close()
+            self._db = _NOT_CONNECTED
+            self.data_mode.invalidate()
+
+def default_config():
+    return {
+        'JWT_SECRET_KEY': os.getenv('JWT_SECRET_KEY', 'fallback-secret-key'),
+        'JWT_ACCESS_TOKEN_EXPIRES': timedelta(hours=float(os.getenv('JWT_ACCESS_TOKEN_HOURS', '24'))),
+        **mongo_config(),
+        'AUTO_CREATE_INDEXES': os.getenv('AUTO_CREATE_INDEXES', '0') == '1',
+        'DATA_MODE_CHANGE_STREAM': os.getenv('DATA_MODE_CHANGE_STREAM', '').lower() in ('1', 'true', 'yes'),
+        # Seconds to cache login lookups by email; 0 always reads MongoDB
+        'LOGIN_CACHE_TTL': float(os.getenv('LOGIN_CACHE_TTL', '0')),
+        # Requests slower than this are logged with the MongoDB commands they issued
+        'SLOW_REQUEST_MS': float(os.getenv('SLOW_REQUEST_MS', '500')),
+    }
+
+def create_app(config=None):
+    """Build the Flask app; ``config`` entries override the defaults.
+
+    Pass ``{"MONGODB_URI": None}`` to run without a database (demo mode).
+    """
+    app = ProjectManagementApp(__name__)
+    # Serialize ObjectId, datetime and Decimal128 straight from Mongo documents
+    app.json = MongoJSONProvider(app)
+    # Update CORS to allow requests from any origin during development
+    # In production, specify your exact Vercel domain
+    CORS(app, origins=["*"], supports_credentials=True, expose_headers=["X-Next-Cursor", "Link"])
+
+    # JWT and MongoDB configuration
+    app.config.update(default_config())
+    app.config.update(config or {})
+    JWTManager(app)
+    # Verified token claims are cached until expiry; see utils/jwt.py
+    app.token_verifier = TokenVerifier(app.config['JWT_SECRET_KEY'], app.config.get('JWT_ALGORITHM', 'HS256'),
+                                       max_entries=int(os.getenv('JWT_CACHE_MAX_ENTRIES', '4096')))
+    if not app.config['MONGODB_URI']:
+        app.db = None
+
+    # Per-endpoint latency, status counts and MongoDB round trips, served at /metrics
+    app.request_metrics = RequestMetrics(slow_request_seconds=app.config['SLOW_REQUEST_MS'] / 1000)
+    app.request_metrics.init_app(app)
+
+    # Demo-mode resolver shared by all blueprints; reads app.db on demand
+    app.data_mode = DataSourceMode(ttl=float(os.getenv('DATA_MODE_TTL', '30')), resolve=lambda: app.db)
+
+    # Response cache for read-heavy GET endpoints; CACHE_REDIS_URL shares it between workers
+    if os.getenv('CACHE_REDIS_URL'):
+        cache_backend = RedisCache.from_url(os.getenv('CACHE_REDIS_URL'))
+    else:
+        cache_backend = LRUCache(max_entries=int(os.getenv('CACHE_MAX_ENTRIES', '1024')))
+    app.response_cache = ResponseCache(cache_backend, default_ttl=float(os.getenv('CACHE_TTL', '30')))
+
+    # Generated user stories by prompt, so repeated descriptions skip the LLM call
+    if os.getenv('CACHE_REDIS_URL'):
+        prompt_backend = RedisCache.from_url(os.getenv('CACHE_REDIS_URL'), prefix="pm:ai:")
+    else:
+        prompt_backend = LRUCache(max_entries=int(os.getenv('AI_CACHE_MAX_ENTRIES', '256')))
+    app.prompt_cache = PromptCache(prompt_backend, ttl=float(os.getenv('AI_CACHE_TTL', '3600')))
+
+    # LLM providers in failover order, each with its own rate limit and circuit breaker
+    app.llm = build_router_from_env()
+
+    # Background jobs for slow AI calls, persisted in ai_jobs when there is a database
+    app.job_queue = JobQueue(
+        app,
+        max_workers=int(os.getenv('AI_JOB_WORKERS', '4')),
+        timeout=float(os.getenv('AI_JOB_TIMEOUT', '30')),
+        max_attempts=int(os.getenv('AI_JOB_MAX_ATTEMPTS', '3'))
+    )
+
+    # Password checks run on their own small pool so login storms cannot starve other requests
+    app.password_hasher = PasswordHasher(
+        max_workers=int(os.getenv('PASSWORD_HASH_WORKERS', '2')),
+        max_pending=int(os.getenv('PASSWORD_HASH_MAX_PENDING', '64'))
+    )
+    # Login lookups by email; shared like the response cache so a user update reaches every worker
+    if os.getenv('CACHE_REDIS_URL'):
+        app.login_cache = RedisCache.from_url(os.getenv('CACHE_REDIS_URL'), prefix="pm:login:")
+    else:
+        app.login_cache = LRUCache(max_entries=int(os.getenv('LOGIN_CACHE_MAX_ENTRIES', '1024')))
+
+    # In production, serve the built React app
+    if os.path.exists(FRONTEND_BUILD):
+        app.static_folder = FRONTEND_BUILD
+
+    # Register routes
     from routes.auth import auth_bp
     from routes.users import user_bp
     from routes.project import project_bp
     from routes.task import task_bp
     from routes.reports import report_bp
     from routes.ai import ai_bp
-    print("✅ All imports successful")
-except ImportError as e:
-    print(f"❌ Import error: {e}")
-    exit(1)
+    from routes.search import search_bp
 
-try:
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(user_bp, url_prefix="/api/users")
     app.register_blueprint(project_bp, url_prefix="/api/projects")
     app.register_blueprint(task_bp, url_prefix="/api/tasks")
     app.register_blueprint(report_bp, url_prefix="/api/reports")
     app.register_blueprint(ai_bp, url_prefix="/api/ai")
-    print("✅ All blueprints registered successfully")
-except Exception as e:
-    print(f"❌ Blueprint registration error: {e}")
-    exit(1)
-
-@app.route('/')
-def health_check():
-    return {"message": "Project Management API is running!", "status": "healthy"}
-
-@app.route('/api/test')
-def test_endpoint():
-    routes = []
-    for rule in app.url_map.iter_rules():
-        routes.append(str(rule))
-    return {"message": "API test endpoint working!", "routes": routes}
-
-# Serve React App
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve(path):
-    if path != "" and os.path.exists(app.static_folder + '/' + path):
-        return send_from_directory(app.static_folder, path)
-    else:
-        return send_from_directory(app.static_folder, 'index.html')
+    app.register_blueprint(search_bp, url_prefix="/api/search")
+
+    register_commands(app)
+    register_core_routes(app)
+    return app
+
+def register_commands(app):
+    @app.cli.command("rebuild-report-stats")
+    def rebuild_report_stats():
+        """Recompute the report_stats counters from the tasks collection."""
+        if app.db is None:
+            print("❌ No database connection")
+            return
+        from utils import report_stats
+        stats = report_stats.rebuild(app.db)
+        print(f"✅ Rebuilt report stats for {stats['total']} tasks")
+
+    @app.cli.command("ensure-indexes")
+    def ensure_indexes_command():
+        """Create all indexes declared in utils/indexes.py."""
+        if app.db is None:
+            print("❌ No database connection")
+            return
+        from utils.indexes import ensure_indexes
+        for collection, created in ensure_indexes(app.db).items():
+            print(f"{collection}: {created}")
+
+    @app.cli.command("check-indexes")
+    def check_indexes_command():
+        """explain() every registered query shape and flag collection scans."""
+        if app.db is None:
+            print("❌ No database connection")
+            return
+        from utils.indexes import check_query_shapes
+        for shape in check_query_shapes(app.db):
+            marker = "❌ COLLSCAN" if shape["collection_scan"] else "✅"
+            sort_note = " (in-memory sort)" if shape["in_memory_sort"] else ""
+            print(f"{marker} {shape['collection']}: {shape['name']} -> {', '.join(shape['indexes']) or 'no index'}{sort_note}")
+
+    @app.cli.command("create-admin")
+    @click.option("--email", required=True)
+    @click.option("--name", default="Admin User", show_default=True)
+    @click.password_option()
+    def create_admin_command(email, name, password):
+        """Create an Admin user, e.g. the first one on a fresh deployment.
+
+        Demo logins cannot write once a database is connected, so this (or
+        create_demo_data.py) is how the first Admin token is obtained.
+        """
+        if app.db is None:
+            print("❌ No database connection")
+            return
+        if app.db.users.find_one({"email": email}, {"_id": 1}) is not None:
+            print(f"❌ A user with email {email} already exists")
+            return
+        from utils.passwords import hash_password
+        app.db.users.insert_one({"name": name, "email": email, "role": "Admin",
+                                 "password_hash": hash_password(password)})
+        app.data_mode.mark_populated("users")
+        print(f"✅ Created Admin {email}")
+
+    @app.cli.command("migrate-comments")
+    def migrate_comments_command():
+        """Move comments embedded in tasks into the task_comments collection."""
+        if app.db is None:
+            print("❌ No database connection")
+            return
+        from utils.comments import migrate_embedded_comments
+        tasks, comments = migrate_embedded_comments(app.db)
+        print(f"✅ Moved {comments} comments from {tasks} tasks")
+
+    @app.cli.command("migrate-deadlines")
+    def migrate_deadlines_command():
+        """Convert task deadlines stored as ISO strings into dates."""
+        if app.db is None:
+            print("❌ No database connection")
+            return
+        from utils.task_store import migrate_deadlines
+        converted, invalid = migrate_deadlines(app.db)
+        print(f"✅ Converted {converted} task deadlines")
+        if invalid:
+            print(f"⚠️  {invalid} deadlines are not ISO 8601 dates and were left as they are")
+
+def register_core_routes(app):
+    @app.route('/')
+    def health_check():
+        return {"message": "Project Management API is running!", "status": "healthy"}
+
+    @app.route('/api/health/db')
+    def db_health():
+        """Connection state, read preferences and connection pool counters."""
+        return {
+            "connected": app.db is not None,
+            "read_preference": app.config['MONGODB_READ_PREFERENCE'],
+            "analytics_read_preference": app.config['MONGODB_ANALYTICS_READ_PREFERENCE'],
+            "max_pool_size": app.config['MONGODB_MAX_POOL_SIZE'],
+            "pool": app.pool_metrics.snapshot(),
+        }
+
+    @app.route('/metrics')
+    def metrics():
+        """Request, MongoDB and LLM metrics in the Prometheus text format."""
+        body = prometheus_text(app.request_metrics, app.command_metrics, app.pool_metrics, app.llm)
+        return Response(body, mimetype="text/plain; version=0.0.4")
+
+    @app.route('/api/test')
+    def test_endpoint():
+        routes = []
+        for rule in app.url_map.iter_rules():
+            routes.append(str(rule))
+        return {"message": "API test endpoint working!", "routes": routes}
+
+    # Serve React App
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve(path):
+        if path != "" and os.path.exists(app.static_folder + '/' + path):
+            return send_from_directory(app.static_folder, path)
+        else:
+            return send_from_directory(app.static_folder, 'index.html')
+
+_app_lock = threading.Lock()
+
+def __getattr__(name):
+    # `from app import app` (and gunicorn's "app:app") builds the app on
+    # first access instead of at import time
+    if name == "app":
+        with _app_lock:
+            if "app" not in globals():
+                globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == "__main__":
-    # In production, serve the built React app
-    if os.path.exists('../frontend/build'):
-        app.static_folder = '../frontend/build'
+    app = create_app()
+    print(f"✅ {len(app.blueprints)} blueprints registered")
+    if app.static_folder == FRONTEND_BUILD:
         print("✅ Serving built React frontend")
     else:
         print("⚠️  React build not found, serving API only")
 
-    app.run(debug=True, host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
+    # Development server only; production runs gunicorn with gunicorn.conf.py.
+    # FLASK_DEBUG=1 turns on the reloader and debugger.
+    debug = os.getenv('FLASK_DEBUG', '0').lower() in ('1', 'true', 'yes')
+    app.run(debug=debug, host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
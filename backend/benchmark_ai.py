@@ -0,0 +1,43 @@
+"""Offline benchmark of the AI user-story path using the stub provider.
+
+Usage: AI_PROVIDERS=stub STUB_LLM_DELAY=0.5 python benchmark_ai.py [requests] [concurrency]
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault('AI_PROVIDERS', 'stub')
+
+from app import app
+
+
+def generate(client, index):
+    started = time.perf_counter()
+    response = client.post('/api/ai/generate-user-stories/stream',
+                           json={"projectDescription": f"Benchmark project {index % 10}"})
+    body = response.get_data(as_text=True)
+    if "event: done" not in body:
+        raise RuntimeError(body)
+    return time.perf_counter() - started
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    client = app.test_client()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = sorted(pool.map(lambda index: generate(client, index), range(total)))
+    elapsed = time.perf_counter() - started
+
+    print(f"📊 {total} requests, concurrency {concurrency}: {total / elapsed:.1f} req/s")
+    for label, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+        print(f"   {label}: {latencies[min(len(latencies) - 1, int(total * fraction))] * 1000:.1f} ms")
+    for provider in app.llm.stats():
+        print(f"   {provider['name']}: {provider['calls']} calls, {provider['errors']} errors, circuit {provider['circuit']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Login benchmark: password hash cost and login throughput.
+
+Usage: python benchmark_login.py [logins] [concurrency]
+
+The hash section needs nothing. The throughput section logs in as the
+admin from create_demo_data.py, so point MONGODB_URI at a database where
+that script has run; it also times GET / while the logins are running to
+show how much the hashing slows unrelated requests.
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from app import app
+from utils.passwords import PASSWORD_HASH_METHOD
+
+METHODS = ("pbkdf2:sha256:260000", "pbkdf2:sha256:600000", "scrypt:32768:8:1", PASSWORD_HASH_METHOD)
+
+
+def percentiles(latencies):
+    latencies = sorted(latencies)
+    return ", ".join(f"{label} {latencies[min(len(latencies) - 1, int(len(latencies) * fraction))] * 1000:.1f} ms"
+                     for label, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)))
+
+
+def time_methods():
+    print("📊 Password check cost per method")
+    for method in dict.fromkeys(METHODS):
+        stored = generate_password_hash("benchmark", method=method)
+        started = time.perf_counter()
+        for _ in range(5):
+            check_password_hash(stored, "benchmark")
+        marker = " (PASSWORD_HASH_METHOD)" if method == PASSWORD_HASH_METHOD else ""
+        print(f"   {method}: {(time.perf_counter() - started) / 5 * 1000:.1f} ms{marker}")
+
+
+def timed(call):
+    started = time.perf_counter()
+    status = call().status_code
+    return status, time.perf_counter() - started
+
+
+def time_logins(total, concurrency):
+    if app.db is None or app.db.users.find_one({"email": "admin@example.com"}) is None:
+        print("⚠️  No database with demo users; run create_demo_data.py to benchmark logins")
+        return
+    client = app.test_client()
+    credentials = {"email": os.getenv("BENCHMARK_EMAIL", "admin@example.com"),
+                   "password": os.getenv("BENCHMARK_PASSWORD", "admin123")}
+
+    def login(_):
+        return timed(lambda: client.post('/api/auth/login', json=credentials))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        logins = pool.map(login, range(total))
+        health = [timed(lambda: client.get('/')) for _ in range(50)]
+        logins = list(logins)
+    elapsed = time.perf_counter() - started
+
+    errors = sum(1 for status, _ in logins if status != 200)
+    print(f"📊 {total} logins, concurrency {concurrency}: {total / elapsed:.1f} logins/s, {errors} errors")
+    print(f"   login: {percentiles([latency for _, latency in logins])}")
+    print(f"   GET / during logins: {percentiles([latency for _, latency in health])}")
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    time_methods()
+    time_logins(total, concurrency)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Cold-start benchmark: module import, create_app() and first request.
+
+Usage: python benchmark_startup.py [runs]
+
+Each run is a fresh interpreter. Set MONGODB_URI to include a real
+connection in the first-request time; by default it runs in demo mode.
+Also times pytest collection of backend/tests.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND = os.path.dirname(os.path.abspath(__file__))
+
+PROBE = """
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app()
+created = time.perf_counter()
+application.test_client().get('/api/tasks')
+served = time.perf_counter()
+print(json.dumps({"import": imported - started, "create_app": created - imported, "first_request": served - created}))
+"""
+
+
+def run_probe(env):
+    output = subprocess.run([sys.executable, "-c", PROBE], cwd=BACKEND, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    env = {**os.environ}
+    env.setdefault("MONGODB_URI", "")
+
+    samples = [run_probe(env) for _ in range(runs)]
+    print(f"📊 Cold start over {runs} runs (median)")
+    for phase in ("import", "create_app", "first_request"):
+        print(f"   {phase}: {statistics.median(sample[phase] for sample in samples) * 1000:.1f} ms")
+
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-m", "pytest", "--collect-only", "-q", "backend/tests"],
+                   cwd=os.path.dirname(BACKEND), env={**env, "PYTHONPATH": BACKEND},
+                   capture_output=True, check=True)
+    print(f"   pytest collection: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
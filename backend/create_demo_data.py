@@ -1,9 +1,10 @@
 # Create demo users for testing
 from pymongo import MongoClient
-import bcrypt
 from datetime import datetime
 import os
 from dotenv import load_dotenv
+from utils.task_store import insert_tasks
+from utils.passwords import hash_password
 
 load_dotenv()
 
@@ -42,14 +43,14 @@ def create_demo_users():
     ]
     
     for user_data in demo_users:
-        # Hash password
-        hashed_password = bcrypt.hashpw(user_data['password'].encode('utf-8'), bcrypt.gensalt())
+        # Hash password the way login verifies it
+        hashed_password = hash_password(user_data['password'])
         
         user = {
             "name": user_data['name'],
             "email": user_data['email'],
             "role": user_data['role'],
-            "password": hashed_password,
+            "password_hash": hashed_password,
             "created_at": datetime.utcnow()
         }
         
@@ -99,7 +100,6 @@ def create_demo_projects():
 
 def create_demo_tasks():
     """Create demo tasks"""
-    tasks_collection = db.tasks
     projects_collection = db.projects
     users_collection = db.users
     
@@ -150,9 +150,12 @@ def create_demo_tasks():
         }
     ]
     
-    for task_data in demo_tasks:
-        result = tasks_collection.insert_one(task_data)
-        print(f"Created task: {task_data['title']} with ID: {result.inserted_id}")
+    for result in insert_tasks(db, demo_tasks):
+        task_data = demo_tasks[result["index"]]
+        if result["status"] == "created":
+            print(f"Created task: {task_data['title']} with ID: {result['_id']}")
+        else:
+            print(f"Failed to create task: {task_data['title']} ({result['error']})")
 
 if __name__ == "__main__":
     print("Creating demo data...")
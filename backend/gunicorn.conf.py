@@ -0,0 +1,37 @@
+# Gunicorn settings for production: gunicorn -c gunicorn.conf.py
+# Every value can be overridden with the environment variable named next to it.
+import multiprocessing
+import os
+
+wsgi_app = "app:app"
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# Requests mostly wait on MongoDB and the LLM, so each worker runs a few
+# threads; (2 x cores) + 1 workers is the usual starting point.
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+worker_class = "gthread"
+
+# Import the app once in the master so workers fork with it already loaded
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') != '0'
+
+# Streaming AI responses can take a while; graceful_timeout lets in-flight
+# requests finish on restart and keepalive reuses connections behind a proxy.
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+# Recycle workers now and then to bound memory growth
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '200'))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    # MongoClient is not fork-safe; give every worker its own connection pool
+    if preload_app:
+        import app as app_module
+        app_module.app.reset_db()
@@ -0,0 +1,45 @@
+"""Small HTTP load test to compare serving setups.
+
+Usage:
+    python load_test.py http://localhost:5000/api/tasks [requests] [concurrency]
+
+Run it once against `python app.py` and once against
+`gunicorn -c gunicorn.conf.py` to see the throughput difference.
+"""
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+
+def main():
+    url = sys.argv[1] if len(sys.argv) > 1 else "http://localhost:5000/api/tasks"
+    total = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 32
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    with httpx.Client(limits=limits, timeout=30) as client:
+        def fetch(_):
+            started = time.perf_counter()
+            try:
+                ok = client.get(url).status_code < 500
+            except httpx.HTTPError:
+                ok = False
+            return ok, time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(fetch, range(total)))
+        elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for _, latency in results)
+    errors = sum(1 for ok, _ in results if not ok)
+    print(f"📊 {url}: {total} requests, concurrency {concurrency}")
+    print(f"   {total / elapsed:.1f} req/s, {errors} errors")
+    for label, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+        print(f"   {label}: {latencies[min(total - 1, int(total * fraction))] * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
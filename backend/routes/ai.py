@@ -1,29 +1,35 @@
-from flask import Blueprint, request, jsonify, current_app
-from groq import Groq
+from flask import Blueprint, request, jsonify, current_app, url_for
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import json
 import os
+from routes.task import create_tasks
+from utils.jobs import QueueFull
+from utils.jwt import require_auth
+from utils.streaming import stream_events
 
 ai_bp = Blueprint('ai', __name__)
 
-# Initialize Groq client only if API key is available
-groq_api_key = os.getenv('GROQ_API_KEY')
-groq_client = Groq(api_key=groq_api_key) if groq_api_key and groq_api_key != 'your-groq-api-key-here' else None
+AI_TEMPERATURE = 0.7
+AI_MAX_TOKENS = 1000
+MAX_BATCH_PROJECTS = 50
+# LLM calls running at once for one batch request
+AI_BATCH_CONCURRENCY = int(os.getenv('AI_BATCH_CONCURRENCY', '4'))
 
-@ai_bp.route('/generate-user-stories', methods=['POST'])
-def generate_user_stories():
-    """Generate user stories from project description using GROQ AI"""
-    if not groq_client:
-        return jsonify({"error": "GROQ API key not configured. Please set GROQ_API_KEY in your .env file."}), 503
-
-    try:
-        data = request.json
-        project_description = data.get('projectDescription', '')
-        project_id = data.get('projectId', '')
+def get_llm():
+    """Provider router set up in app.py (Groq, local server and/or stub)"""
+    return current_app.llm
 
-        if not project_description:
-            return jsonify({"error": "Project description is required"}), 400
+def build_messages(project_description):
+    return [
+        {
+            "role": "user",
+            "content": build_prompt(project_description),
+        }
+    ]
 
-        # Create the prompt for user story generation
-        prompt = f"""
+def build_prompt(project_description):
+    return f"""
         Generate detailed user stories from the following project description.
         Each user story should follow this exact format:
         "As a [role], I want to [action], so that [benefit]."
@@ -37,112 +43,339 @@ def generate_user_stories():
         Return only the user stories as a JSON array of strings, no additional text.
         """
 
-        # Call GROQ API
-        chat_completion = groq_client.chat.completions.create(
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt,
-                }
-            ],
-            model="llama-3.1-8b-instant",  # Using Llama 3.1 8B Instant model
-            temperature=0.7,
-            max_tokens=1000,
-        )
-
-        # Extract the response
-        response_text = chat_completion.choices[0].message.content.strip()
-
-        # Try to parse as JSON, if not, split by newlines
+def parse_user_stories(response_text):
+    """Parse the model output as a JSON array, falling back to quoted lines"""
+    try:
+        user_stories = json.loads(response_text)
+        if isinstance(user_stories, list):
+            return [str(story) for story in user_stories]
+    except ValueError:
+        pass
+    # Fallback: split by newlines and clean up
+    return [line.strip().strip('"') for line in response_text.split('\n') if line.strip() and line.startswith('"')]
+
+class StoryStreamParser:
+    """Pulls complete string literals out of a completion as it streams in.
+
+    Works for the JSON array we ask for as well as the quoted-lines
+    fallback, since both put every story in double quotes.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, text):
+        self._buffer += text
+        stories = []
+        while True:
+            start = self._buffer.find('"')
+            if start == -1:
+                self._buffer = ""
+                break
+            end = start + 1
+            while end < len(self._buffer) and self._buffer[end] != '"':
+                end += 2 if self._buffer[end] == "\\" else 1
+            if end >= len(self._buffer):
+                # Story not finished yet; keep it for the next chunk
+                self._buffer = self._buffer[start:]
+                break
+            literal = self._buffer[start:end + 1]
+            self._buffer = self._buffer[end + 1:]
+            try:
+                story = json.loads(literal)
+            except ValueError:
+                story = literal[1:-1]
+            if story.strip():
+                stories.append(story.strip())
+        return stories
+
+def answered_by_primary(llm, answered):
+    """Only the first provider's answers are cached, since the cache key names its model"""
+    return bool(answered) and bool(llm.providers) and answered[-1] is llm.providers[0]
+
+def request_user_stories(project_description, timeout=None):
+    """Parsed user stories for a description, from the prompt cache or the LLM"""
+    llm = get_llm()
+    answered = []
+
+    def complete():
+        text = llm.complete(build_messages(project_description), AI_TEMPERATURE, AI_MAX_TOKENS,
+                            timeout=timeout, on_provider=answered.append)
+        return parse_user_stories(text.strip())
+
+    prompt_cache = getattr(current_app, "prompt_cache", None)
+    if prompt_cache is None:
+        return complete()
+    key = prompt_cache.key(project_description, llm.model, AI_TEMPERATURE)
+    user_stories, _ = prompt_cache.get_or_compute(key, complete,
+                                                  should_cache=lambda _: answered_by_primary(llm, answered))
+    return list(user_stories)
+
+def stream_user_stories(project_description, timeout=None):
+    """Yield user stories one at a time as the LLM streams its completion"""
+    llm = get_llm()
+    prompt_cache = getattr(current_app, "prompt_cache", None)
+    key = prompt_cache.key(project_description, llm.model, AI_TEMPERATURE) if prompt_cache is not None else None
+    cached_stories = prompt_cache.get(key) if key else None
+    if cached_stories:
+        yield from cached_stories
+        return
+
+    parser = StoryStreamParser()
+    user_stories = []
+    answered = []
+    for text in llm.stream(build_messages(project_description), AI_TEMPERATURE, AI_MAX_TOKENS,
+                           timeout=timeout, on_provider=answered.append):
+        for story in parser.feed(text):
+            user_stories.append(story)
+            yield story
+    if key and answered_by_primary(llm, answered):
+        prompt_cache.set(key, user_stories)
+
+def save_user_stories(project_id, project_description, user_stories, create_tasks_too=False):
+    """Persist generated stories and optionally turn them into tasks"""
+    # Store user stories in database if project_id provided
+    if project_id:
+        # Check if we should use demo mode
+        use_demo_mode = current_app.data_mode.is_demo("projects")
+
+        if not use_demo_mode:
+            # Store in database
+            user_stories_doc = {
+                "project_id": project_id,
+                "description": project_description,
+                "stories": user_stories,
+                "generated_at": datetime.utcnow()
+            }
+            current_app.db.user_stories.insert_one(user_stories_doc)
+
+    # Optional: Create tasks from user stories
+    if create_tasks_too and project_id:
+        create_tasks_from_stories(user_stories, project_id)
+
+def run_user_story_job(payload, timeout):
+    """Job runner: generate, store and return the user stories for one project"""
+    user_stories = request_user_stories(payload["projectDescription"], timeout=timeout)
+    save_user_stories(payload["projectId"], payload["projectDescription"], user_stories, payload["createTasks"])
+    return {
+        "user_stories": user_stories,
+        "count": len(user_stories),
+        "project_id": payload["projectId"]
+    }
+
+def run_batch_user_story_job(payload, timeout):
+    """Job runner: generate stories for many projects and store them in bulk"""
+    app = current_app._get_current_object()
+
+    def generate(item):
+        with app.app_context():
+            try:
+                user_stories = request_user_stories(item["projectDescription"], timeout=timeout)
+            except Exception as e:
+                return {**item, "status": "failed", "error": str(e)}
+            return {**item, "status": "ok", "user_stories": user_stories, "count": len(user_stories)}
+
+    with ThreadPoolExecutor(max_workers=AI_BATCH_CONCURRENCY) as pool:
+        results = list(pool.map(generate, payload["projects"]))
+
+    generated = [result for result in results if result["status"] == "ok" and result["projectId"]]
+    # Check if we should use demo mode
+    if generated and not current_app.data_mode.is_demo("projects"):
+        generated_at = datetime.utcnow()
+        current_app.db.user_stories.insert_many([{
+            "project_id": result["projectId"],
+            "description": result["projectDescription"],
+            "stories": result["user_stories"],
+            "generated_at": generated_at
+        } for result in generated])
+
+        # Tasks for every project in one bulk insert; stories are already stored
+        if payload["createTasks"]:
+            try:
+                tasks = [task for result in generated
+                         for task in tasks_from_stories(result["user_stories"], result["projectId"])]
+                if tasks:
+                    create_tasks(tasks, ordered=False)
+            except Exception as e:
+                print(f"Error creating tasks from stories: {e}")
+
+    return {
+        "results": [{
+            "index": index,
+            "project_id": result["projectId"],
+            "status": result["status"],
+            **({"user_stories": result["user_stories"], "count": result["count"]}
+               if result["status"] == "ok" else {"error": result["error"]})
+        } for index, result in enumerate(results)],
+        "succeeded": sum(1 for result in results if result["status"] == "ok"),
+        "failed": sum(1 for result in results if result["status"] != "ok")
+    }
+
+def job_accepted(job):
+    status_url = url_for('ai.get_job', job_id=job["_id"])
+    return jsonify({
+        "job_id": job["_id"],
+        "status": job["status"],
+        "status_url": status_url
+    }), 202, {"Location": status_url}
+
+@ai_bp.route('/generate-user-stories', methods=['POST'])
+@require_auth()
+def generate_user_stories():
+    """Queue user story generation; poll GET /api/ai/jobs/<job_id> for the result"""
+    if not get_llm().providers:
+        return jsonify({"error": "No AI provider configured. Please set GROQ_API_KEY (or LOCAL_LLM_URL) in your .env file."}), 503
+
+    data = request.json or {}
+    project_description = data.get('projectDescription', '')
+    if not project_description:
+        return jsonify({"error": "Project description is required"}), 400
+
+    payload = {
+        "projectDescription": project_description,
+        "projectId": data.get('projectId', ''),
+        "createTasks": bool(data.get('createTasks', False))
+    }
+    try:
+        job = current_app.job_queue.submit("user_stories", payload, run_user_story_job)
+    except QueueFull as e:
+        return jsonify({"error": str(e)}), 503
+    return job_accepted(job)
+
+@ai_bp.route('/generate-user-stories/batch', methods=['POST'])
+@require_auth()
+def generate_user_stories_batch():
+    """Queue user story generation for many projects as one job"""
+    if not get_llm().providers:
+        return jsonify({"error": "No AI provider configured. Please set GROQ_API_KEY (or LOCAL_LLM_URL) in your .env file."}), 503
+
+    data = request.json or {}
+    projects = data.get('projects')
+    if not isinstance(projects, list) or not projects:
+        return jsonify({"error": "projects must be a non-empty list"}), 400
+    if len(projects) > MAX_BATCH_PROJECTS:
+        return jsonify({"error": f"At most {MAX_BATCH_PROJECTS} projects per request"}), 400
+    for index, project in enumerate(projects):
+        if not isinstance(project, dict) or not project.get('projectDescription'):
+            return jsonify({"error": f"Project description is required (projects[{index}])"}), 400
+
+    payload = {
+        "projects": [{
+            "projectDescription": project['projectDescription'],
+            "projectId": project.get('projectId', '')
+        } for project in projects],
+        "createTasks": bool(data.get('createTasks', False))
+    }
+    try:
+        job = current_app.job_queue.submit("user_stories_batch", payload, run_batch_user_story_job)
+    except QueueFull as e:
+        return jsonify({"error": str(e)}), 503
+    return job_accepted(job)
+
+@ai_bp.route('/generate-user-stories/stream', methods=['POST'])
+@require_auth()
+def stream_generate_user_stories():
+    """Generate user stories and push each one to the client as a Server-Sent Event"""
+    if not get_llm().providers:
+        return jsonify({"error": "No AI provider configured. Please set GROQ_API_KEY (or LOCAL_LLM_URL) in your .env file."}), 503
+
+    data = request.json or {}
+    project_description = data.get('projectDescription', '')
+    if not project_description:
+        return jsonify({"error": "Project description is required"}), 400
+    project_id = data.get('projectId', '')
+    create_tasks_too = bool(data.get('createTasks', False))
+    timeout = current_app.job_queue.timeout
+
+    def events():
+        user_stories = []
         try:
-            import json
-            user_stories = json.loads(response_text)
-        except:
-            # Fallback: split by newlines and clean up
-            user_stories = [line.strip().strip('"') for line in response_text.split('\n') if line.strip() and line.startswith('"')]
-
-        # Store user stories in database if project_id provided
-        if project_id and current_app.db:
-            # Check if we should use demo mode
-            use_demo_mode = (current_app.db is None or
-                            current_app.db.projects.count_documents({}) == 0)
-
-            if not use_demo_mode:
-                # Store in database
-                user_stories_doc = {
-                    "project_id": project_id,
-                    "description": project_description,
-                    "stories": user_stories,
-                    "generated_at": "2025-09-21T00:00:00Z"  # Current date
-                }
-                current_app.db.user_stories.insert_one(user_stories_doc)
-
-        # Optional: Create tasks from user stories
-        if data.get('createTasks', False) and project_id:
-            create_tasks_from_stories(user_stories, project_id)
-
-        return jsonify({
-            "user_stories": user_stories,
-            "count": len(user_stories),
-            "project_id": project_id
-        }), 200
+            for story in stream_user_stories(project_description, timeout=timeout):
+                user_stories.append(story)
+                yield "story", {"index": len(user_stories) - 1, "story": story}
+            # Same persistence as the job runner, once the full list is known
+            save_user_stories(project_id, project_description, user_stories, create_tasks_too)
+        except Exception as e:
+            print(f"❌ Error streaming user stories: {e}")
+            yield "error", {"error": "Failed to generate user stories", "details": str(e)}
+            return
+        yield "done", {"count": len(user_stories), "project_id": project_id}
 
-    except Exception as e:
-        print(f"Error generating user stories: {e}")
-        return jsonify({"error": "Failed to generate user stories", "details": str(e)}), 500
+    return stream_events(events())
+
+@ai_bp.route('/providers', methods=['GET'])
+def get_providers():
+    """Circuit state, call counts and latency histogram of every LLM provider"""
+    return jsonify(get_llm().stats()), 200
+
+@ai_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status of a queued AI job, with the result once it has succeeded"""
+    job = current_app.job_queue.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    job["job_id"] = job.pop("_id")
+    return jsonify(job), 200
 
 def create_tasks_from_stories(user_stories, project_id):
     """Optional: Create tasks automatically from user stories"""
     try:
-        use_demo_mode = (current_app.db is None or
-                        current_app.db.projects.count_documents({}) == 0)
+        use_demo_mode = current_app.data_mode.is_demo("projects")
 
         if use_demo_mode:
             return  # Skip in demo mode
 
-        for i, story in enumerate(user_stories):
-            # Parse the user story to extract components
-            # Format: "As a [role], I want to [action], so that [benefit]."
-            if "As a" in story and "I want to" in story and "so that" in story:
-                parts = story.split(", I want to ")
-                if len(parts) == 2:
-                    role_part = parts[0].replace("As a ", "")
-                    action_benefit = parts[1].split(", so that ")
-                    if len(action_benefit) == 2:
-                        action = action_benefit[0]
-                        benefit = action_benefit[1].rstrip(".")
-
-                        # Create task
-                        task_data = {
-                            "project_id": project_id,
-                            "title": f"Implement: {action}",
-                            "description": f"User Story: {story}\n\nBenefit: {benefit}",
-                            "status": "To Do",
-                            "priority": "Medium",
-                            "assigned_to": None,  # Unassigned
-                            "deadline": None,  # No deadline
-                            "comments": [],
-                            "created_at": "2025-09-21T00:00:00Z",
-                            "updated_at": "2025-09-21T00:00:00Z"
-                        }
-                        current_app.db.tasks.insert_one(task_data)
+        tasks = tasks_from_stories(user_stories, project_id)
+
+        # Write all tasks in one round trip
+        if tasks:
+            create_tasks(tasks, ordered=False)
 
     except Exception as e:
         print(f"Error creating tasks from stories: {e}")
 
+def tasks_from_stories(user_stories, project_id):
+    """Task documents for the stories that follow the "As a ..., I want to ..., so that ..." format"""
+    tasks = []
+    for story in user_stories:
+        # Parse the user story to extract components
+        # Format: "As a [role], I want to [action], so that [benefit]."
+        if "As a" in story and "I want to" in story and "so that" in story:
+            parts = story.split(", I want to ")
+            if len(parts) == 2:
+                role_part = parts[0].replace("As a ", "")
+                action_benefit = parts[1].split(", so that ")
+                if len(action_benefit) == 2:
+                    action = action_benefit[0]
+                    benefit = action_benefit[1].rstrip(".")
+
+                    # Create task
+                    task_data = {
+                        "project_id": project_id,
+                        "title": f"Implement: {action}",
+                        "description": f"User Story: {story}\n\nBenefit: {benefit}",
+                        "status": "To Do",
+                        "priority": "Medium",
+                        "assigned_to": None,  # Unassigned
+                        "deadline": None,  # No deadline
+                        "comments": [],
+                        "created_at": "2025-09-21T00:00:00Z",
+                        "updated_at": "2025-09-21T00:00:00Z"
+                    }
+                    tasks.append(task_data)
+
+    return tasks
+
 @ai_bp.route('/user-stories/<project_id>', methods=['GET'])
 def get_user_stories(project_id):
     """Get generated user stories for a project"""
     try:
-        use_demo_mode = (current_app.db is None or
-                        current_app.db.projects.count_documents({}) == 0)
+        use_demo_mode = current_app.data_mode.is_demo("projects")
 
         if use_demo_mode:
             return jsonify([]), 200
 
         stories = list(current_app.db.user_stories.find({"project_id": project_id}))
-        for story in stories:
-            story["_id"] = str(story["_id"])
 
         return jsonify(stories), 200
 
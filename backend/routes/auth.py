@@ -1,24 +1,26 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_cors import cross_origin
 from flask_jwt_extended import create_access_token
-from werkzeug.security import check_password_hash
+from utils.jwt import DEMO_SUBJECT_PREFIX
+from utils.passwords import LOGIN_PROJECTION, HasherBusy
 
 auth_bp = Blueprint('auth', __name__)
 
+# Role for users stored without one (POST /api/users does not require it)
+DEFAULT_ROLE = "Developer"
+
 @auth_bp.route('/login', methods=['POST', 'OPTIONS'])
 @cross_origin()
 def login():
     if request.method == 'OPTIONS':
         return jsonify({}), 200
         
-    print("🔍 Login request received")
-    print(f"Request data: {request.json}")
-    
-    data = request.json
+    data = request.json or {}
+    if not data.get("email") or not data.get("password"):
+        return jsonify({"error": "Invalid credentials"}), 401
     
     # Check if we should use demo mode (no DB or empty DB)
-    use_demo_mode = (current_app.db is None or 
-                    current_app.db.users.count_documents({}) == 0)
+    use_demo_mode = current_app.data_mode.is_demo("users")
     
     if use_demo_mode:
         print("📝 Running in demo mode")
@@ -31,11 +33,14 @@ def login():
         
         if data["email"] in demo_users:
             user_info = demo_users[data["email"]]
-            token = create_access_token(identity={"email": data["email"], "role": user_info["role"]})
+            # Only reads accept this token once a database is connected (see require_auth)
+            user_id = f"{DEMO_SUBJECT_PREFIX}{data['email'].split('@')[0]}"
+            token = create_access_token(identity=user_id,
+                                        additional_claims={"role": user_info["role"], "email": data["email"]})
             return jsonify({
                 "access_token": token,
                 "user": {
-                    "_id": f"demo-{data['email'].split('@')[0]}",
+                    "_id": user_id,
                     "username": user_info["username"],
                     "email": data["email"],
                     "role": user_info["role"]
@@ -45,21 +50,56 @@ def login():
             return jsonify({"error": "Invalid credentials"}), 401
     
     # Database mode
-    print(f"🔍 Looking for user with email: {data.get('email')}")
-    user = current_app.db.users.find_one({"email": data["email"]})
-    if user and check_password_hash(user["password_hash"], data["password"]):
-        token = create_access_token(identity={"email": user["email"], "role": user["role"]})
+    user = find_login_user(data["email"])
+    hasher = current_app.password_hasher
+    try:
+        verified = user is not None and hasher.verify(user.get("password_hash"), data["password"])
+    except HasherBusy as e:
+        return jsonify({"error": str(e)}), 503
+    if verified:
+        role = user.get("role") or DEFAULT_ROLE
+        if hasher.needs_rehash(user["password_hash"]):
+            try:
+                rehash_password(user, data["password"])
+            except HasherBusy:
+                pass  # Upgraded on a later login
+        # Role and email travel in the token so routes can authorize without a users lookup
+        token = create_access_token(identity=str(user["_id"]),
+                                    additional_claims={"role": role, "email": user["email"]})
         return jsonify({
             "access_token": token,
             "user": {
                 "_id": str(user["_id"]),
-                "username": user["name"],
+                "username": user.get("name") or user.get("username"),
                 "email": user["email"],
-                "role": user["role"]
+                "role": role
             }
         }), 200
     return jsonify({"error": "Invalid credentials"}), 401
 
+def find_login_user(email):
+    """Indexed, projected lookup by email, cached for LOGIN_CACHE_TTL seconds."""
+    ttl = current_app.config['LOGIN_CACHE_TTL']
+    user = current_app.login_cache.get(email) if ttl else None
+    if user is None:
+        user = current_app.db.users.find_one({"email": email}, LOGIN_PROJECTION)
+        if user is not None and ttl:
+            current_app.login_cache.set(email, user, ttl=ttl)
+    return user
+
+def rehash_password(user, password):
+    """Upgrade a hash made with an older method to PASSWORD_HASH_METHOD."""
+    old_hash = user["password_hash"]
+    new_hash = current_app.password_hasher.hash(password)
+    # Matching on the old hash keeps a concurrent password change from being overwritten
+    current_app.db.users.update_one({"_id": user["_id"], "password_hash": old_hash},
+                                    {"$set": {"password_hash": new_hash}})
+    user["password_hash"] = new_hash
+    # The cached copy may live in a shared backend, so store it again rather than edit it in place
+    ttl = current_app.config['LOGIN_CACHE_TTL']
+    if ttl:
+        current_app.login_cache.set(user["email"], user, ttl=ttl)
+
 @auth_bp.route('/test', methods=['GET'])
 @cross_origin()
 def test_auth():
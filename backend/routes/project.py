@@ -1,77 +1,139 @@
 from flask import Blueprint, request, jsonify, current_app
 from bson import ObjectId
+from utils.streaming import stream_documents, streaming_format
+from utils.cache import cached, invalidate
+from utils.jwt import require_auth
+from routes.task import add_next_page_headers, demo_task_feed, task_feed, task_feed_page, task_feed_pipeline
+from routes.users import DEMO_USERS
 
 project_bp = Blueprint('projects', __name__)
 
+# Mock projects served while the projects collection is empty
+DEMO_PROJECTS = [
+    {
+        "_id": "demo-project-1",
+        "name": "E-commerce Website",
+        "description": "Build a modern e-commerce platform with React and Node.js",
+        "status": "Active",
+        "deadline": "2025-12-31T00:00:00Z",
+        "team_members": ["demo-manager", "demo-developer", "demo-designer"],
+        "created_by": "demo-admin",
+        "created_at": "2025-09-20T00:00:00Z"
+    },
+    {
+        "_id": "demo-project-2",
+        "name": "Mobile App Development",
+        "description": "Create a cross-platform mobile app using React Native",
+        "status": "Active", 
+        "deadline": "2025-11-15T00:00:00Z",
+        "team_members": ["demo-developer", "demo-designer"],
+        "created_by": "demo-manager",
+        "created_at": "2025-09-20T00:00:00Z"
+    },
+    {
+        "_id": "demo-project-3",
+        "name": "Data Analytics Dashboard",
+        "description": "Develop a comprehensive analytics dashboard for business intelligence",
+        "status": "Planning",
+        "deadline": "2026-01-20T00:00:00Z",
+        "team_members": ["demo-developer", "demo-tester"],
+        "created_by": "demo-admin",
+        "created_at": "2025-09-21T00:00:00Z"
+    },
+    {
+        "_id": "demo-project-4",
+        "name": "AI Chatbot Implementation",
+        "description": "Integrate AI-powered chatbot for customer support",
+        "status": "In Progress",
+        "deadline": "2025-10-30T00:00:00Z",
+        "team_members": ["demo-developer", "demo-manager"],
+        "created_by": "demo-manager",
+        "created_at": "2025-09-21T00:00:00Z"
+    }
+]
+
 @project_bp.route('/', methods=['GET'])
+@cached("projects")
 def get_projects():
+    fmt = streaming_format()
     # Check if we should use demo mode
-    use_demo_mode = (current_app.db is None or 
-                    current_app.db.projects.count_documents({}) == 0)
+    use_demo_mode = current_app.data_mode.is_demo("projects")
     
     if use_demo_mode:
         # Demo mode - return mock projects
-        return jsonify([
-            {
-                "_id": "demo-project-1",
-                "name": "E-commerce Website",
-                "description": "Build a modern e-commerce platform with React and Node.js",
-                "status": "Active",
-                "deadline": "2025-12-31T00:00:00Z",
-                "team_members": ["demo-manager", "demo-developer", "demo-designer"],
-                "created_by": "demo-admin",
-                "created_at": "2025-09-20T00:00:00Z"
-            },
-            {
-                "_id": "demo-project-2",
-                "name": "Mobile App Development",
-                "description": "Create a cross-platform mobile app using React Native",
-                "status": "Active", 
-                "deadline": "2025-11-15T00:00:00Z",
-                "team_members": ["demo-developer", "demo-designer"],
-                "created_by": "demo-manager",
-                "created_at": "2025-09-20T00:00:00Z"
-            },
-            {
-                "_id": "demo-project-3",
-                "name": "Data Analytics Dashboard",
-                "description": "Develop a comprehensive analytics dashboard for business intelligence",
-                "status": "Planning",
-                "deadline": "2026-01-20T00:00:00Z",
-                "team_members": ["demo-developer", "demo-tester"],
-                "created_by": "demo-admin",
-                "created_at": "2025-09-21T00:00:00Z"
-            },
-            {
-                "_id": "demo-project-4",
-                "name": "AI Chatbot Implementation",
-                "description": "Integrate AI-powered chatbot for customer support",
-                "status": "In Progress",
-                "deadline": "2025-10-30T00:00:00Z",
-                "team_members": ["demo-developer", "demo-manager"],
-                "created_by": "demo-manager",
-                "created_at": "2025-09-21T00:00:00Z"
-            }
-        ])
+        return stream_documents(DEMO_PROJECTS, fmt) if fmt else jsonify(DEMO_PROJECTS)
     
-    projects = list(current_app.db.projects.find())
-    for project in projects:
-        project["_id"] = str(project["_id"])
-        if "team" in project:
-            project["team"] = [str(member) for member in project["team"]]
-        if "created_by" in project:
-            project["created_by"] = str(project["created_by"])
+    if fmt:
+        return stream_documents(current_app.analytics_db.projects.find(), fmt)
+
+    projects = list(current_app.analytics_db.projects.find())
     return jsonify(projects)
 
+@project_bp.route('/<project_id>', methods=['GET'])
+@cached("projects", "tasks", "users")
+def get_project(project_id):
+    """A project with its team members, first page of tasks and task counts.
+
+    One aggregation: a $lookup resolves ``team`` into ``members`` (without
+    password hashes) and a second $lookup runs the task feed pipeline, so
+    ?limit=, ?status= and the other task feed arguments apply to ``tasks``.
+    Later pages come from GET /api/projects/<id>/tasks (see X-Next-Cursor).
+    """
+    try:
+        # Check if we should use demo mode
+        use_demo_mode = current_app.data_mode.is_demo("projects")
+
+        if use_demo_mode:
+            project = next((p for p in DEMO_PROJECTS if p["_id"] == project_id), None)
+            if project is None:
+                return jsonify({"error": "Project not found"}), 404
+            members = [user for user in DEMO_USERS if user["_id"] in project["team_members"]]
+            tasks, counts = demo_task_feed("project_id", project_id, request.args)
+            return jsonify({**project, "members": members, "tasks": tasks,
+                            "task_counts": counts, "task_total": len(tasks)})
+
+        if not ObjectId.is_valid(project_id):
+            return jsonify({"error": "Project not found"}), 404
+        feed, limit = task_feed_pipeline("project_id", project_id, request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    pipeline = [
+        {"$match": {"_id": ObjectId(project_id)}},
+        {"$lookup": {"from": "users", "localField": "team", "foreignField": "_id", "as": "members"}},
+        {"$project": {"members.password_hash": 0, "members.password": 0}},
+        {"$lookup": {"from": "tasks", "pipeline": feed, "as": "task_feed"}},
+    ]
+    project = next(current_app.analytics_db.projects.aggregate(pipeline), None)
+    if project is None:
+        return jsonify({"error": "Project not found"}), 404
+
+    feed_result = (project.pop("task_feed") or [{"tasks": [], "counts": []}])[0]
+    tasks, counts, next_cursor = task_feed_page(feed_result, limit)
+    response = jsonify({**project, "tasks": tasks, "task_counts": counts, "task_total": sum(counts.values())})
+    if next_cursor:
+        add_next_page_headers(response, next_cursor, "projects.get_project_tasks", project_id=project_id)
+    return response
+
+@project_bp.route('/<project_id>/tasks', methods=['GET'])
+@cached("tasks")
+def get_project_tasks(project_id):
+    """Tasks of a project with per-status counts; see task_feed()."""
+    return task_feed("project_id", project_id)
+
 @project_bp.route('/', methods=['POST'])
+@require_auth()
 def create_project():
     data = request.json
     if not data.get("name") or not data.get("description"):
         return jsonify({"error": "Missing required fields"}), 400
     current_app.db.projects.insert_one(data)
+    current_app.data_mode.mark_populated("projects")
+    invalidate("projects")
     return jsonify({"message": "Project created"}), 201
 
 @project_bp.route('/<project_id>', methods=['PUT'])
+@require_auth()
 def update_project(project_id):
     data = request.json
     from bson import ObjectId
@@ -81,17 +143,22 @@ def update_project(project_id):
     )
     if result.matched_count == 0:
         return jsonify({"error": "Project not found"}), 404
+    invalidate("projects")
     return jsonify({"message": "Project updated"}), 200
 
 @project_bp.route('/<project_id>', methods=['DELETE'])
+@require_auth()
 def delete_project(project_id):
     from bson import ObjectId
     result = current_app.db.projects.delete_one({"_id": ObjectId(project_id)})
     if result.deleted_count == 0:
         return jsonify({"error": "Project not found"}), 404
+    current_app.data_mode.invalidate("projects")
+    invalidate("projects")
     return jsonify({"message": "Project deleted"}), 200
 
 @project_bp.route('/<project_id>/team', methods=['POST'])
+@require_auth()
 def add_team_member(project_id):
     data = request.json
     user_id = data.get("user_id")
@@ -104,9 +171,11 @@ def add_team_member(project_id):
     )
     if result.matched_count == 0:
         return jsonify({"error": "Project not found"}), 404
+    invalidate("projects")
     return jsonify({"message": "Team member added"}), 200
 
 @project_bp.route('/<project_id>/team/<user_id>', methods=['DELETE'])
+@require_auth()
 def remove_team_member(project_id, user_id):
     from bson import ObjectId
     result = current_app.db.projects.update_one(
@@ -115,4 +184,5 @@ def remove_team_member(project_id, user_id):
     )
     if result.matched_count == 0:
         return jsonify({"error": "Project not found"}), 404
+    invalidate("projects")
     return jsonify({"message": "Team member removed"}), 200
@@ -1,13 +1,19 @@
 from flask import Blueprint, current_app
 from datetime import datetime
+from utils.streaming import stream_documents, streaming_format
+from utils import report_stats
+from utils.cache import cached
 
 report_bp = Blueprint('reports', __name__)
 
+def overdue_filter(now):
+    return {"deadline": {"$lt": now}, "status": {"$ne": "Done"}}
+
 @report_bp.route('/dashboard', methods=['GET'])
+@cached("tasks", "projects", "users")
 def get_dashboard():
     # Check if we should use demo mode
-    use_demo_mode = (current_app.db is None or 
-                    current_app.db.projects.count_documents({}) == 0)
+    use_demo_mode = current_app.data_mode.is_demo("projects")
     
     if use_demo_mode:
         # Demo mode - return mock dashboard data
@@ -25,40 +31,35 @@ def get_dashboard():
             "recent_overdue_tasks": []
         }
     
-    # Database mode
-    total_projects = current_app.db.projects.count_documents({})
-    total_tasks = current_app.db.tasks.count_documents({})
-    total_users = current_app.db.users.count_documents({})
-    
+    # Database mode - users and projects only need approximate totals, which
+    # come from collection metadata; task totals come from the maintained
+    # report_stats counters and only the overdue part needs an aggregation
+    total_projects = current_app.analytics_db.projects.estimated_document_count()
+    total_users = current_app.analytics_db.users.estimated_document_count()
+
     # Tasks by status
-    tasks_by_status = {}
+    # The counters are one point read; keep them on the primary so a lagging
+    # secondary can never make load() rebuild them from stale tasks
+    counters = report_stats.load(current_app.db)
+    tasks_by_status = counters["by_status"]
+    total_tasks = counters["total"]
+
+    # Overdue tasks - the leading $match can use the (status, deadline) index
     pipeline = [
-        {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+        {"$match": overdue_filter(datetime.utcnow())},
+        {"$facet": {
+            "count": [{"$count": "count"}],
+            "recent": [{"$sort": {"deadline": 1}}, {"$limit": 5}]
+        }}
     ]
-    status_results = list(current_app.db.tasks.aggregate(pipeline))
-    for result in status_results:
-        tasks_by_status[result["_id"]] = result["count"]
-    
-    # Overdue tasks
-    from datetime import datetime
-    now = datetime.utcnow()
-    overdue_count = current_app.db.tasks.count_documents({
-        "deadline": {"$lt": now},
-        "status": {"$ne": "Done"}
-    })
-    
+    overdue = next(current_app.analytics_db.tasks.aggregate(pipeline))
+    overdue_count = overdue["count"][0]["count"] if overdue["count"] else 0
+    recent_overdue = overdue["recent"]
+
     # Completion rate
     done_tasks = tasks_by_status.get("Done", 0)
     completion_rate = (done_tasks / total_tasks * 100) if total_tasks > 0 else 0
     
-    # Recent overdue tasks
-    recent_overdue = list(current_app.db.tasks.find({
-        "deadline": {"$lt": now},
-        "status": {"$ne": "Done"}
-    }).sort("deadline", 1).limit(5))
-    for task in recent_overdue:
-        task["_id"] = str(task["_id"])
-    
     return {
         "total_projects": total_projects,
         "total_tasks": total_tasks,
@@ -70,10 +71,10 @@ def get_dashboard():
     }
 
 @report_bp.route('/tasks-by-status', methods=['GET'])
+@cached("tasks")
 def get_tasks_by_status():
     # Check if we should use demo mode
-    use_demo_mode = (current_app.db is None or 
-                    current_app.db.tasks.count_documents({}) == 0)
+    use_demo_mode = current_app.data_mode.is_demo("tasks")
     
     if use_demo_mode:
         return {
@@ -83,40 +84,31 @@ def get_tasks_by_status():
         }
     
     # Database mode
-    pipeline = [
-        {"$group": {"_id": "$status", "count": {"$sum": 1}}}
-    ]
-    results = list(current_app.db.tasks.aggregate(pipeline))
-    tasks_by_status = {}
-    for result in results:
-        tasks_by_status[result["_id"]] = result["count"]
-    return tasks_by_status
+    return report_stats.load(current_app.db)["by_status"]
 
 @report_bp.route('/overdue-tasks', methods=['GET'])
+@cached("tasks")
 def get_overdue_tasks():
     # Check if we should use demo mode
-    use_demo_mode = (current_app.db is None or 
-                    current_app.db.tasks.count_documents({}) == 0)
+    use_demo_mode = current_app.data_mode.is_demo("tasks")
     
+    fmt = streaming_format()
     if use_demo_mode:
-        return []
+        return stream_documents([], fmt) if fmt else []
     
     # Database mode
-    from datetime import datetime
-    now = datetime.utcnow()
-    overdue_tasks = list(current_app.db.tasks.find({
-        "deadline": {"$lt": now},
-        "status": {"$ne": "Done"}
-    }))
-    for task in overdue_tasks:
-        task["_id"] = str(task["_id"])
+    overdue_cursor = current_app.analytics_db.tasks.find(overdue_filter(datetime.utcnow()))
+    if fmt:
+        return stream_documents(overdue_cursor, fmt)
+
+    overdue_tasks = list(overdue_cursor)
     return overdue_tasks
 
 @report_bp.route('/user-workload', methods=['GET'])
+@cached("tasks")
 def get_user_workload():
     # Check if we should use demo mode
-    use_demo_mode = (current_app.db is None or 
-                    current_app.db.tasks.count_documents({}) == 0)
+    use_demo_mode = current_app.data_mode.is_demo("tasks")
     
     if use_demo_mode:
         return {
@@ -124,11 +116,4 @@ def get_user_workload():
         }
     
     # Database mode
-    pipeline = [
-        {"$group": {"_id": "$assigned_to", "count": {"$sum": 1}}}
-    ]
-    results = list(current_app.db.tasks.aggregate(pipeline))
-    user_workload = {}
-    for result in results:
-        user_workload[str(result["_id"])] = result["count"]
-    return user_workload
+    return report_stats.load(current_app.db)["by_assignee"]
@@ -0,0 +1,163 @@
+import threading
+from flask import Blueprint, request, jsonify, current_app
+from pymongo.errors import OperationFailure
+from utils.cache import cached
+from utils.pagination import parse_limit
+from utils.search import SEARCH_TYPES, InvertedIndex, label_of, prefix_patterns
+
+search_bp = Blueprint('search', __name__)
+
+SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_RESULTS = 100
+AUTOCOMPLETE_SIZE = 10
+MAX_QUERY_LENGTH = 200
+
+_demo_index = None
+_demo_index_lock = threading.Lock()
+
+
+def demo_index():
+    """Inverted index over the demo users, projects and tasks, built on first use."""
+    global _demo_index
+    if _demo_index is None:
+        with _demo_index_lock:
+            if _demo_index is None:
+                from routes.users import DEMO_USERS
+                from routes.project import DEMO_PROJECTS
+                from routes.task import DEMO_TASKS
+                index = InvertedIndex()
+                for search_type, docs in (("user", DEMO_USERS), ("project", DEMO_PROJECTS), ("task", DEMO_TASKS)):
+                    for doc in docs:
+                        index.add(search_type, doc)
+                _demo_index = index
+    return _demo_index
+
+
+def parse_search_args(args, default_limit, maximum):
+    query = (args.get("q") or "").strip()
+    if not query:
+        raise ValueError("q is required")
+    if len(query) > MAX_QUERY_LENGTH:
+        raise ValueError(f"q must be at most {MAX_QUERY_LENGTH} characters")
+    types = [t.strip() for t in args.get("type", ",".join(SEARCH_TYPES)).split(",") if t.strip()]
+    unknown = [t for t in types if t not in SEARCH_TYPES]
+    if unknown or not types:
+        raise ValueError(f"type must be one or more of {', '.join(SEARCH_TYPES)}")
+    return query, types, parse_limit(args, default=default_limit, maximum=maximum)
+
+
+def parse_offset(args, limit):
+    try:
+        offset = int(args.get("offset", 0))
+    except (TypeError, ValueError):
+        raise ValueError("offset must be an integer")
+    # Results are merged across types in memory, so paging stops at MAX_SEARCH_RESULTS
+    if offset < 0 or offset + limit > MAX_SEARCH_RESULTS:
+        raise ValueError(f"offset must be between 0 and {MAX_SEARCH_RESULTS - limit}")
+    return offset
+
+
+def search_result(search_type, doc, score=None):
+    fields = SEARCH_TYPES[search_type]["fields"]
+    result = {"type": search_type, "_id": doc["_id"], "label": label_of(search_type, doc)}
+    result.update({field: doc[field] for field in fields if field in doc})
+    if score is not None:
+        result["score"] = round(score, 4)
+    return result
+
+
+def normalize_scores(results):
+    """Scale scores so the best match of this type is 1.0.
+
+    MongoDB textScore and the in-process TF-IDF scores depend on the
+    collection and the scorer, so they are only comparable within a type.
+    """
+    best = max((result["score"] for result in results), default=0)
+    for result in results:
+        result["score"] = round(result["score"] / best, 4) if best > 0 else 0.0
+    return results
+
+
+def text_search(search_type, query, limit):
+    """Top ``limit`` matches from the collection's text index, best first."""
+    spec = SEARCH_TYPES[search_type]
+    projection = {field: 1 for field in spec["fields"] + spec["label"]}
+    projection["score"] = {"$meta": "textScore"}
+    cursor = current_app.analytics_db[spec["collection"]].find({"$text": {"$search": query}}, projection)
+    cursor = cursor.sort([("score", {"$meta": "textScore"})]).limit(limit)
+    return [search_result(search_type, doc, doc.pop("score")) for doc in cursor]
+
+
+def prefix_search(search_type, prefix, limit):
+    """Documents whose prefix fields start with ``prefix``, via their ascending indexes."""
+    spec = SEARCH_TYPES[search_type]
+    patterns = prefix_patterns(prefix)
+    query = {"$or": [{field: {"$in": patterns}} for field in spec["prefix_fields"]]}
+    projection = {field: 1 for field in spec["fields"] + spec["label"]}
+    return [search_result(search_type, doc)
+            for doc in current_app.analytics_db[spec["collection"]].find(query, projection).limit(limit)]
+
+
+@search_bp.route('', methods=['GET'])
+@cached("tasks", "projects", "users")
+def search():
+    """Ranked full-text search across tasks, projects and users.
+
+    ?q= is matched against the MongoDB text indexes (see utils/indexes.py),
+    or an in-process inverted index for collections in demo mode. ?type=
+    narrows the types, and ?limit= / ?offset= page through the results,
+    which are merged across types by their score relative to the best
+    match of the same type.
+    """
+    try:
+        query, types, limit = parse_search_args(request.args, SEARCH_PAGE_SIZE, MAX_SEARCH_RESULTS)
+        offset = parse_offset(request.args, limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # One extra result per type tells whether another page exists
+    wanted = offset + limit + 1
+    results = []
+    for search_type in types:
+        # Check if we should use demo mode
+        if current_app.data_mode.is_demo(SEARCH_TYPES[search_type]["collection"]):
+            hits = [search_result(hit_type, doc, score)
+                    for hit_type, doc, score in demo_index().search(query, (search_type,), wanted)]
+        else:
+            try:
+                hits = text_search(search_type, query, wanted)
+            except OperationFailure as e:
+                current_app.logger.error("Text search on %s failed: %s", search_type, e)
+                return jsonify({"error": "Search is not available; run `flask --app app ensure-indexes`"}), 503
+        results.extend(normalize_scores(hits))
+
+    results.sort(key=lambda result: -result["score"])
+    return jsonify({
+        "query": query,
+        "results": results[offset:offset + limit],
+        "offset": offset,
+        "limit": limit,
+        "has_more": len(results) > offset + limit,
+    })
+
+
+@search_bp.route('/autocomplete', methods=['GET'])
+@cached("tasks", "projects", "users")
+def autocomplete():
+    """Suggestions whose title, name or email starts with ?q=, shortest label first."""
+    try:
+        prefix, types, limit = parse_search_args(request.args, AUTOCOMPLETE_SIZE, MAX_SEARCH_RESULTS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    suggestions = []
+    for search_type in types:
+        # Check if we should use demo mode
+        if current_app.data_mode.is_demo(SEARCH_TYPES[search_type]["collection"]):
+            suggestions.extend(search_result(hit_type, doc)
+                               for hit_type, doc, _ in demo_index().complete(prefix, (search_type,), limit))
+        else:
+            suggestions.extend(prefix_search(search_type, prefix, limit))
+
+    suggestions.sort(key=lambda suggestion: (len(suggestion["label"]), suggestion["label"]))
+    return jsonify(suggestions[:limit])
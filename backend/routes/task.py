@@ -1,189 +1,469 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, g, url_for
 from bson import ObjectId
+from utils.pagination import (
+    cursor_values, decode_cursor, encode_cursor, id_filter, keyset_filter,
+    parse_datetime, parse_limit, parse_projection, sort_spec, value_filter,
+)
+from utils.streaming import stream_documents, streaming_format
+from utils.report_stats import TASK_STATS_FIELDS, apply_task_change
+from utils.cache import cached, invalidate
+from utils.jwt import require_auth
+from utils.task_store import MAX_BULK_TASKS, apply_task_operations, insert_tasks, normalize_deadline
+from utils.comments import COMMENT_PAGE_SIZE, add_comment as store_comment, delete_comments, list_comments
+from pymongo import ReturnDocument
 
 task_bp = Blueprint('tasks', __name__)
 
+# Mock tasks served while the tasks collection is empty
+DEMO_TASKS = [
+    {
+        "_id": "demo-task-1",
+        "title": "Setup project structure",
+        "description": "Initialize the project with proper folder structure and dependencies",
+        "status": "Done",
+        "priority": "High",
+        "assigned_to": "demo-developer",
+        "project_id": "demo-project-1",
+        "deadline": "2025-10-15T00:00:00Z",
+        "comments": [],
+        "created_at": "2025-09-20T00:00:00Z"
+    },
+    {
+        "_id": "demo-task-2",
+        "title": "Design user interface", 
+        "description": "Create wireframes and mockups for the main pages",
+        "status": "In Progress",
+        "priority": "Medium",
+        "assigned_to": "demo-designer",
+        "project_id": "demo-project-1",
+        "deadline": "2025-10-30T00:00:00Z",
+        "comments": [],
+        "created_at": "2025-09-20T00:00:00Z"
+    },
+    {
+        "_id": "demo-task-3",
+        "title": "Implement authentication",
+        "description": "Add user login, signup and JWT-based authentication",
+        "status": "To Do",
+        "priority": "High",
+        "assigned_to": "demo-developer", 
+        "project_id": "demo-project-1",
+        "deadline": "2025-11-05T00:00:00Z",
+        "comments": [],
+        "created_at": "2025-09-20T00:00:00Z"
+    },
+    {
+        "_id": "demo-task-4",
+        "title": "Setup mobile app framework",
+        "description": "Initialize React Native project with navigation and basic screens",
+        "status": "Done",
+        "priority": "High",
+        "assigned_to": "demo-developer",
+        "project_id": "demo-project-2",
+        "deadline": "2025-09-25T00:00:00Z",
+        "comments": [],
+        "created_at": "2025-09-20T00:00:00Z"
+    },
+    {
+        "_id": "demo-task-5",
+        "title": "Design app UI components",
+        "description": "Create reusable UI components for the mobile app",
+        "status": "In Progress",
+        "priority": "Medium",
+        "assigned_to": "demo-designer",
+        "project_id": "demo-project-2",
+        "deadline": "2025-10-10T00:00:00Z",
+        "comments": [],
+        "created_at": "2025-09-21T00:00:00Z"
+    },
+    {
+        "_id": "demo-task-6",
+        "title": "Implement data visualization",
+        "description": "Build charts and graphs for the analytics dashboard",
+        "status": "To Do",
+        "priority": "High",
+        "assigned_to": "demo-developer",
+        "project_id": "demo-project-3",
+        "deadline": "2025-12-15T00:00:00Z",
+        "comments": [],
+        "created_at": "2025-09-21T00:00:00Z"
+    },
+    {
+        "_id": "demo-task-7",
+        "title": "Integrate AI chatbot API",
+        "description": "Connect to AI service and implement chat functionality",
+        "status": "Planning",
+        "priority": "Medium",
+        "assigned_to": "demo-developer",
+        "project_id": "demo-project-4",
+        "deadline": "2025-10-20T00:00:00Z",
+        "comments": [],
+        "created_at": "2025-09-21T00:00:00Z"
+    },
+    {
+        "_id": "demo-task-8",
+        "title": "Write unit tests",
+        "description": "Create comprehensive unit tests for all components",
+        "status": "To Do",
+        "priority": "Low",
+        "assigned_to": "demo-tester",
+        "project_id": "demo-project-1",
+        "deadline": "2025-11-20T00:00:00Z",
+        "comments": [],
+        "created_at": "2025-09-22T00:00:00Z"
+    }
+]
+
+TASK_FILTER_FIELDS = ("status", "priority")
+TASK_REFERENCE_FIELDS = ("project_id", "assigned_to")
+TASK_SORT_FIELDS = ("_id", "deadline")
+TASK_FEED_PAGE_SIZE = 50
+
+def build_task_query(args):
+    """Translate GET /api/tasks query args into a Mongo filter."""
+    query = {}
+    for field in TASK_FILTER_FIELDS:
+        if args.get(field):
+            query[field] = value_filter(args[field])
+    for field in TASK_REFERENCE_FIELDS:
+        if args.get(field):
+            query[field] = id_filter(args[field])
+    deadline = {}
+    if args.get("deadline_from"):
+        deadline["$gte"] = parse_datetime(args["deadline_from"])
+    if args.get("deadline_to"):
+        deadline["$lt"] = parse_datetime(args["deadline_to"])
+    if deadline:
+        query["deadline"] = deadline
+    return query
+
+def filter_demo_tasks(args, tasks=DEMO_TASKS):
+    for field in TASK_FILTER_FIELDS + TASK_REFERENCE_FIELDS:
+        if args.get(field):
+            wanted = {v.strip() for v in args[field].split(",")}
+            tasks = [task for task in tasks if task.get(field) in wanted]
+    projection = parse_projection(args.get("fields"), required=("_id",))
+    if projection:
+        tasks = [{k: v for k, v in task.items() if k in projection} for task in tasks]
+    return tasks
+
 @task_bp.route('/', methods=['GET'])
+@cached("tasks")
 def get_tasks():
-    # Check if we should use demo mode
-    use_demo_mode = (current_app.db is None or 
-                    current_app.db.tasks.count_documents({}) == 0)
-    
-    if use_demo_mode:
-        # Demo mode - return mock tasks
-        return jsonify([
-            {
-                "_id": "demo-task-1",
-                "title": "Setup project structure",
-                "description": "Initialize the project with proper folder structure and dependencies",
-                "status": "Done",
-                "priority": "High",
-                "assigned_to": "demo-developer",
-                "project_id": "demo-project-1",
-                "deadline": "2025-10-15T00:00:00Z",
-                "comments": [],
-                "created_at": "2025-09-20T00:00:00Z"
-            },
-            {
-                "_id": "demo-task-2",
-                "title": "Design user interface", 
-                "description": "Create wireframes and mockups for the main pages",
-                "status": "In Progress",
-                "priority": "Medium",
-                "assigned_to": "demo-designer",
-                "project_id": "demo-project-1",
-                "deadline": "2025-10-30T00:00:00Z",
-                "comments": [],
-                "created_at": "2025-09-20T00:00:00Z"
-            },
-            {
-                "_id": "demo-task-3",
-                "title": "Implement authentication",
-                "description": "Add user login, signup and JWT-based authentication",
-                "status": "To Do",
-                "priority": "High",
-                "assigned_to": "demo-developer", 
-                "project_id": "demo-project-1",
-                "deadline": "2025-11-05T00:00:00Z",
-                "comments": [],
-                "created_at": "2025-09-20T00:00:00Z"
-            },
-            {
-                "_id": "demo-task-4",
-                "title": "Setup mobile app framework",
-                "description": "Initialize React Native project with navigation and basic screens",
-                "status": "Done",
-                "priority": "High",
-                "assigned_to": "demo-developer",
-                "project_id": "demo-project-2",
-                "deadline": "2025-09-25T00:00:00Z",
-                "comments": [],
-                "created_at": "2025-09-20T00:00:00Z"
-            },
-            {
-                "_id": "demo-task-5",
-                "title": "Design app UI components",
-                "description": "Create reusable UI components for the mobile app",
-                "status": "In Progress",
-                "priority": "Medium",
-                "assigned_to": "demo-designer",
-                "project_id": "demo-project-2",
-                "deadline": "2025-10-10T00:00:00Z",
-                "comments": [],
-                "created_at": "2025-09-21T00:00:00Z"
-            },
-            {
-                "_id": "demo-task-6",
-                "title": "Implement data visualization",
-                "description": "Build charts and graphs for the analytics dashboard",
-                "status": "To Do",
-                "priority": "High",
-                "assigned_to": "demo-developer",
-                "project_id": "demo-project-3",
-                "deadline": "2025-12-15T00:00:00Z",
-                "comments": [],
-                "created_at": "2025-09-21T00:00:00Z"
-            },
-            {
-                "_id": "demo-task-7",
-                "title": "Integrate AI chatbot API",
-                "description": "Connect to AI service and implement chat functionality",
-                "status": "Planning",
-                "priority": "Medium",
-                "assigned_to": "demo-developer",
-                "project_id": "demo-project-4",
-                "deadline": "2025-10-20T00:00:00Z",
-                "comments": [],
-                "created_at": "2025-09-21T00:00:00Z"
-            },
-            {
-                "_id": "demo-task-8",
-                "title": "Write unit tests",
-                "description": "Create comprehensive unit tests for all components",
-                "status": "To Do",
-                "priority": "Low",
-                "assigned_to": "demo-tester",
-                "project_id": "demo-project-1",
-                "deadline": "2025-11-20T00:00:00Z",
-                "comments": [],
-                "created_at": "2025-09-22T00:00:00Z"
-            }
-        ])
-    
-    tasks = list(current_app.db.tasks.find())
-    for task in tasks:
-        task["_id"] = str(task["_id"])
-        if "project_id" in task:
-            task["project_id"] = str(task["project_id"])
-        if "assigned_to" in task:
-            task["assigned_to"] = str(task["assigned_to"])
-    return jsonify(tasks)
+    """List tasks one page at a time.
+
+    Supports filters (status, priority, project_id, assigned_to,
+    deadline_from, deadline_to), ?fields= projection and keyset pagination
+    via ?sort=_id|deadline, ?limit= and the opaque ?cursor= returned in the
+    X-Next-Cursor header. Streaming clients (see utils.streaming) get the
+    full result unless they pass ?limit= themselves.
+    """
+    fmt = streaming_format()
+    try:
+        # Check if we should use demo mode
+        use_demo_mode = current_app.data_mode.is_demo("tasks")
+
+        if use_demo_mode:
+            # Demo mode - return mock tasks
+            tasks = filter_demo_tasks(request.args)
+            return stream_documents(tasks, fmt) if fmt else jsonify(tasks)
+
+        sort_field = request.args.get("sort", "_id")
+        if sort_field not in TASK_SORT_FIELDS:
+            return jsonify({"error": f"sort must be one of {', '.join(TASK_SORT_FIELDS)}"}), 400
+        limit = parse_limit(request.args)
+        query = build_task_query(request.args)
+        if request.args.get("cursor"):
+            after = keyset_filter(sort_field, decode_cursor(request.args["cursor"], sort_field))
+            query = {"$and": [query, after]} if query else after
+        projection = parse_projection(request.args.get("fields"), required=("_id", sort_field))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    tasks_cursor = current_app.analytics_db.tasks.find(query, projection).sort(sort_spec(sort_field))
+    if fmt:
+        if "limit" in request.args:
+            tasks_cursor = tasks_cursor.limit(limit)
+        return stream_documents(tasks_cursor, fmt)
+
+    tasks = list(tasks_cursor.limit(limit + 1))
+    next_cursor = None
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        next_cursor = encode_cursor(sort_field, cursor_values(tasks[-1], sort_field))
+
+    response = jsonify(tasks)
+    if next_cursor:
+        add_next_page_headers(response, next_cursor, "tasks.get_tasks")
+    return response
+
+def demo_task_feed(owner_field, owner_id, args):
+    """task_feed() over DEMO_TASKS; returns (tasks, counts)."""
+    owned = [task for task in DEMO_TASKS if task.get(owner_field) == owner_id]
+    owned = sorted(filter_demo_tasks(args, owned), key=lambda task: task.get("deadline") or "")
+    counts = {}
+    for task in owned:
+        counts[task.get("status")] = counts.get(task.get("status"), 0) + 1
+    projection = parse_projection(args.get("fields"), required=("_id",))
+    if projection:
+        owned = [{k: v for k, v in task.items() if k in projection} for task in owned]
+    return owned, counts
+
+def task_feed_pipeline(owner_field, owner_id, args):
+    """Aggregation stages of a task feed and its page size.
+
+    $match on the (owner_field, status, deadline) index, a deadline sort and
+    a $facet with "tasks" (one keyset page) and "counts" (per status, over
+    everything matched). Raises ValueError for bad filters, limit or cursor.
+    """
+    limit = parse_limit(args, default=TASK_FEED_PAGE_SIZE)
+    query = build_task_query(args)
+    query[owner_field] = id_filter(owner_id)
+    page = []
+    if args.get("cursor"):
+        page.append({"$match": keyset_filter("deadline", decode_cursor(args["cursor"], "deadline"))})
+    page.append({"$limit": limit + 1})
+    projection = parse_projection(args.get("fields"), required=("_id", "deadline"))
+    if projection:
+        page.append({"$project": projection})
+    pipeline = [
+        {"$match": query},
+        {"$sort": {"deadline": 1, "_id": 1}},
+        {"$facet": {
+            "tasks": page,
+            "counts": [{"$group": {"_id": "$status", "count": {"$sum": 1}}}],
+        }},
+    ]
+    return pipeline, limit
+
+def task_feed_page(result, limit):
+    """Split the $facet output of task_feed_pipeline() into (tasks, counts, next_cursor)."""
+    tasks = result["tasks"]
+    counts = {row["_id"]: row["count"] for row in result["counts"]}
+    next_cursor = None
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        next_cursor = encode_cursor("deadline", cursor_values(tasks[-1], "deadline"))
+    return tasks, counts, next_cursor
+
+def add_next_page_headers(response, next_cursor, endpoint, **values):
+    """Point X-Next-Cursor and Link: rel="next" at the following page."""
+    args = request.args.to_dict()
+    args["cursor"] = next_cursor
+    response.headers["X-Next-Cursor"] = next_cursor
+    response.headers["Link"] = f'<{url_for(endpoint, **values, **args)}>; rel="next"'
+    return response
+
+def task_feed(owner_field, owner_id):
+    """Tasks of one user or project, soonest deadline first, with status counts.
+
+    Serves GET /api/users/<id>/tasks and /api/projects/<id>/tasks with a
+    single aggregation (see task_feed_pipeline). Accepts the GET /api/tasks
+    filters, ?fields=, ?limit= and the ?cursor= from X-Next-Cursor.
+    """
+    try:
+        # Check if we should use demo mode
+        use_demo_mode = current_app.data_mode.is_demo("tasks")
+
+        if use_demo_mode:
+            tasks, counts = demo_task_feed(owner_field, owner_id, request.args)
+            return jsonify({"tasks": tasks, "counts": counts, "total": len(tasks)})
+
+        pipeline, limit = task_feed_pipeline(owner_field, owner_id, request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    result = next(current_app.analytics_db.tasks.aggregate(pipeline), {"tasks": [], "counts": []})
+    tasks, counts, next_cursor = task_feed_page(result, limit)
+    response = jsonify({"tasks": tasks, "counts": counts, "total": sum(counts.values())})
+    if next_cursor:
+        add_next_page_headers(response, next_cursor, request.endpoint, **request.view_args)
+    return response
 
 @task_bp.route('/', methods=['POST'])
+@require_auth()
 def create_task():
     data = request.json
+    error = normalize_deadline(data)
+    if error:
+        return jsonify({"error": error}), 400
+    data.setdefault("comments", [])
+    data.setdefault("comment_count", len(data["comments"]))
     current_app.db.tasks.insert_one(data)
+    current_app.data_mode.mark_populated("tasks")
+    apply_task_change(current_app.db, after=data)
+    invalidate("tasks")
     return jsonify({"message": "Task created"}), 201
 
+def create_tasks(tasks, ordered=True):
+    """Insert a batch of tasks and refresh demo-mode and cache state."""
+    results = insert_tasks(current_app.db, tasks, ordered=ordered)
+    if any(result["status"] == "created" for result in results):
+        current_app.data_mode.mark_populated("tasks")
+        invalidate("tasks")
+    return results
+
+@task_bp.route('/bulk', methods=['POST'])
+@require_auth()
+def create_tasks_bulk():
+    """Create many tasks with one insert_many.
+
+    Body: {"tasks": [...], "ordered": true}. Answers 201 when every task was
+    created and 207 with per-item results otherwise.
+    """
+    if current_app.db is None:
+        return jsonify({"error": "Database not available"}), 503
+    data = request.json
+    tasks = data.get("tasks") if isinstance(data, dict) else data
+    if not isinstance(tasks, list) or not tasks:
+        return jsonify({"error": "tasks must be a non-empty list"}), 400
+    if len(tasks) > MAX_BULK_TASKS:
+        return jsonify({"error": f"At most {MAX_BULK_TASKS} tasks per request"}), 400
+    ordered = data.get("ordered", True) if isinstance(data, dict) else True
+
+    results = create_tasks(tasks, ordered=bool(ordered))
+    created = sum(1 for result in results if result["status"] == "created")
+    status_code = 201 if created == len(results) else 207
+    return jsonify({"created": created, "failed": len(results) - created, "results": results}), status_code
+
+@task_bp.route('/batch', methods=['POST'])
+@require_auth()
+def batch_update_tasks():
+    """Apply many task changes with one bulk_write.
+
+    Body: {"operations": [...], "ordered": true} where each operation is one of
+    {"op": "status", "id", "status"}, {"op": "assign", "id", "assigned_to"},
+    {"op": "update", "id", "fields": {...}} or {"op": "delete", "id"}.
+    """
+    if current_app.db is None:
+        return jsonify({"error": "Database not available"}), 503
+    data = request.json
+    operations = data.get("operations") if isinstance(data, dict) else data
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"error": "operations must be a non-empty list"}), 400
+    if len(operations) > MAX_BULK_TASKS:
+        return jsonify({"error": f"At most {MAX_BULK_TASKS} operations per request"}), 400
+    ordered = data.get("ordered", True) if isinstance(data, dict) else True
+
+    results = apply_task_operations(current_app.db, operations, ordered=bool(ordered))
+    succeeded = sum(1 for result in results if result["status"] == "ok")
+    if succeeded:
+        if any(result.get("op") == "delete" and result["status"] == "ok" for result in results):
+            current_app.data_mode.invalidate("tasks")
+        invalidate("tasks")
+    status_code = 200 if succeeded == len(results) else 207
+    return jsonify({"succeeded": succeeded, "failed": len(results) - succeeded, "results": results}), status_code
+
 @task_bp.route('/<task_id>', methods=['GET'])
 def get_task(task_id):
     from bson import ObjectId
     task = current_app.db.tasks.find_one({"_id": ObjectId(task_id)})
     if not task:
         return jsonify({"error": "Task not found"}), 404
-    task["_id"] = str(task["_id"])
-    if "project_id" in task:
-        task["project_id"] = str(task["project_id"])
-    if "assigned_to" in task:
-        task["assigned_to"] = str(task["assigned_to"])
     return jsonify(task)
 
 @task_bp.route('/<task_id>', methods=['PUT'])
+@require_auth()
 def update_task(task_id):
     data = request.json
+    error = normalize_deadline(data)
+    if error:
+        return jsonify({"error": error}), 400
     from bson import ObjectId
-    result = current_app.db.tasks.update_one(
+    before = current_app.db.tasks.find_one_and_update(
         {"_id": ObjectId(task_id)},
-        {"$set": data}
+        {"$set": data},
+        projection=TASK_STATS_FIELDS,
+        return_document=ReturnDocument.BEFORE
     )
-    if result.matched_count == 0:
+    if before is None:
         return jsonify({"error": "Task not found"}), 404
+    apply_task_change(current_app.db, before, {**before, **data})
+    invalidate("tasks")
     return jsonify({"message": "Task updated"}), 200
 
 @task_bp.route('/<task_id>', methods=['DELETE'])
+@require_auth()
 def delete_task(task_id):
     from bson import ObjectId
-    result = current_app.db.tasks.delete_one({"_id": ObjectId(task_id)})
-    if result.deleted_count == 0:
+    before = current_app.db.tasks.find_one_and_delete(
+        {"_id": ObjectId(task_id)},
+        projection=TASK_STATS_FIELDS
+    )
+    if before is None:
         return jsonify({"error": "Task not found"}), 404
+    current_app.data_mode.invalidate("tasks")
+    apply_task_change(current_app.db, before=before)
+    delete_comments(current_app.db, [before["_id"]])
+    invalidate("tasks")
     return jsonify({"message": "Task deleted"}), 200
 
 @task_bp.route('/<task_id>/status', methods=['PATCH'])
+@require_auth()
 def update_task_status(task_id):
     data = request.json
     status = data.get("status")
     if not status:
         return jsonify({"error": "Status required"}), 400
     from bson import ObjectId
-    result = current_app.db.tasks.update_one(
+    before = current_app.db.tasks.find_one_and_update(
         {"_id": ObjectId(task_id)},
-        {"$set": {"status": status}}
+        {"$set": {"status": status}},
+        projection=TASK_STATS_FIELDS,
+        return_document=ReturnDocument.BEFORE
     )
-    if result.matched_count == 0:
+    if before is None:
         return jsonify({"error": "Task not found"}), 404
+    apply_task_change(current_app.db, before, {**before, "status": status})
+    invalidate("tasks")
     return jsonify({"message": "Task status updated"}), 200
 
+@task_bp.route('/<task_id>/comments', methods=['GET'])
+def get_comments(task_id):
+    """Comments of a task, newest first.
+
+    Pages through the task_comments collection with ?limit= and the opaque
+    ?cursor= returned in the X-Next-Cursor header; the task document itself
+    only embeds the latest few.
+    """
+    # Check if we should use demo mode
+    use_demo_mode = current_app.data_mode.is_demo("tasks")
+
+    if use_demo_mode:
+        task = next((task for task in DEMO_TASKS if task["_id"] == task_id), None)
+        if task is None:
+            return jsonify({"error": "Task not found"}), 404
+        return jsonify(list(reversed(task["comments"])))
+
+    if not ObjectId.is_valid(task_id):
+        return jsonify({"error": "Task not found"}), 404
+    try:
+        limit = parse_limit(request.args, default=COMMENT_PAGE_SIZE)
+        comments, next_cursor = list_comments(current_app.db, ObjectId(task_id),
+                                              cursor=request.args.get("cursor"), limit=limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not comments and not request.args.get("cursor") and \
+            current_app.db.tasks.count_documents({"_id": ObjectId(task_id)}, limit=1) == 0:
+        return jsonify({"error": "Task not found"}), 404
+
+    response = jsonify(comments)
+    if next_cursor:
+        add_next_page_headers(response, next_cursor, "tasks.get_comments", task_id=task_id)
+    return response
+
 @task_bp.route('/<task_id>/comments', methods=['POST'])
+@require_auth()
 def add_comment(task_id):
     data = request.json
     comment = data.get("comment")
     if not comment:
         return jsonify({"error": "Comment required"}), 400
     from bson import ObjectId
-    result = current_app.db.tasks.update_one(
-        {"_id": ObjectId(task_id)},
-        {"$push": {"comments": comment}}
-    )
-    if result.matched_count == 0:
+    stored = store_comment(current_app.db, ObjectId(task_id), comment,
+                           author=data.get("author") or g.claims.get("email"))
+    if stored is None:
         return jsonify({"error": "Task not found"}), 404
-    return jsonify({"message": "Comment added"}), 200
+    invalidate("tasks")
+    stored.pop("task_id")
+    return jsonify({"message": "Comment added", "comment": stored}), 200
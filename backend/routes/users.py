@@ -1,65 +1,79 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, g
 from bson import ObjectId
+from utils.streaming import stream_documents, streaming_format
+from utils.cache import cached, invalidate
+from utils.passwords import hash_password
+from utils.jwt import require_auth
+from routes.task import task_feed
 
 user_bp = Blueprint('users', __name__)
 
+# Mock users served while the users collection is empty
+DEMO_USERS = [
+    {
+        "_id": "demo-admin",
+        "username": "Admin User",
+        "email": "admin@example.com",
+        "role": "Admin",
+        "created_at": "2025-09-20T00:00:00Z"
+    },
+    {
+        "_id": "demo-manager", 
+        "username": "Manager User",
+        "email": "manager@example.com",
+        "role": "Manager",
+        "created_at": "2025-09-20T00:00:00Z"
+    },
+    {
+        "_id": "demo-developer",
+        "username": "Developer User", 
+        "email": "dev@example.com",
+        "role": "Developer",
+        "created_at": "2025-09-20T00:00:00Z"
+    },
+    {
+        "_id": "demo-designer",
+        "username": "Designer User",
+        "email": "designer@example.com",
+        "role": "Designer",
+        "created_at": "2025-09-21T00:00:00Z"
+    },
+    {
+        "_id": "demo-tester",
+        "username": "Tester User",
+        "email": "tester@example.com",
+        "role": "Tester",
+        "created_at": "2025-09-21T00:00:00Z"
+    }
+]
+
 @user_bp.route('/', methods=['GET'])
+@cached("users")
 def get_users():
+    fmt = streaming_format()
     # Check if we should use demo mode
-    use_demo_mode = (current_app.db is None or 
-                    current_app.db.users.count_documents({}) == 0)
+    use_demo_mode = current_app.data_mode.is_demo("users")
     
     if use_demo_mode:
         # Demo mode - return mock users
-        return jsonify([
-            {
-                "_id": "demo-admin",
-                "username": "Admin User",
-                "email": "admin@example.com",
-                "role": "Admin",
-                "created_at": "2025-09-20T00:00:00Z"
-            },
-            {
-                "_id": "demo-manager", 
-                "username": "Manager User",
-                "email": "manager@example.com",
-                "role": "Manager",
-                "created_at": "2025-09-20T00:00:00Z"
-            },
-            {
-                "_id": "demo-developer",
-                "username": "Developer User", 
-                "email": "dev@example.com",
-                "role": "Developer",
-                "created_at": "2025-09-20T00:00:00Z"
-            },
-            {
-                "_id": "demo-designer",
-                "username": "Designer User",
-                "email": "designer@example.com",
-                "role": "Designer",
-                "created_at": "2025-09-21T00:00:00Z"
-            },
-            {
-                "_id": "demo-tester",
-                "username": "Tester User",
-                "email": "tester@example.com",
-                "role": "Tester",
-                "created_at": "2025-09-21T00:00:00Z"
-            }
-        ])
+        return stream_documents(DEMO_USERS, fmt) if fmt else jsonify(DEMO_USERS)
     
-    users = list(current_app.db.users.find({}, {"password_hash": 0}))
-    for user in users:
-        user["_id"] = str(user["_id"])
+    if fmt:
+        return stream_documents(current_app.analytics_db.users.find({}, {"password_hash": 0}), fmt)
+
+    users = list(current_app.analytics_db.users.find({}, {"password_hash": 0}))
     return jsonify(users)
 
 @user_bp.route('/', methods=['POST'])
+@require_auth("Admin")
 def create_user():
     data = request.json
     if not data.get("username") or not data.get("email") or not data.get("password"):
         return jsonify({"error": "Missing required fields"}), 400
+    data["password_hash"] = hash_password(data.pop("password"))
     current_app.db.users.insert_one(data)
+    current_app.data_mode.mark_populated("users")
+    invalidate("users")
     return jsonify({"message": "User created"}), 201
 
 @user_bp.route('/<user_id>', methods=['GET'])
@@ -68,46 +82,67 @@ def get_user(user_id):
     user = current_app.db.users.find_one({"_id": ObjectId(user_id)}, {"password_hash": 0})
     if not user:
         return jsonify({"error": "User not found"}), 404
-    user["_id"] = str(user["_id"])
     return jsonify(user)
 
+@user_bp.route('/<user_id>/tasks', methods=['GET'])
+@cached("tasks")
+def get_user_tasks(user_id):
+    """Tasks assigned to a user with per-status counts; see task_feed()."""
+    return task_feed("assigned_to", user_id)
+
+def forget_login(*emails):
+    """Drop cached login lookups; with CACHE_REDIS_URL this reaches every worker."""
+    for email in emails:
+        if email:
+            current_app.login_cache.delete(email)
+
 @user_bp.route('/<user_id>', methods=['PUT'])
+@require_auth("Admin")
 def update_user(user_id):
     # Check if demo mode
-    use_demo_mode = (current_app.db is None or 
-                    current_app.db.users.count_documents({}) == 0)
+    use_demo_mode = current_app.data_mode.is_demo("users")
     
     if use_demo_mode:
         # Demo mode - just return success
         return jsonify({"message": "User updated (demo mode)"}), 200
     
     data = request.json
+    if data.get("password"):
+        data["password_hash"] = hash_password(data.pop("password"))
     from bson import ObjectId
-    result = current_app.db.users.update_one(
+    user = current_app.db.users.find_one({"_id": ObjectId(user_id)}, {"email": 1})
+    if user is None:
+        return jsonify({"error": "User not found"}), 404
+    current_app.db.users.update_one(
         {"_id": ObjectId(user_id)},
         {"$set": data}
     )
-    if result.matched_count == 0:
-        return jsonify({"error": "User not found"}), 404
+    # Cached logins may hold the old email, role or password hash
+    forget_login(user.get("email"), data.get("email"))
+    invalidate("users")
     return jsonify({"message": "User updated"}), 200
 
 @user_bp.route('/<user_id>', methods=['DELETE'])
+@require_auth("Admin")
 def delete_user(user_id):
     # Check if demo mode
-    use_demo_mode = (current_app.db is None or 
-                    current_app.db.users.count_documents({}) == 0)
+    use_demo_mode = current_app.data_mode.is_demo("users")
     
     if use_demo_mode:
         # Demo mode - just return success
         return jsonify({"message": "User deleted (demo mode)"}), 200
     
     from bson import ObjectId
-    result = current_app.db.users.delete_one({"_id": ObjectId(user_id)})
-    if result.deleted_count == 0:
+    user = current_app.db.users.find_one_and_delete({"_id": ObjectId(user_id)}, projection={"email": 1})
+    if user is None:
         return jsonify({"error": "User not found"}), 404
+    forget_login(user.get("email"))
+    current_app.data_mode.invalidate("users")
+    invalidate("users")
     return jsonify({"message": "User deleted"}), 200
 
 @user_bp.route('/profile', methods=['GET'])
+@require_auth()
 def get_profile():
-    # This would require JWT, but for now return current user
-    return jsonify({"message": "Profile endpoint"}), 200
+    # Straight from the verified token, no users lookup
+    return jsonify({"_id": g.claims["sub"], "email": g.claims.get("email"), "role": g.claims.get("role")}), 200
@@ -0,0 +1,24 @@
+import os
+
+# Run the suite against demo data unless MONGODB_URI is set in the environment;
+# otherwise the first request waits for a MongoDB connection attempt to time out
+os.environ.setdefault("MONGODB_URI", "")
+
+
+def auth_headers(client, email="admin@example.com", password="admin123"):
+    """Log in (demo credentials by default) and return the Authorization header."""
+    response = client.post('/api/auth/login', json={"email": email, "password": password})
+    return {"Authorization": f"Bearer {response.json['access_token']}"}
+
+
+class FakeDb(dict):
+    """Stand-in for ``app.db``: collections by key or attribute, ``with_options`` is a no-op."""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def with_options(self, **kwargs):
+        return self
@@ -0,0 +1,184 @@
+import time
+import unittest
+from types import SimpleNamespace
+from flask import Flask
+from backend.app import app
+from backend.routes.ai import AI_TEMPERATURE, StoryStreamParser, request_user_stories
+from backend.tests import auth_headers
+from backend.utils.jobs import JobQueue, QueueFull
+from backend.utils.llm import ChatClientProvider, LLMRouter
+
+
+class FakeCompletions:
+    def __init__(self, content):
+        self.content = content
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if kwargs.get("stream"):
+            # Deliberately split stories across chunks
+            return [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=self.content[i:i + 7]))])
+                    for i in range(0, len(self.content), 7)]
+        message = SimpleNamespace(content=self.content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class FakeLLMClient:
+    def __init__(self, content):
+        self.chat = SimpleNamespace(completions=FakeCompletions(content))
+
+
+class FailingCompletions:
+    def create(self, **kwargs):
+        raise RuntimeError("primary unavailable")
+
+
+def wait_for(queue, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+class JobQueueTestCase(unittest.TestCase):
+    def setUp(self):
+        self.queue = JobQueue(Flask(__name__), max_workers=1, max_pending=2, timeout=5, backoff=0)
+
+    def tearDown(self):
+        self.queue.shutdown()
+
+    def test_retries_until_success(self):
+        calls = []
+
+        def flaky(payload, timeout):
+            calls.append(timeout)
+            if len(calls) < 3:
+                raise RuntimeError("upstream error")
+            return payload * 2
+
+        job = wait_for(self.queue, self.queue.submit("test", 21, flaky)["_id"])
+        self.assertEqual(job["status"], "succeeded")
+        self.assertEqual(job["result"], 42)
+        self.assertEqual(job["attempts"], 3)
+        self.assertEqual(calls, [5, 5, 5])
+
+    def test_fails_after_max_attempts(self):
+        def broken(payload, timeout):
+            raise RuntimeError("model unavailable")
+
+        job = wait_for(self.queue, self.queue.submit("test", None, broken)["_id"])
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(job["error"], "model unavailable")
+
+    def test_rejects_jobs_beyond_max_pending(self):
+        def slow(payload, timeout):
+            time.sleep(0.2)
+
+        self.queue.submit("test", None, slow)
+        self.queue.submit("test", None, slow)
+        with self.assertRaises(QueueFull):
+            self.queue.submit("test", None, slow)
+
+
+class GenerateUserStoriesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+        self.headers = auth_headers(self.client)
+        self.llm = FakeLLMClient('["As a user, I want to log in, so that I can see my tasks."]')
+        self.original_llm = app.llm
+        app.llm = LLMRouter([ChatClientProvider("fake", self.llm, "fake-model")])
+
+    def tearDown(self):
+        app.llm = self.original_llm
+
+    def test_generation_runs_as_a_job(self):
+        response = self.client.post('/api/ai/generate-user-stories', headers=self.headers,
+                                    json={"projectDescription": "A task tracker"})
+        self.assertEqual(response.status_code, 202)
+        job_id = response.get_json()["job_id"]
+        self.assertEqual(response.headers["Location"], f"/api/ai/jobs/{job_id}")
+
+        wait_for(app.job_queue, job_id)
+        job = self.client.get(f'/api/ai/jobs/{job_id}').get_json()
+        self.assertEqual(job["status"], "succeeded")
+        self.assertEqual(job["result"]["count"], 1)
+        self.assertEqual(self.llm.chat.completions.calls[0]["timeout"], app.job_queue.timeout)
+
+    def test_missing_description(self):
+        response = self.client.post('/api/ai/generate-user-stories', headers=self.headers, json={})
+        self.assertEqual(response.status_code, 400)
+
+    def test_streamed_stories_arrive_as_events(self):
+        self.llm.chat.completions.content = '["As a user, I want to \\"star\\" tasks, so that I find them.", "As an admin, I want to see reports, so that I can plan."]'
+        response = self.client.post('/api/ai/generate-user-stories/stream', headers=self.headers,
+                                    json={"projectDescription": "A task tracker with stars"})
+        self.assertEqual(response.mimetype, "text/event-stream")
+        body = response.get_data(as_text=True)
+        events = [message.split("\n")[0] for message in body.strip().split("\n\n")]
+        self.assertEqual(events, ["event: story", "event: story", "event: done"])
+        self.assertIn('"story":"As a user, I want to \\"star\\" tasks, so that I find them."', body.replace(": ", ":"))
+        self.assertIn('"count":2', body.replace(": ", ":"))
+
+    def test_batch_reports_results_per_project(self):
+        response = self.client.post('/api/ai/generate-user-stories/batch', headers=self.headers, json={"projects": [
+            {"projectDescription": "A batch project"},
+            {"projectDescription": "Another batch project", "projectId": "demo-project-1"},
+        ]})
+        self.assertEqual(response.status_code, 202)
+        job = wait_for(app.job_queue, response.get_json()["job_id"])
+        self.assertEqual(job["status"], "succeeded")
+        self.assertEqual(job["result"]["succeeded"], 2)
+        self.assertEqual([result["project_id"] for result in job["result"]["results"]], ["", "demo-project-1"])
+
+    def test_batch_requires_descriptions(self):
+        response = self.client.post('/api/ai/generate-user-stories/batch', headers=self.headers,
+                                    json={"projects": [{"projectId": "p1"}]})
+        self.assertEqual(response.status_code, 400)
+
+    def test_generation_requires_a_token(self):
+        for path in ('', '/batch', '/stream'):
+            response = self.client.post(f'/api/ai/generate-user-stories{path}',
+                                        json={"projectDescription": "A task tracker", "createTasks": True})
+            self.assertEqual(response.status_code, 401)
+
+    def test_fallback_answers_are_not_cached(self):
+        fallback = ChatClientProvider("fallback", self.llm, "fallback-model")
+        primary = ChatClientProvider("primary", SimpleNamespace(chat=SimpleNamespace(completions=FailingCompletions())),
+                                     "primary-model")
+        app.llm = LLMRouter([primary, fallback])
+        description = "A task tracker served by the fallback"
+        with app.app_context():
+            self.assertEqual(len(request_user_stories(description)), 1)
+        key = app.prompt_cache.key(description, "primary-model", AI_TEMPERATURE)
+        self.assertIsNone(app.prompt_cache.get(key))
+
+        response = self.client.post('/api/ai/generate-user-stories/stream', headers=self.headers,
+                                    json={"projectDescription": description})
+        self.assertIn('"count":1', response.get_data(as_text=True).replace(": ", ":"))
+        self.assertIsNone(app.prompt_cache.get(key))
+
+    def test_primary_answers_are_cached(self):
+        description = "A task tracker served by the primary"
+        with app.app_context():
+            request_user_stories(description)
+        key = app.prompt_cache.key(description, "fake-model", AI_TEMPERATURE)
+        self.assertEqual(len(app.prompt_cache.get(key)), 1)
+
+    def test_unknown_job(self):
+        self.assertEqual(self.client.get('/api/ai/jobs/missing').status_code, 404)
+
+
+class StoryStreamParserTestCase(unittest.TestCase):
+    def test_stories_split_across_chunks(self):
+        parser = StoryStreamParser()
+        self.assertEqual(parser.feed('["As a us'), [])
+        self.assertEqual(parser.feed('er, I want \\"x\\"", "As an'), ['As a user, I want "x"'])
+        self.assertEqual(parser.feed(' admin"]'), ["As an admin"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
 from backend.app import app
+from backend.tests import auth_headers
 
 class BasicApiTestCase(unittest.TestCase):
     def setUp(self):
@@ -27,7 +28,7 @@ class BasicApiTestCase(unittest.TestCase):
             self.assertIn('error', response.get_data(as_text=True))
 
         def test_generate_user_stories_missing_description(self):
-            response = self.app.post('/api/ai/generate-user-stories', json={})
+            response = self.app.post('/api/ai/generate-user-stories', json={}, headers=auth_headers(self.app))
             self.assertEqual(response.status_code, 400)
             self.assertIn('error', response.get_data(as_text=True))
 
@@ -0,0 +1,44 @@
+import time
+import unittest
+from unittest import mock
+from backend.app import create_app
+
+
+class AppFactoryTestCase(unittest.TestCase):
+    def test_create_app_does_not_connect(self):
+        with mock.patch("backend.app.connect_db") as connect:
+            app = create_app({"MONGODB_URI": "mongodb://unreachable:1"})
+            connect.assert_not_called()
+            connect.return_value = None
+            self.assertIsNone(app.db)
+            self.assertIsNone(app.db)
+            connect.assert_called_once()
+
+    def test_unreachable_database_falls_back_to_demo_mode(self):
+        app = create_app({"MONGODB_URI": "mongodb://127.0.0.1:1", "MONGODB_TIMEOUT_MS": 50})
+        started = time.monotonic()
+        self.assertTrue(app.data_mode.is_demo("tasks"))
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(app.test_client().get('/api/tasks/').status_code, 200)
+
+    def test_indexes_are_not_built_on_first_use_by_default(self):
+        app = create_app({"MONGODB_URI": "mongodb://unreachable:1"})
+        with mock.patch("backend.app.connect_db", return_value=mock.MagicMock()), \
+                mock.patch("backend.utils.indexes.ensure_indexes") as ensure, \
+                mock.patch("utils.indexes.ensure_indexes") as ensure_alias:
+            app.db
+        ensure.assert_not_called()
+        ensure_alias.assert_not_called()
+        self.assertFalse(app.config['AUTO_CREATE_INDEXES'])
+
+    def test_reset_db_reconnects_on_next_use(self):
+        app = create_app({"MONGODB_URI": None})
+        self.assertIsNone(app.db)
+        with mock.patch("backend.app.connect_db", return_value=None) as connect:
+            app.reset_db()
+            app.db
+            connect.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
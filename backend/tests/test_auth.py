@@ -0,0 +1,61 @@
+import unittest
+from datetime import timedelta
+from unittest import mock
+import jwt
+from backend.app import create_app
+from backend.tests import FakeDb, auth_headers
+
+
+class EmptyCollection:
+    def find_one(self, query, projection=None):
+        return None
+
+
+class RequireAuthTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({"MONGODB_URI": None})
+        self.client = self.app.test_client()
+
+    def test_login_token_carries_user_id_role_and_email(self):
+        response = self.client.get('/api/users/profile', headers=auth_headers(self.client))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, {"_id": "demo-admin", "email": "admin@example.com", "role": "Admin"})
+
+    def test_missing_and_invalid_tokens_are_rejected(self):
+        self.assertEqual(self.client.post('/api/projects/', json={}).status_code, 401)
+        response = self.client.post('/api/projects/', json={}, headers={"Authorization": "Bearer not-a-jwt"})
+        self.assertEqual(response.status_code, 401)
+        self.assertIn("Invalid token", response.json["error"])
+
+    def test_role_is_checked_from_claims(self):
+        headers = auth_headers(self.client, "dev@example.com", "dev123")
+        self.assertEqual(self.client.delete('/api/users/demo-tester', headers=headers).status_code, 403)
+        headers = auth_headers(self.client)
+        self.assertEqual(self.client.delete('/api/users/demo-tester', headers=headers).status_code, 200)
+
+    def test_demo_token_cannot_write_to_a_connected_database(self):
+        # An empty users collection keeps demo login on, even with a database
+        self.app.db = FakeDb(users=EmptyCollection(), projects=EmptyCollection())
+        headers = auth_headers(self.client)
+        self.assertEqual(self.client.get('/api/users/profile', headers=headers).status_code, 200)
+        response = self.client.post('/api/projects/', json={"name": "x", "description": "y"}, headers=headers)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.client.delete('/api/users/demo-tester', headers=headers).status_code, 403)
+
+    def test_verified_claims_are_cached_until_expiry(self):
+        headers = auth_headers(self.client)
+        with mock.patch.object(jwt, "decode", wraps=jwt.decode) as decode:
+            self.client.get('/api/users/profile', headers=headers)
+            self.client.get('/api/users/profile', headers=headers)
+        self.assertEqual(decode.call_count, 1)
+
+    def test_expired_token_is_rejected(self):
+        self.app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(seconds=-1)
+        headers = auth_headers(self.client)
+        response = self.client.get('/api/users/profile', headers=headers)
+        self.assertEqual(response.status_code, 401)
+        self.assertIn("expired", response.json["error"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import threading
+import time
+import unittest
+from backend.app import app
+from backend.utils.cache import LRUCache, PromptCache, RedisCache
+
+
+class FakeRedis:
+    """Local stand-in for a redis client."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+        return int(self.data[key])
+
+
+class CacheBackendTestCase(unittest.TestCase):
+    def test_lru_eviction_and_ttl(self):
+        cache = LRUCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+
+        cache.set("short", "x", ttl=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("short"))
+
+    def test_counters_survive_eviction(self):
+        cache = LRUCache(max_entries=1)
+        cache.incr("gen:tasks")
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.counter("gen:tasks"), 1)
+
+    def test_redis_backend_with_stand_in(self):
+        cache = RedisCache(FakeRedis())
+        cache.set("k", {"body": b"[]"}, ttl=5)
+        self.assertEqual(cache.get("k"), {"body": b"[]"})
+        self.assertEqual(cache.counter("gen:tasks"), 0)
+        cache.incr("gen:tasks")
+        self.assertEqual(cache.counter("gen:tasks"), 1)
+
+
+class PromptCacheTestCase(unittest.TestCase):
+    def test_key_ignores_case_and_whitespace(self):
+        key = PromptCache.key("A  task\ntracker", "model", 0.7)
+        self.assertEqual(key, PromptCache.key("a task tracker ", "model", 0.7))
+        self.assertNotEqual(key, PromptCache.key("a task tracker", "model", 0.2))
+
+    def test_concurrent_calls_share_one_computation(self):
+        cache = PromptCache(ttl=60)
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return ["story"]
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+                   for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(hit for _, hit in results), [False, True, True])
+        self.assertEqual(cache.get_or_compute("k", compute), (["story"], True))
+        self.assertEqual(len(calls), 1)
+
+
+class ResponseCacheApiTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+
+    def test_etag_and_not_modified(self):
+        first = self.app.get('/api/reports/tasks-by-status')
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers.get('ETag')
+        self.assertTrue(etag)
+
+        second = self.app.get('/api/reports/tasks-by-status', headers={"If-None-Match": etag})
+        self.assertEqual(second.status_code, 304)
+
+    def test_invalidate_changes_key(self):
+        with app.test_request_context('/api/reports/dashboard'):
+            before = app.response_cache.key(("tasks",))
+            app.response_cache.invalidate("tasks")
+            self.assertNotEqual(app.response_cache.key(("tasks",)), before)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+from types import SimpleNamespace
+from bson import ObjectId
+from backend.app import app
+from backend.utils.comments import COMMENT_PREVIEW_SIZE, add_comment
+
+
+class RecordingCollection:
+    def __init__(self, matched=1):
+        self.matched = matched
+        self.calls = []
+
+    def update_one(self, query, update):
+        self.calls.append((query, update))
+        return SimpleNamespace(matched_count=self.matched)
+
+    def find_one(self, query, projection=None):
+        return None
+
+    def insert_one(self, doc):
+        self.calls.append(doc)
+
+    def insert_many(self, docs):
+        self.calls.extend(docs)
+
+
+class LegacyTask:
+    """A single task document; comment_count decides which queries match it."""
+
+    def __init__(self, doc):
+        self.doc = doc
+
+    def _matches(self, query):
+        return query["_id"] == self.doc["_id"] and query["comment_count"]["$exists"] == ("comment_count" in self.doc)
+
+    def update_one(self, query, update):
+        matched = self._matches(query)
+        if matched:
+            self.doc.update(update.get("$set", {}))
+            if "$inc" in update:
+                self.doc["comment_count"] += 1
+                pushed = update["$push"]["comments"]
+                self.doc["comments"] = (self.doc["comments"] + pushed["$each"])[pushed["$slice"]:]
+        return SimpleNamespace(matched_count=int(matched), modified_count=int(matched))
+
+    def find_one(self, query, projection=None):
+        return dict(self.doc) if self._matches(query) else None
+
+
+class CommentStoreTestCase(unittest.TestCase):
+    def test_comment_is_stored_separately_with_capped_preview(self):
+        db = SimpleNamespace(tasks=RecordingCollection(), task_comments=RecordingCollection())
+        task_id = ObjectId()
+        comment = add_comment(db, task_id, "Looks good", author="alice")
+
+        (query, update), = db.tasks.calls
+        self.assertEqual(query, {"_id": task_id, "comment_count": {"$exists": True}})
+        self.assertEqual(update["$push"]["comments"]["$slice"], -COMMENT_PREVIEW_SIZE)
+        self.assertNotIn("task_id", update["$push"]["comments"]["$each"][0])
+        self.assertEqual(update["$inc"], {"comment_count": 1})
+        self.assertEqual(db.task_comments.calls, [comment])
+        self.assertEqual(comment["task_id"], task_id)
+
+    def test_missing_task_stores_nothing(self):
+        db = SimpleNamespace(tasks=RecordingCollection(matched=0), task_comments=RecordingCollection())
+        self.assertIsNone(add_comment(db, ObjectId(), "Hello"))
+        self.assertEqual(db.task_comments.calls, [])
+
+    def test_legacy_task_is_migrated_before_its_first_new_comment(self):
+        task_id = ObjectId()
+        tasks = LegacyTask({"_id": task_id, "comments": [f"old {i}" for i in range(COMMENT_PREVIEW_SIZE)]})
+        db = SimpleNamespace(tasks=tasks, task_comments=RecordingCollection())
+        add_comment(db, task_id, "new")
+
+        texts = [comment["text"] for comment in db.task_comments.calls]
+        self.assertEqual(texts, [f"old {i}" for i in range(COMMENT_PREVIEW_SIZE)] + ["new"])
+        self.assertEqual(tasks.doc["comment_count"], COMMENT_PREVIEW_SIZE + 1)
+        self.assertEqual(len(tasks.doc["comments"]), COMMENT_PREVIEW_SIZE)
+
+
+class CommentApiTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_demo_comments(self):
+        response = self.client.get('/api/tasks/demo-task-1/comments')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), [])
+        self.assertEqual(self.client.get('/api/tasks/missing/comments').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+from backend.utils.data_mode import DataSourceMode
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.probes = 0
+
+    def find_one(self, query, projection=None):
+        self.probes += 1
+        return self.docs[0] if self.docs else None
+
+
+class DataSourceModeTestCase(unittest.TestCase):
+    def test_no_database_is_demo(self):
+        mode = DataSourceMode(None)
+        self.assertTrue(mode.is_demo("tasks"))
+
+    def test_probe_is_cached_until_invalidated(self):
+        tasks = FakeCollection([])
+        mode = DataSourceMode({"tasks": tasks}, ttl=None)
+        self.assertTrue(mode.is_demo("tasks"))
+        self.assertTrue(mode.is_demo("tasks"))
+        self.assertEqual(tasks.probes, 1)
+
+        mode.mark_populated("tasks")
+        self.assertFalse(mode.is_demo("tasks"))
+        self.assertEqual(tasks.probes, 1)
+
+        mode.invalidate("tasks")
+        self.assertTrue(mode.is_demo("tasks"))
+        self.assertEqual(tasks.probes, 2)
+
+if __name__ == '__main__':
+    unittest.main()
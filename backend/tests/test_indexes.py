@@ -0,0 +1,86 @@
+import unittest
+from pymongo.errors import OperationFailure
+from backend.utils.indexes import INDEXES, check_query_shapes, ensure_indexes
+
+
+class FakeCursor:
+    def __init__(self, plan):
+        self.plan = plan
+
+    def sort(self, spec):
+        return self
+
+    def explain(self):
+        return {"queryPlanner": {"winningPlan": self.plan}}
+
+
+class FakeCollection:
+    def __init__(self, plan):
+        self.plan = plan
+
+    def find(self, query):
+        return FakeCursor(self.plan)
+
+
+class FakeIndexedCollection:
+    def __init__(self, existing=None, failing=()):
+        self.indexes = {"_id_": {"key": [("_id", 1)]}, **(existing or {})}
+        self.failing = failing
+
+    def index_information(self):
+        return self.indexes
+
+    def create_indexes(self, models):
+        for model in models:
+            name = model.document["name"]
+            if name in self.failing:
+                raise OperationFailure("cannot build", details={"errmsg": "E11000 duplicate key"})
+            self.indexes[name] = {"key": list(model.document["key"].items())}
+        return [model.document["name"] for model in models]
+
+
+class EnsureIndexesTestCase(unittest.TestCase):
+    def test_existing_key_patterns_are_kept_and_failures_isolated(self):
+        db = {collection: FakeIndexedCollection() for collection in INDEXES}
+        db["users"] = FakeIndexedCollection({"email_1": {"key": [("email", 1)], "unique": True},
+                                             "search_text": {"key": [("_fts", "text"), ("_ftsx", 1)],
+                                                             "weights": {"name": 5, "username": 5, "email": 3}}})
+        db["tasks"] = FakeIndexedCollection(failing=("deadline_id",))
+
+        report = ensure_indexes(db)
+        self.assertEqual(report["users"], ["email_1", "role", "name", "username", "search_text"])
+        self.assertNotIn("email_unique", db["users"].indexes)
+        self.assertIn("deadline_id: E11000", report["tasks"])
+        self.assertIn("search_text", db["tasks"].indexes)
+        # A second run finds everything in place
+        self.assertEqual(ensure_indexes(db)["projects"], [m.document["name"] for m in INDEXES["projects"]])
+
+
+class IndexCheckTestCase(unittest.TestCase):
+    def test_reports_collection_scans(self):
+        ixscan = {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "status_deadline"}}
+        db = {
+            "users": FakeCollection({"stage": "COLLSCAN"}),
+            "projects": FakeCollection(ixscan),
+            "tasks": FakeCollection(ixscan),
+            "task_comments": FakeCollection(ixscan),
+            "user_stories": FakeCollection(ixscan),
+        }
+        results = {r["name"]: r for r in check_query_shapes(db)}
+        self.assertTrue(results["login by email"]["collection_scan"])
+        self.assertFalse(results["overdue tasks"]["collection_scan"])
+        self.assertEqual(results["overdue tasks"]["indexes"], ["status_deadline"])
+
+    def test_search_text_indexes_cover_searched_fields(self):
+        for collection, fields in (("tasks", ["title", "description"]), ("projects", ["name", "description"]),
+                                   ("users", ["name", "username", "email"])):
+            text = [m.document for m in INDEXES[collection] if m.document["name"] == "search_text"][0]
+            self.assertEqual(list(text["key"]), fields)
+            self.assertTrue(all(kind == "text" for kind in text["key"].values()))
+
+    def test_email_index_is_unique(self):
+        email = [m.document for m in INDEXES["users"] if m.document["name"] == "email_unique"][0]
+        self.assertTrue(email["unique"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import json
+import unittest
+from datetime import datetime
+from unittest import mock
+from bson import Decimal128, ObjectId
+from backend.app import app
+from backend.utils import json_provider
+
+
+class JsonProviderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.oid = ObjectId()
+        self.doc = {
+            "_id": self.oid,
+            "team": [self.oid],
+            "deadline": datetime(2025, 10, 15, 9, 30),
+            "budget": Decimal128("1250.50"),
+        }
+        self.expected = {
+            "_id": str(self.oid),
+            "team": [str(self.oid)],
+            "deadline": "2025-10-15T09:30:00Z",
+            "budget": "1250.50",
+        }
+
+    def test_bson_types_are_serialized(self):
+        self.assertEqual(json.loads(app.json.dumps(self.doc)), self.expected)
+
+    def test_stdlib_fallback_matches(self):
+        with mock.patch.object(json_provider, "orjson", None):
+            provider = json_provider.MongoJSONProvider(app)
+            self.assertEqual(json.loads(provider.dumps(self.doc)), self.expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import time
+import unittest
+from backend.utils.llm import (CircuitBreaker, LLMProvider, LLMRouter, LLMUnavailable,
+                               RateLimiter, StubProvider)
+from backend.utils.metrics import LatencyHistogram
+
+MESSAGES = [{"role": "user", "content": "A task tracker"}]
+
+
+class FailingProvider(LLMProvider):
+    def complete(self, messages, temperature, max_tokens, timeout=None):
+        raise ConnectionError("connection refused")
+
+
+class LLMProviderTestCase(unittest.TestCase):
+    def test_stub_is_deterministic(self):
+        stub = StubProvider()
+        text = stub.complete(MESSAGES, 0.7, 100)
+        self.assertEqual(text, StubProvider().complete(MESSAGES, 0.7, 100))
+        self.assertEqual("".join(stub.stream(MESSAGES, 0.7, 100)), text)
+
+    def test_router_fails_over_and_opens_circuit(self):
+        broken = FailingProvider("broken", "m", failure_threshold=2, reset_timeout=60)
+        router = LLMRouter([broken, StubProvider()])
+        for _ in range(3):
+            router.complete(MESSAGES, 0.7, 100)
+        self.assertEqual(broken.calls, 2)
+        self.assertEqual(broken.breaker.state, "open")
+        self.assertEqual(router.stats()[1]["latency_seconds"]["count"], 3)
+
+    def test_router_raises_when_nothing_works(self):
+        with self.assertRaises(LLMUnavailable):
+            LLMRouter([FailingProvider("broken", "m")]).complete(MESSAGES, 0.7, 100)
+
+    def test_abandoned_trial_stream_releases_the_circuit(self):
+        stub = StubProvider(failure_threshold=1, reset_timeout=0.01)
+        stub.breaker.record_failure()
+        time.sleep(0.02)
+        stream = LLMRouter([stub]).stream(MESSAGES, 0.7, 100)
+        next(stream)
+        # The client disconnects halfway through the half-open trial
+        stream.close()
+        self.assertEqual(stub.breaker.state, "half-open")
+        self.assertTrue(stub.breaker.allow())
+
+    def test_rate_limited_provider_is_skipped(self):
+        limited = StubProvider(rate=0.001, burst=1)
+        limited.name = "limited"
+        fallback = StubProvider()
+        router = LLMRouter([limited, fallback])
+        router.complete(MESSAGES, 0.7, 100)
+        router.complete(MESSAGES, 0.7, 100)
+        self.assertEqual((limited.calls, fallback.calls), (1, 1))
+
+
+class GuardTestCase(unittest.TestCase):
+    def test_circuit_half_open_after_timeout(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        time.sleep(0.02)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+
+    def test_rate_limiter_waits_for_token(self):
+        limiter = RateLimiter(rate=100, burst=1)
+        self.assertTrue(limiter.acquire())
+        self.assertFalse(limiter.acquire())
+        self.assertTrue(limiter.acquire(wait=0.1))
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = LatencyHistogram(buckets=(0.1, 1))
+        for seconds in (0.05, 0.5, 5):
+            histogram.observe(seconds)
+        self.assertEqual(histogram.snapshot()["buckets"], {"0.1": 1, "1": 2, "+Inf": 3})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
 from backend.app import app
+from backend.tests import auth_headers
 
 class UserApiTestCase(unittest.TestCase):
     def setUp(self):
@@ -11,7 +12,7 @@ class UserApiTestCase(unittest.TestCase):
         self.assertIsInstance(response.json, list)
 
     def test_create_user_missing_fields(self):
-        response = self.app.post('/api/users/', json={"name": "Test"})
+        response = self.app.post('/api/users/', json={"name": "Test"}, headers=auth_headers(self.app))
         self.assertEqual(response.status_code, 400)
         self.assertIn('error', response.get_data(as_text=True))
 
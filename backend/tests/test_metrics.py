@@ -0,0 +1,59 @@
+import unittest
+from types import SimpleNamespace
+from backend.app import create_app
+
+
+def command_event(name, request_id, micros=2000):
+    return SimpleNamespace(command_name=name, command={name: "tasks"}, request_id=request_id,
+                           duration_micros=micros)
+
+
+class RequestMetricsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({"MONGODB_URI": None, "SLOW_REQUEST_MS": 0})
+        commands = self.app.command_metrics
+
+        # Stands in for a route that queries MongoDB twice
+        def two_queries():
+            for request_id in (1, 2):
+                commands.started(command_event("find", request_id))
+                commands.succeeded(command_event("find", request_id))
+            return {"ok": True}
+
+        self.app.add_url_rule('/two-queries', view_func=two_queries)
+        self.client = self.app.test_client()
+
+    def test_counts_requests_and_db_commands_per_endpoint(self):
+        self.client.get('/two-queries')
+        self.client.get('/two-queries')
+        metrics = self.app.request_metrics
+        self.assertEqual(metrics.statuses[("/two-queries", "GET", "200")], 2)
+        self.assertEqual(metrics.in_flight, 0)
+        db_commands = dict(metrics.db_commands.items())[("/two-queries", "GET")].snapshot()
+        self.assertEqual(db_commands["sum"], 4)
+        self.assertEqual(self.app.command_metrics.totals["find"], 4)
+
+    def test_slow_request_log_lists_commands(self):
+        with self.assertLogs(self.app.logger, level="WARNING") as logs:
+            self.client.get('/two-queries')
+        self.assertIn("2 MongoDB commands", logs.output[0])
+        self.assertIn("find.tasks", logs.output[0])
+
+    def test_prometheus_endpoint(self):
+        self.client.get('/two-queries')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith("text/plain"))
+        body = response.get_data(as_text=True)
+        self.assertIn('http_requests_total{endpoint="/two-queries",method="GET",status="200"} 1', body)
+        self.assertIn('http_request_duration_seconds_bucket{endpoint="/two-queries",method="GET",le="+Inf"} 1', body)
+        self.assertIn('mongodb_commands_total{command="find"} 2', body)
+        self.assertIn("http_requests_in_flight 1", body)
+
+    def test_unmatched_paths_share_one_label(self):
+        self.client.post('/no/such/path')
+        self.assertEqual(self.app.request_metrics.statuses[("<unmatched>", "POST", "405")], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
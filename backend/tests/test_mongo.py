@@ -0,0 +1,48 @@
+import os
+import unittest
+from unittest import mock
+from backend.utils.mongo import PoolMetrics, client_options, mongo_config, read_preference
+
+
+class MongoConfigTestCase(unittest.TestCase):
+    def test_client_options_from_config(self):
+        config = {**mongo_config(), "MONGODB_MAX_POOL_SIZE": 20, "MONGODB_WAIT_QUEUE_TIMEOUT_MS": 500,
+                  "MONGODB_COMPRESSORS": "zlib"}
+        options = client_options(config)
+        self.assertEqual(options["maxPoolSize"], 20)
+        self.assertEqual(options["waitQueueTimeoutMS"], 500)
+        self.assertEqual(options["compressors"], "zlib")
+        self.assertEqual(options["read_preference"].mongos_mode, "primary")
+
+    def test_reads_go_to_the_primary_by_default(self):
+        with mock.patch.dict(os.environ):
+            os.environ.pop("MONGODB_READ_PREFERENCE", None)
+            os.environ.pop("MONGODB_ANALYTICS_READ_PREFERENCE", None)
+            config = mongo_config()
+        self.assertEqual(config["MONGODB_READ_PREFERENCE"], "primary")
+        self.assertEqual(config["MONGODB_ANALYTICS_READ_PREFERENCE"], "primary")
+
+    def test_read_preference_with_staleness(self):
+        preference = read_preference("secondaryPreferred", 120)
+        self.assertEqual(preference.mongos_mode, "secondaryPreferred")
+        self.assertEqual(preference.max_staleness, 120)
+        with self.assertRaises(ValueError):
+            read_preference("secondaryOnly")
+
+
+class PoolMetricsTestCase(unittest.TestCase):
+    def test_counts_checkouts_and_open_connections(self):
+        metrics = PoolMetrics()
+        metrics.connection_created(None)
+        metrics.connection_check_out_started(None)
+        metrics.connection_checked_out(None)
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot["connections_open"], 1)
+        self.assertEqual(snapshot["connections_in_use"], 1)
+        self.assertEqual(snapshot["checkout_wait_seconds"]["count"], 1)
+        metrics.connection_checked_in(None)
+        self.assertEqual(metrics.snapshot()["connections_in_use"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
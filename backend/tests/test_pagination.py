@@ -0,0 +1,48 @@
+import unittest
+from datetime import datetime
+from bson import ObjectId
+from backend.utils.pagination import (
+    decode_cursor, encode_cursor, id_filter, keyset_filter, parse_limit, parse_projection,
+)
+
+
+class PaginationTestCase(unittest.TestCase):
+    def test_cursor_round_trip(self):
+        oid = ObjectId()
+        deadline = datetime(2025, 10, 15)
+        token = encode_cursor("deadline", [deadline, oid])
+        self.assertEqual(decode_cursor(token, "deadline"), [deadline, oid])
+
+    def test_cursor_rejects_other_sort(self):
+        token = encode_cursor("_id", [ObjectId()])
+        with self.assertRaises(ValueError):
+            decode_cursor(token, "deadline")
+        with self.assertRaises(ValueError):
+            decode_cursor("not-a-cursor", "_id")
+
+    def test_cursor_rejects_wrong_number_of_values(self):
+        for sort_field, values in (("_id", []), ("deadline", [None]), ("deadline", []),
+                                   ("_id", [ObjectId(), ObjectId()])):
+            with self.assertRaises(ValueError):
+                decode_cursor(encode_cursor(sort_field, values), sort_field)
+
+    def test_keyset_filter_on_null_deadline_continues_into_dated_tasks(self):
+        oid = ObjectId()
+        clauses = keyset_filter("deadline", [None, oid])["$or"]
+        self.assertIn({"deadline": None, "_id": {"$gt": oid}}, clauses)
+        self.assertIn({"deadline": {"$type": "string"}}, clauses)
+        self.assertIn({"deadline": {"$type": "date"}}, clauses)
+
+    def test_parse_limit_is_capped(self):
+        self.assertEqual(parse_limit({"limit": "10000"}), 500)
+        with self.assertRaises(ValueError):
+            parse_limit({"limit": "0"})
+
+    def test_projection_and_id_filter(self):
+        self.assertEqual(parse_projection("title, status", required=("_id",)), {"title": 1, "status": 1, "_id": 1})
+        oid = ObjectId()
+        self.assertEqual(id_filter(str(oid)), {"$in": [oid, str(oid)]})
+        self.assertEqual(id_filter("demo-developer"), "demo-developer")
+
+if __name__ == '__main__':
+    unittest.main()
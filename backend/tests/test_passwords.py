@@ -0,0 +1,170 @@
+import threading
+import unittest
+from types import SimpleNamespace
+from bson import ObjectId
+from backend.app import create_app
+from backend.tests import FakeDb, auth_headers
+from backend.tests.test_cache import FakeRedis
+from backend.utils.cache import RedisCache
+from backend.utils.passwords import HasherBusy, PasswordHasher, hash_password, needs_rehash
+
+FAST = "pbkdf2:sha256:2000"
+
+
+class FakeUsers:
+    def __init__(self, *users):
+        self.users = list(users)
+        self.queries = []
+        self.updates = []
+
+    def find_one(self, query, projection=None):
+        self.queries.append((query, projection))
+        return next((dict(user) for user in self.users
+                     if all(user.get(key) == value for key, value in query.items())), None)
+
+    def insert_one(self, document):
+        document.setdefault("_id", ObjectId())
+        self.users.append(document)
+        return SimpleNamespace(inserted_id=document["_id"])
+
+    def update_one(self, query, update):
+        self.updates.append((query, update))
+        for user in self.users:
+            if all(user.get(key) == value for key, value in query.items()):
+                user.update(update["$set"])
+        return SimpleNamespace(matched_count=1)
+
+    def find_one_and_delete(self, query, projection=None):
+        user = self.find_one(query, projection)
+        self.users = [other for other in self.users if other["_id"] != (user or {}).get("_id")]
+        return user
+
+
+class PasswordHasherTestCase(unittest.TestCase):
+    def test_verify_and_rehash_check(self):
+        hasher = PasswordHasher(method=FAST)
+        stored = hash_password("secret", method="pbkdf2:sha256:1000")
+        self.assertTrue(hasher.verify(stored, "secret"))
+        self.assertFalse(hasher.verify(stored, "wrong"))
+        self.assertFalse(hasher.verify(None, "secret"))
+        self.assertTrue(hasher.needs_rehash(stored))
+        self.assertFalse(needs_rehash(hasher.hash("secret"), FAST))
+
+    def test_rejects_when_too_many_pending(self):
+        hasher = PasswordHasher(max_pending=0, method=FAST)
+        with self.assertRaises(HasherBusy):
+            hasher.verify(hash_password("secret", method=FAST), "secret")
+
+    def test_timeout_is_reported_as_busy(self):
+        hasher = PasswordHasher(max_workers=1, timeout=0.05, method=FAST)
+        release = threading.Event()
+        hasher._executor.submit(release.wait)
+        try:
+            with self.assertRaises(HasherBusy):
+                hasher.verify(hash_password("secret", method=FAST), "secret")
+        finally:
+            release.set()
+            hasher.shutdown()
+
+
+class LoginTestCase(unittest.TestCase):
+    def setUp(self):
+        self.user = {"_id": ObjectId(), "name": "Admin User", "email": "admin@example.com", "role": "Admin",
+                     "password_hash": hash_password("admin123", method="pbkdf2:sha256:1000")}
+        self.users = FakeUsers(self.user)
+        self.app = create_app({"MONGODB_URI": None, "LOGIN_CACHE_TTL": 60})
+        self.app.db = FakeDb(users=self.users)
+        self.app.password_hasher.method = FAST
+        self.client = self.app.test_client()
+
+    def login(self, password="admin123", email="admin@example.com"):
+        return self.client.post('/api/auth/login', json={"email": email, "password": password})
+
+    def test_login_uses_projected_lookup_and_rehashes(self):
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["user"]["email"], "admin@example.com")
+        query, projection = self.users.queries[-1]
+        self.assertEqual(query, {"email": "admin@example.com"})
+        self.assertEqual(projection["password_hash"], 1)
+        self.assertTrue(self.user["password_hash"].startswith(FAST + "$"))
+        # The upgraded hash still verifies and is not rewritten again
+        self.assertEqual(self.login().status_code, 200)
+        self.assertEqual(len(self.users.updates), 1)
+
+    def test_cached_lookup_and_wrong_password(self):
+        self.login()
+        lookups = len(self.users.queries)
+        self.assertEqual(self.login(password="nope").status_code, 401)
+        self.assertEqual(len(self.users.queries), lookups)
+
+    def test_user_without_password_hash_is_rejected(self):
+        del self.user["password_hash"]
+        self.assertEqual(self.login().status_code, 401)
+        self.assertEqual(self.login(email="").status_code, 401)
+
+    def test_busy_hasher_returns_503(self):
+        self.app.password_hasher.max_pending = 0
+        self.assertEqual(self.login().status_code, 503)
+
+    def test_hasher_timeout_returns_503(self):
+        hasher = self.app.password_hasher
+        hasher.timeout = 0.05
+        release = threading.Event()
+        for _ in range(hasher._executor._max_workers):
+            hasher._executor.submit(release.wait)
+        try:
+            self.assertEqual(self.login().status_code, 503)
+        finally:
+            release.set()
+
+    def share_login_cache(self):
+        """A second app (another worker) sharing this one's database and login cache."""
+        self.app.login_cache = RedisCache(FakeRedis(), prefix="pm:login:")
+        other = create_app({"MONGODB_URI": None, "LOGIN_CACHE_TTL": 60})
+        other.db = self.app.db
+        other.login_cache = self.app.login_cache
+        return other.test_client()
+
+    def test_password_change_reaches_other_workers(self):
+        other = self.share_login_cache()
+        self.assertEqual(self.login().status_code, 200)
+        response = other.put(f'/api/users/{self.user["_id"]}', headers=auth_headers(other),
+                             json={"password": "changed123"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.login().status_code, 401)
+        self.assertEqual(self.login(password="changed123").status_code, 200)
+
+    def test_deleted_user_cannot_log_in_on_other_workers(self):
+        other = self.share_login_cache()
+        self.assertEqual(self.login().status_code, 200)
+        response = other.delete(f'/api/users/{self.user["_id"]}', headers=auth_headers(other))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.login().status_code, 401)
+
+    def test_first_admin_is_created_from_the_cli(self):
+        self.users.users.clear()
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=["create-admin", "--email", "owner@example.com", "--password", "s3cret!"])
+        self.assertIn("Created Admin", result.output)
+        self.assertIn("already exists", runner.invoke(
+            args=["create-admin", "--email", "owner@example.com", "--password", "x"]).output)
+
+        headers = auth_headers(self.client, "owner@example.com", "s3cret!")
+        response = self.client.post('/api/users/', headers=headers,
+                                    json={"username": "dev", "email": "dev@example.com", "password": "pw12345"})
+        self.assertEqual(response.status_code, 201)
+
+    def test_user_created_through_api_can_log_in(self):
+        response = self.client.post('/api/users/', headers=auth_headers(self.client),
+                                    json={"username": "newdev", "email": "new@example.com", "password": "pw12345"})
+        self.assertEqual(response.status_code, 201)
+
+        response = self.login(email="new@example.com", password="pw12345")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["user"]["username"], "newdev")
+        self.assertEqual(response.json["user"]["role"], "Developer")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+from bson import ObjectId
+from backend.app import create_app
+from backend.tests import FakeDb
+
+
+class FakeProjects:
+    def __init__(self, result):
+        self.result = result
+        self.pipelines = []
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return iter([self.result] if self.result else [])
+
+
+class ProjectDetailTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({"MONGODB_URI": None})
+        self.client = self.app.test_client()
+
+    def use_db(self, result):
+        projects = FakeProjects(result)
+        self.app.db = FakeDb(projects=projects)
+        self.app.data_mode.mark_populated("projects")
+        return projects
+
+    def test_demo_project_resolves_team_and_tasks(self):
+        response = self.client.get('/api/projects/demo-project-1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([member["_id"] for member in response.json["members"]],
+                         ["demo-manager", "demo-developer", "demo-designer"])
+        self.assertEqual(sum(response.json["task_counts"].values()), response.json["task_total"])
+        self.assertEqual(self.client.get('/api/projects/demo-project-9').status_code, 404)
+
+    def test_one_aggregation_joins_members_and_task_feed(self):
+        project_id = ObjectId()
+        tasks = [{"_id": ObjectId(), "title": f"Task {i}", "deadline": None} for i in range(3)]
+        projects = self.use_db({
+            "_id": project_id, "name": "Website", "members": [{"_id": ObjectId(), "name": "Dev"}],
+            "task_feed": [{"tasks": tasks, "counts": [{"_id": "To Do", "count": 3}]}],
+        })
+
+        response = self.client.get(f'/api/projects/{project_id}?limit=2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["name"], "Website")
+        self.assertEqual(len(response.json["tasks"]), 2)
+        self.assertEqual(response.json["task_counts"], {"To Do": 3})
+        self.assertNotIn("task_feed", response.json)
+        self.assertIn(f"/api/projects/{project_id}/tasks?", response.headers["Link"])
+
+        (pipeline,) = projects.pipelines
+        self.assertEqual(pipeline[0], {"$match": {"_id": project_id}})
+        self.assertEqual(pipeline[1]["$lookup"]["localField"], "team")
+        self.assertEqual(pipeline[2]["$project"]["members.password_hash"], 0)
+        feed = pipeline[3]["$lookup"]["pipeline"]
+        self.assertEqual(feed[0]["$match"]["project_id"], {"$in": [project_id, str(project_id)]})
+        self.assertIn("$facet", feed[-1])
+
+    def test_missing_project_is_404(self):
+        self.use_db(None)
+        self.assertEqual(self.client.get(f'/api/projects/{ObjectId()}').status_code, 404)
+        self.assertEqual(self.client.get('/api/projects/not-an-id').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from datetime import datetime
+from backend.app import create_app
+from backend.tests import FakeDb
+from backend.utils.report_stats import task_delta
+
+
+class CountedCollection:
+    def __init__(self, count=0, stats=None, aggregate_result=None):
+        self.count = count
+        self.stats = stats
+        self.aggregate_result = aggregate_result
+        self.pipelines = []
+
+    def estimated_document_count(self):
+        return self.count
+
+    def find_one(self, query, projection=None):
+        return self.stats
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return iter([self.aggregate_result])
+
+
+class ReportStatsTestCase(unittest.TestCase):
+    def test_insert_and_delete(self):
+        task = {"status": "To Do", "assigned_to": "u1", "project_id": "p1"}
+        self.assertEqual(task_delta(after=task), {
+            "total": 1, "by_status.To Do": 1, "by_assignee.u1": 1, "by_project.p1": 1,
+        })
+        self.assertEqual(task_delta(before=task)["total"], -1)
+
+    def test_status_move_only_touches_status(self):
+        before = {"status": "To Do", "assigned_to": "u1", "project_id": "p1"}
+        after = {**before, "status": "Done"}
+        self.assertEqual(task_delta(before, after), {"by_status.To Do": -1, "by_status.Done": 1})
+
+    def test_keys_are_valid_field_names(self):
+        delta = task_delta(after={"status": "v1.2", "assigned_to": None, "project_id": "$p"})
+        self.assertIn("by_status.v1．2", delta)
+        self.assertIn("by_assignee.None", delta)
+        self.assertIn("by_project.＄p", delta)
+
+
+class DashboardTestCase(unittest.TestCase):
+    def test_dashboard_reads_counters_and_runs_one_aggregation(self):
+        overdue = {"_id": "t1", "title": "Late", "status": "To Do", "deadline": datetime(2024, 1, 1)}
+        tasks = CountedCollection(aggregate_result={"count": [{"count": 1}], "recent": [overdue]})
+        app = create_app({"MONGODB_URI": None})
+        app.db = FakeDb(
+            projects=CountedCollection(count=4),
+            users=CountedCollection(count=7),
+            tasks=tasks,
+            report_stats=CountedCollection(stats={"_id": "tasks", "total": 8,
+                                                  "by_status": {"To Do": 5, "Done": 2, "Blocked": 0,
+                                                                "In Progress": 1}}),
+        )
+        app.data_mode.mark_populated("projects")
+
+        response = app.test_client().get('/api/reports/dashboard')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(tasks.pipelines), 1)
+        self.assertEqual(list(tasks.pipelines[0][-1]["$facet"]), ["count", "recent"])
+        dashboard = response.json
+        self.assertEqual(set(dashboard), {"total_projects", "total_tasks", "total_users", "overdue_tasks",
+                                          "completion_rate", "tasks_by_status", "recent_overdue_tasks"})
+        self.assertEqual((dashboard["total_projects"], dashboard["total_users"], dashboard["total_tasks"]), (4, 7, 8))
+        self.assertEqual(dashboard["tasks_by_status"], {"To Do": 5, "Done": 2, "In Progress": 1})
+        self.assertEqual(dashboard["overdue_tasks"], 1)
+        self.assertEqual(dashboard["completion_rate"], 25.0)
+        self.assertEqual([task["title"] for task in dashboard["recent_overdue_tasks"]], ["Late"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import unittest
+from bson import ObjectId
+from backend.app import create_app
+from backend.tests import FakeDb
+from backend.utils.search import InvertedIndex, prefix_patterns
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+        self.sorted_by = None
+        self.limited_to = None
+
+    def sort(self, spec):
+        self.sorted_by = spec
+        return self
+
+    def limit(self, limit):
+        self.limited_to = limit
+        return self
+
+    def __iter__(self):
+        return iter([dict(doc) for doc in self.docs])
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.finds = []
+
+    def find(self, query, projection=None):
+        cursor = FakeCursor(self.docs)
+        self.finds.append((query, projection, cursor))
+        return cursor
+
+
+class InvertedIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.index = InvertedIndex()
+        self.index.add("task", {"_id": 1, "title": "Design landing page", "description": "Hero and pricing"})
+        self.index.add("task", {"_id": 2, "title": "Write tests", "description": "Cover the design system"})
+        self.index.add("user", {"_id": 3, "username": "Dana Designer", "email": "dana@example.com"})
+
+    def test_title_matches_rank_above_description_matches(self):
+        ranked = [doc["_id"] for _, doc, _ in self.index.search("design", types=("task",))]
+        self.assertEqual(ranked, [1, 2])
+        self.assertEqual(self.index.search("nothing"), [])
+
+    def test_prefix_completion_is_anchored_and_case_insensitive(self):
+        self.assertEqual([doc["_id"] for _, doc, _ in self.index.complete("des")], [1])
+        self.assertEqual([doc["_id"] for _, doc, _ in self.index.complete("DANA")], [3])
+        self.assertEqual(self.index.complete("page"), [])
+
+    def test_prefix_patterns_are_anchored(self):
+        patterns = {pattern.pattern for pattern in prefix_patterns("des.")}
+        self.assertEqual(patterns, {r"^des\.", r"^Des\."})
+
+
+class SearchApiTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({"MONGODB_URI": None})
+        self.client = self.app.test_client()
+
+    def test_demo_search_is_typed_ranked_and_paged(self):
+        response = self.client.get('/api/search?q=design&limit=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json["results"]), 1)
+        self.assertTrue(response.json["has_more"])
+        first = response.json["results"][0]
+        self.assertIn(first["type"], ("task", "project", "user"))
+        self.assertIn("score", first)
+        self.assertNotIn("description", first)
+
+        second = self.client.get('/api/search?q=design&limit=1&offset=1').json["results"][0]
+        self.assertLessEqual(second["score"], first["score"])
+
+    def test_demo_autocomplete(self):
+        response = self.client.get('/api/search/autocomplete?q=dev&type=user')
+        self.assertEqual([s["_id"] for s in response.json], ["demo-developer"])
+
+    def test_invalid_arguments(self):
+        self.assertEqual(self.client.get('/api/search').status_code, 400)
+        self.assertEqual(self.client.get('/api/search?q=x&type=file').status_code, 400)
+        self.assertEqual(self.client.get('/api/search?q=x&offset=-1').status_code, 400)
+
+    def test_database_search_uses_text_index_with_projection(self):
+        task_id = ObjectId()
+        tasks = FakeCollection([{"_id": task_id, "title": "Design landing page", "score": 2.5}])
+        projects = FakeCollection([{"_id": ObjectId(), "name": "Design system", "score": 1.1}])
+        self.app.db = FakeDb(tasks=tasks, projects=projects)
+        for collection in ("tasks", "projects"):
+            self.app.data_mode.mark_populated(collection)
+
+        response = self.client.get('/api/search?q=design&type=task,project&limit=5')
+        self.assertEqual([r["type"] for r in response.json["results"]], ["task", "project"])
+        self.assertEqual(response.json["results"][0]["_id"], str(task_id))
+
+        query, projection, cursor = tasks.finds[0]
+        self.assertEqual(query, {"$text": {"$search": "design"}})
+        self.assertEqual(projection["score"], {"$meta": "textScore"})
+        self.assertNotIn("description", projection)
+        self.assertEqual(cursor.sorted_by, [("score", {"$meta": "textScore"})])
+        self.assertEqual(cursor.limited_to, 6)
+
+    def test_scores_are_normalized_per_type_before_merging(self):
+        tasks = FakeCollection([{"_id": ObjectId(), "title": "Design review", "score": 12.0},
+                                {"_id": ObjectId(), "title": "Fix design bug", "score": 3.0}])
+        projects = FakeCollection([{"_id": ObjectId(), "name": "Design system", "score": 0.9},
+                                   {"_id": ObjectId(), "name": "Website design", "score": 0.6}])
+        self.app.db = FakeDb(tasks=tasks, projects=projects)
+        for collection in ("tasks", "projects"):
+            self.app.data_mode.mark_populated(collection)
+
+        results = self.client.get('/api/search?q=design&type=task,project').json["results"]
+        self.assertEqual([(r["label"], r["score"]) for r in results],
+                         [("Design review", 1.0), ("Design system", 1.0),
+                          ("Website design", 0.6667), ("Fix design bug", 0.25)])
+
+    def test_database_autocomplete_uses_anchored_regexes(self):
+        projects = FakeCollection([{"_id": ObjectId(), "name": "Website"}])
+        self.app.db = FakeDb(projects=projects)
+        self.app.data_mode.mark_populated("projects")
+
+        response = self.client.get('/api/search/autocomplete?q=web&type=project')
+        self.assertEqual([s["label"] for s in response.json], ["Website"])
+        query, _, _ = projects.finds[0]
+        patterns = {p.pattern for p in query["$or"][0]["name"]["$in"]}
+        self.assertEqual(patterns, {"^web", "^Web"})
+
+
+    def test_database_autocomplete_matches_usernames(self):
+        users = FakeCollection([{"_id": ObjectId(), "username": "newdev", "email": "new@example.com"}])
+        self.app.db = FakeDb(users=users)
+        self.app.data_mode.mark_populated("users")
+
+        response = self.client.get('/api/search/autocomplete?q=new&type=user')
+        self.assertEqual([s["label"] for s in response.json], ["newdev"])
+        query, _, _ = users.finds[0]
+        self.assertEqual([list(clause) for clause in query["$or"]], [["name"], ["username"], ["email"]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
 from backend.app import app
+from backend.tests import auth_headers
 
 class ProjectApiTestCase(unittest.TestCase):
     def setUp(self):
@@ -11,7 +12,7 @@ class ProjectApiTestCase(unittest.TestCase):
         self.assertIsInstance(response.json, list)
 
     def test_create_project_missing_fields(self):
-        response = self.app.post('/api/projects/', json={"name": "Test Project"})
+        response = self.app.post('/api/projects/', json={"name": "Test Project"}, headers=auth_headers(self.app))
         self.assertEqual(response.status_code, 400)
         self.assertIn('error', response.get_data(as_text=True))
 
@@ -0,0 +1,24 @@
+import json
+import unittest
+from backend.app import app
+
+
+class StreamingApiTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+
+    def test_tasks_as_ndjson(self):
+        response = self.app.get('/api/tasks/', headers={"Accept": "application/x-ndjson"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual([json.loads(line) for line in lines], self.app.get('/api/tasks/').json)
+
+    def test_users_as_chunked_array(self):
+        response = self.app.get('/api/users/?stream=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertIsInstance(json.loads(response.get_data(as_text=True)), list)
+
+if __name__ == '__main__':
+    unittest.main()
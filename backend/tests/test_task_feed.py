@@ -0,0 +1,81 @@
+import unittest
+from bson import ObjectId
+from backend.app import create_app
+from backend.tests import FakeDb
+from backend.utils.indexes import INDEXES
+
+
+class FakeCursor(list):
+    def sort(self, spec):
+        return self
+
+    def limit(self, limit):
+        return FakeCursor(self[:limit])
+
+
+class FakeTasks:
+    def __init__(self, result=None, docs=()):
+        self.result = result
+        self.docs = list(docs)
+        self.pipelines = []
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return iter([self.result])
+
+    def find(self, query, projection=None):
+        return FakeCursor(self.docs)
+
+
+class TaskFeedTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({"MONGODB_URI": None})
+        self.client = self.app.test_client()
+
+    def test_demo_feed_is_sorted_with_counts(self):
+        response = self.client.get('/api/projects/demo-project-1/tasks')
+        self.assertEqual(response.status_code, 200)
+        deadlines = [task["deadline"] for task in response.json["tasks"]]
+        self.assertEqual(deadlines, sorted(deadlines))
+        self.assertEqual(sum(response.json["counts"].values()), response.json["total"])
+        self.assertTrue(all(task["project_id"] == "demo-project-1" for task in response.json["tasks"]))
+
+    def test_user_feed_runs_one_faceted_aggregation(self):
+        user_id = ObjectId()
+        tasks = [{"_id": ObjectId(), "deadline": None, "status": "To Do"} for _ in range(3)]
+        fake = FakeTasks({"tasks": tasks, "counts": [{"_id": "To Do", "count": 7}, {"_id": "Done", "count": 2}]})
+        self.app.db = FakeDb(tasks=fake)
+        self.app.data_mode.mark_populated("tasks")
+
+        response = self.client.get(f'/api/users/{user_id}/tasks?limit=2&status=To Do')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["counts"], {"To Do": 7, "Done": 2})
+        self.assertEqual(response.json["total"], 9)
+        self.assertEqual(len(response.json["tasks"]), 2)
+        self.assertIn("X-Next-Cursor", response.headers)
+
+        (match, sort, facet), = fake.pipelines
+        self.assertEqual(match["$match"]["assigned_to"], {"$in": [user_id, str(user_id)]})
+        self.assertEqual(match["$match"]["status"], "To Do")
+        self.assertEqual(list(sort["$sort"]), ["deadline", "_id"])
+        self.assertEqual(facet["$facet"]["tasks"][-1], {"$limit": 3})
+
+    def test_task_list_links_next_page(self):
+        self.app.db = FakeDb(tasks=FakeTasks(docs=[{"_id": ObjectId()} for _ in range(3)]))
+        self.app.data_mode.mark_populated("tasks")
+
+        response = self.client.get('/api/tasks/?limit=2&status=Done')
+        self.assertEqual(len(response.json), 2)
+        cursor = response.headers["X-Next-Cursor"]
+        self.assertIn("/api/tasks/?", response.headers["Link"])
+        self.assertIn(f"cursor={cursor}", response.headers["Link"])
+        self.assertIn("status=Done", response.headers["Link"])
+
+    def test_feed_indexes_cover_owner_status_deadline(self):
+        keys = {model.document["name"]: list(model.document["key"]) for model in INDEXES["tasks"]}
+        self.assertEqual(keys["assigned_to_status_deadline"], ["assigned_to", "status", "deadline"])
+        self.assertEqual(keys["project_id_status_deadline"], ["project_id", "status", "deadline"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,200 @@
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from backend.tests import FakeDb
+from backend.utils.task_store import apply_task_operations, insert_tasks, migrate_deadlines, validate_task
+
+
+class EmptyTasks:
+    def find(self, query, projection=None):
+        return []
+
+
+class EmptyDb:
+    tasks = EmptyTasks()
+    report_stats = None
+
+
+class FakeTasks:
+    """Records writes; ``fail_at`` positions come back as BulkWriteError writeErrors."""
+
+    def __init__(self, docs=(), fail_at=()):
+        self.docs = {doc["_id"]: doc for doc in docs}
+        self.fail_at = fail_at
+        self.inserts = []
+        self.bulk_writes = []
+
+    def _raise_write_errors(self, count, ordered):
+        errors = [{"index": position, "code": 11000, "errmsg": f"E11000 duplicate key at {position}"}
+                  for position in self.fail_at if position < count]
+        if errors:
+            if ordered:
+                errors = errors[:1]
+            raise BulkWriteError({"writeErrors": errors})
+
+    def insert_many(self, docs, ordered=True):
+        for doc in docs:
+            doc.setdefault("_id", ObjectId())
+        self.inserts.append((docs, ordered))
+        self._raise_write_errors(len(docs), ordered)
+
+    def find(self, query, projection=None):
+        return [dict(self.docs[task_id]) for task_id in query["_id"]["$in"] if task_id in self.docs]
+
+    def bulk_write(self, requests, ordered=True):
+        self.bulk_writes.append((requests, ordered))
+        self._raise_write_errors(len(requests), ordered)
+
+
+class FakeUpdates:
+    def __init__(self):
+        self.calls = []
+
+    def update_one(self, query, update):
+        self.calls.append((query, update))
+
+    def delete_many(self, query):
+        self.calls.append(query)
+
+
+def fake_db(tasks):
+    return FakeDb(tasks=tasks, report_stats=FakeUpdates(), task_comments=FakeUpdates())
+
+
+class TaskValidationTestCase(unittest.TestCase):
+    def test_validate_task(self):
+        self.assertIsNone(validate_task({"title": "Write docs"}))
+        self.assertEqual(validate_task({"description": "no title"}), "Title required")
+        self.assertEqual(validate_task("not a task"), "Task must be an object")
+        self.assertEqual(validate_task({"title": "x", "$where": "1"}), "Field names cannot start with $")
+
+    def test_batch_operation_errors_match_single_handlers(self):
+        missing = str(ObjectId())
+        results = apply_task_operations(EmptyDb(), [
+            {"op": "status", "id": missing},
+            {"op": "status", "id": missing, "status": "Done"},
+            {"op": "delete", "id": "not-an-id"},
+            {"op": "archive", "id": missing},
+        ])
+        self.assertEqual([r["code"] for r in results], [400, 404, 400, 400])
+        self.assertEqual(results[0]["error"], "Status required")
+        self.assertEqual(results[1]["error"], "Task not found")
+
+
+class InsertTasksTestCase(unittest.TestCase):
+    def docs(self):
+        return [{"title": "A"}, {"description": "no title"}, {"title": "B"}, {"title": "C"}]
+
+    def test_ordered_stops_at_first_invalid_item(self):
+        db = fake_db(FakeTasks())
+        results = insert_tasks(db, self.docs(), ordered=True)
+        self.assertEqual([r["status"] for r in results], ["created", "invalid", "skipped", "skipped"])
+        (written, ordered), = db.tasks.inserts
+        self.assertEqual(([doc["title"] for doc in written], ordered), (["A"], True))
+        self.assertEqual(db.report_stats.calls, [({"_id": "tasks"}, {"$inc": {
+            "total": 1, "by_status.To Do": 1, "by_assignee.None": 1, "by_project.None": 1}})])
+
+    def test_unordered_writes_every_valid_item(self):
+        db = fake_db(FakeTasks())
+        results = insert_tasks(db, self.docs(), ordered=False)
+        self.assertEqual([r["status"] for r in results], ["created", "invalid", "created", "created"])
+        self.assertEqual(results[2]["_id"], db.tasks.inserts[0][0][1]["_id"])
+        (_, update), = db.report_stats.calls
+        self.assertEqual(update["$inc"]["total"], 3)
+
+    def test_write_errors_map_back_to_input_indexes(self):
+        # Position 1 of the insert_many is input item 2, after the invalid item 1
+        db = fake_db(FakeTasks(fail_at=(1,)))
+        results = insert_tasks(db, self.docs(), ordered=False)
+        self.assertEqual([r["status"] for r in results], ["created", "invalid", "failed", "created"])
+        self.assertIn("E11000", results[2]["error"])
+        self.assertEqual(db.report_stats.calls[0][1]["$inc"]["total"], 2)
+
+        docs = [{"title": "A"}, {"title": "B"}, {"title": "C"}]
+        db = fake_db(FakeTasks(fail_at=(1,)))
+        results = insert_tasks(db, docs, ordered=True)
+        self.assertEqual([r["status"] for r in results], ["created", "failed", "skipped"])
+        self.assertEqual(db.report_stats.calls[0][1]["$inc"]["total"], 1)
+
+
+class DeadlineTestCase(unittest.TestCase):
+    def test_deadlines_are_stored_as_dates(self):
+        db = fake_db(FakeTasks())
+        results = insert_tasks(db, [{"title": "A", "deadline": "2025-10-30T00:00:00Z"},
+                                    {"title": "B", "deadline": "next week"},
+                                    {"title": "C", "deadline": ""}], ordered=False)
+        self.assertEqual([r["status"] for r in results], ["created", "invalid", "created"])
+        self.assertEqual(results[1]["error"], "deadline must be an ISO 8601 date")
+        written = db.tasks.inserts[0][0]
+        self.assertEqual(written[0]["deadline"], datetime(2025, 10, 30, tzinfo=timezone.utc))
+        self.assertIsNone(written[1]["deadline"])
+
+        task_id = ObjectId()
+        db = fake_db(FakeTasks([{"_id": task_id, "status": "To Do"}]))
+        apply_task_operations(db, [{"op": "update", "id": str(task_id), "fields": {"deadline": "2025-11-01"}}])
+        (request,), _ = db.tasks.bulk_writes[0]
+        self.assertEqual(request, UpdateOne({"_id": task_id}, {"$set": {"deadline": datetime(2025, 11, 1)}}))
+
+    def test_migrate_deadlines_converts_strings(self):
+        first, second = ObjectId(), ObjectId()
+
+        class StringDeadlines:
+            requests = []
+
+            def find(self, query, projection=None):
+                self.query = query
+                return [{"_id": first, "deadline": "2025-10-30T00:00:00Z"}, {"_id": second, "deadline": "soon"}]
+
+            def bulk_write(self, requests, ordered=True):
+                self.requests.extend(requests)
+                return SimpleNamespace(modified_count=len(requests))
+
+        tasks = StringDeadlines()
+        self.assertEqual(migrate_deadlines(FakeDb(tasks=tasks)), (1, 1))
+        self.assertEqual(tasks.query, {"deadline": {"$type": "string"}})
+        self.assertEqual(tasks.requests, [UpdateOne({"_id": first, "deadline": "2025-10-30T00:00:00Z"},
+                                                    {"$set": {"deadline": datetime(2025, 10, 30, tzinfo=timezone.utc)}})])
+
+
+class TaskOperationsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.first, self.second = ObjectId(), ObjectId()
+        self.tasks = [{"_id": self.first, "status": "To Do", "assigned_to": "ann", "project_id": "p1"},
+                      {"_id": self.second, "status": "To Do", "assigned_to": "bob", "project_id": "p1"}]
+        self.operations = [
+            {"op": "status", "id": str(self.first), "status": "Done"},
+            {"op": "assign", "id": str(self.first), "assigned_to": "bob"},
+            {"op": "delete", "id": str(self.second)},
+        ]
+
+    def test_one_bulk_write_and_replayed_counters(self):
+        db = fake_db(FakeTasks(self.tasks))
+        results = apply_task_operations(db, self.operations)
+        self.assertEqual([r["code"] for r in results], [200, 200, 200])
+        (requests, ordered), = db.tasks.bulk_writes
+        self.assertEqual([type(request).__name__ for request in requests], ["UpdateOne", "UpdateOne", "DeleteOne"])
+
+        # first: To Do/ann -> Done/bob, second deleted
+        (_, update), = db.report_stats.calls
+        self.assertEqual(update["$inc"], {"total": -1, "by_status.To Do": -2, "by_status.Done": 1,
+                                          "by_assignee.ann": -1, "by_project.p1": -1})
+        self.assertEqual(db.task_comments.calls, [{"task_id": {"$in": [self.second]}}])
+
+    def test_write_error_fails_item_and_skips_the_rest_when_ordered(self):
+        db = fake_db(FakeTasks(self.tasks, fail_at=(1,)))
+        results = apply_task_operations(db, self.operations)
+        self.assertEqual([r["status"] for r in results], ["ok", "failed", "skipped"])
+        self.assertEqual(results[1]["code"], 400)
+        self.assertIn("E11000", results[1]["error"])
+
+        # Only the status move counts, and the skipped delete keeps its comments
+        (_, update), = db.report_stats.calls
+        self.assertEqual(update["$inc"], {"by_status.To Do": -1, "by_status.Done": 1})
+        self.assertEqual(db.task_comments.calls, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,222 @@
+import hashlib
+import json
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import wraps
+from flask import current_app, make_response, request
+from utils.streaming import streaming_format
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with a per-entry TTL."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        # Counters are kept apart so LRU eviction can never reset them
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            self._counters.pop(key, None)
+
+    def counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._counters.clear()
+
+
+class RedisCache:
+    """Shared cache backend for running several workers.
+
+    Takes any client with the redis-py get/set/incr/delete interface, so
+    tests can hand in a small local stand-in instead of a server.
+    """
+
+    def __init__(self, client, prefix="pm:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        import redis  # optional dependency, only needed for CACHE_REDIS_URL
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=int(ttl) if ttl else None)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def counter(self, key):
+        return int(self.client.get(self.prefix + key) or 0)
+
+    def incr(self, key):
+        return int(self.client.incr(self.prefix + key))
+
+
+class ResponseCache:
+    """Caches GET responses by route and query string, grouped into tags.
+
+    Every tag ("tasks", "projects", ...) has a generation number that is part
+    of the cache key. invalidate() bumps the generation, so all responses
+    built from that data miss at once without enumerating keys, which works
+    the same for the in-process and the shared backend.
+    """
+
+    def __init__(self, backend=None, default_ttl=30):
+        self.backend = backend or LRUCache()
+        self.default_ttl = default_ttl
+
+    def _generation(self, tag):
+        return self.backend.counter(f"gen:{tag}")
+
+    def key(self, tags):
+        generations = ",".join(f"{tag}={self._generation(tag)}" for tag in tags)
+        raw = "|".join([request.path, request.query_string.decode("latin-1"), generations])
+        return "resp:" + hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def invalidate(self, *tags):
+        for tag in tags:
+            self.backend.incr(f"gen:{tag}")
+
+
+class PromptCache:
+    """Content-addressed cache for LLM results with in-flight deduplication.
+
+    Results are keyed by a hash of the normalized prompt input and the
+    sampling parameters. While one caller computes a result, concurrent
+    callers with the same key wait for it instead of making their own call.
+    """
+
+    def __init__(self, backend=None, ttl=3600):
+        self.backend = backend or LRUCache(max_entries=256)
+        self.ttl = ttl
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text, model, temperature):
+        # Case and whitespace differences do not change the answer we want
+        normalized = " ".join(text.split()).casefold()
+        raw = json.dumps([normalized, model, temperature])
+        return "prompt:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, value):
+        if value:
+            self.backend.set(key, value, ttl=self.ttl)
+
+    def get_or_compute(self, key, compute, should_cache=None):
+        """Return (value, hit); ``hit`` is True for cached and shared results.
+
+        Falsy results (e.g. no stories could be parsed) are not cached, nor
+        are results ``should_cache(value)`` rejects; callers waiting on the
+        same key still share them. Exceptions from ``compute`` propagate to
+        every waiting caller.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value, True
+
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return future.result(), True
+
+        try:
+            value = compute()
+            if should_cache is None or should_cache(value):
+                self.set(key, value)
+            future.set_result(value)
+            return value, False
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+
+def cached(*tags, ttl=None):
+    """Cache a GET view and answer If-None-Match with 304 Not Modified.
+
+    Streamed responses and errors are passed through untouched.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = getattr(current_app, "response_cache", None)
+            if (cache is None or request.method != "GET" or streaming_format()
+                    or request.headers.get("Cache-Control") == "no-cache"):
+                return view(*args, **kwargs)
+
+            key = cache.key(tags)
+            entry = cache.backend.get(key)
+            if entry is None:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                response.add_etag()
+                entry = {
+                    "body": response.get_data(),
+                    "mimetype": response.mimetype,
+                    "headers": [(k, v) for k, v in response.headers.items()
+                                if k.lower() in ("etag", "link", "x-next-cursor")],
+                }
+                cache.backend.set(key, entry, ttl=ttl or cache.default_ttl)
+
+            response = current_app.response_class(entry["body"], mimetype=entry["mimetype"])
+            response.headers.extend(entry["headers"])
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
+
+
+def invalidate(*tags):
+    cache = getattr(current_app, "response_cache", None)
+    if cache is not None:
+        cache.invalidate(*tags)
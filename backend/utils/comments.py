@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import DESCENDING, UpdateOne
+from utils.pagination import decode_cursor, encode_cursor
+
+# Comments live in task_comments; the task keeps only the latest few as a preview
+COMMENT_PREVIEW_SIZE = 5
+COMMENT_PAGE_SIZE = 20
+MIGRATION_BATCH_SIZE = 500
+COMMENT_SORT = [("created_at", DESCENDING), ("_id", DESCENDING)]
+
+
+def _preview(comment):
+    return {key: value for key, value in comment.items() if key != "task_id"}
+
+
+def _migrate_task(task, now, preview_size=COMMENT_PREVIEW_SIZE):
+    """task_comments documents for a task's embedded comments, plus (query, update) for the task."""
+    base = task.get("created_at") if isinstance(task.get("created_at"), datetime) else now
+    moved = []
+    for position, entry in enumerate(task.get("comments") or []):
+        entry = entry if isinstance(entry, dict) else {"text": str(entry)}
+        created_at = entry.get("created_at")
+        moved.append({
+            "_id": ObjectId(),
+            "task_id": task["_id"],
+            "text": entry.get("text"),
+            "author": entry.get("author"),
+            "created_at": created_at if isinstance(created_at, datetime) else base + timedelta(milliseconds=position),
+        })
+    # Matching on the missing comment_count makes converting a task happen once
+    query = {"_id": task["_id"], "comment_count": {"$exists": False}}
+    update = {"$set": {"comments": [_preview(comment) for comment in moved[-preview_size:]],
+                       "comment_count": len(moved)}}
+    return moved, query, update
+
+
+def add_comment(db, task_id, text, author=None):
+    """Store a comment and push it onto the task's capped preview.
+
+    A task whose comments are still embedded (no comment_count yet) is
+    migrated first, so the preview cap cannot drop its older comments.
+    Returns the new comment, or None when the task does not exist.
+    """
+    comment = {
+        "_id": ObjectId(),
+        "task_id": task_id,
+        "text": text,
+        "author": author,
+        "created_at": datetime.utcnow(),
+    }
+    update = {
+        "$push": {"comments": {"$each": [_preview(comment)], "$slice": -COMMENT_PREVIEW_SIZE}},
+        "$inc": {"comment_count": 1},
+    }
+    migrated = {"_id": task_id, "comment_count": {"$exists": True}}
+    result = db.tasks.update_one(migrated, update)
+    if result.matched_count == 0:
+        legacy = db.tasks.find_one({"_id": task_id, "comment_count": {"$exists": False}},
+                                   {"comments": 1, "created_at": 1})
+        if legacy is None:
+            return None
+        moved, query, task_update = _migrate_task(legacy, datetime.utcnow())
+        # Only the request that converts the task copies its comments
+        if db.tasks.update_one(query, task_update).modified_count and moved:
+            db.task_comments.insert_many(moved)
+        result = db.tasks.update_one(migrated, update)
+        if result.matched_count == 0:
+            return None
+    db.task_comments.insert_one(comment)
+    return comment
+
+
+def list_comments(db, task_id, cursor=None, limit=COMMENT_PAGE_SIZE):
+    """One page of a task's comments, newest first; returns (comments, next_cursor)."""
+    query = {"task_id": task_id}
+    if cursor:
+        last_created, last_id = decode_cursor(cursor, "created_at")
+        query["$or"] = [
+            {"created_at": {"$lt": last_created}},
+            {"created_at": last_created, "_id": {"$lt": last_id}},
+        ]
+    comments = list(db.task_comments.find(query, {"task_id": 0}).sort(COMMENT_SORT).limit(limit + 1))
+    next_cursor = None
+    if len(comments) > limit:
+        comments = comments[:limit]
+        next_cursor = encode_cursor("created_at", [comments[-1]["created_at"], comments[-1]["_id"]])
+    return comments, next_cursor
+
+
+def delete_comments(db, task_ids):
+    task_ids = list(task_ids)
+    if db is not None and task_ids:
+        db.task_comments.delete_many({"task_id": {"$in": task_ids}})
+
+
+def migrate_embedded_comments(db, preview_size=COMMENT_PREVIEW_SIZE):
+    """Move comments embedded in tasks into task_comments.
+
+    Tasks that already have a comment_count are skipped, so the migration
+    can be re-run. Plain string comments get the task's created_at (or the
+    current time) plus their position in milliseconds to keep their order.
+    Returns (tasks migrated, comments moved).
+    """
+    tasks_migrated = comments_moved = 0
+    comments, updates = [], []
+
+    def flush():
+        if comments:
+            db.task_comments.insert_many(comments)
+        if updates:
+            db.tasks.bulk_write(updates, ordered=False)
+        comments.clear()
+        updates.clear()
+
+    now = datetime.utcnow()
+    for task in db.tasks.find({"comment_count": {"$exists": False}}, {"comments": 1, "created_at": 1}):
+        moved, query, update = _migrate_task(task, now, preview_size)
+        comments.extend(moved)
+        updates.append(UpdateOne(query, update))
+        tasks_migrated += 1
+        comments_moved += len(moved)
+        if len(updates) >= MIGRATION_BATCH_SIZE:
+            flush()
+    flush()
+    return tasks_migrated, comments_moved
+
@@ -0,0 +1,82 @@
+import threading
+import time
+
+
+class DataSourceMode:
+    """Decides per collection whether routes should serve demo data.
+
+    A collection is in demo mode when there is no database or the collection
+    is empty. Emptiness is checked with a single-document probe and cached,
+    so handlers no longer count the whole collection on every request. Write
+    paths keep the cache honest through mark_populated() and invalidate(),
+    and an optional change stream does the same for writes made by other
+    processes.
+    """
+
+    def __init__(self, db=None, ttl=30.0, resolve=None):
+        # resolve() returns the database on demand, so a lazily connected
+        # app is only contacted when a request first needs it
+        self._db = db
+        self.resolve = resolve
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._empty = {}
+        self._watcher = None
+
+    @property
+    def db(self):
+        return self.resolve() if self.resolve is not None else self._db
+
+    def is_demo(self, collection):
+        if self.db is None:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            cached = self._empty.get(collection)
+        if cached is not None and (self.ttl is None or now - cached[1] < self.ttl):
+            return cached[0]
+        empty = self.db[collection].find_one({}, {"_id": 1}) is None
+        with self._lock:
+            self._empty[collection] = (empty, now)
+        return empty
+
+    def mark_populated(self, collection):
+        with self._lock:
+            self._empty[collection] = (False, time.monotonic())
+
+    def invalidate(self, collection=None):
+        with self._lock:
+            if collection is None:
+                self._empty.clear()
+            else:
+                self._empty.pop(collection, None)
+
+    def start_change_stream(self, collections=None):
+        """Watch the database and update the cache on inserts and deletes.
+
+        Change streams need a replica set; on a standalone server the watcher
+        logs the failure and the TTL alone keeps the cache fresh.
+        """
+        if self.db is None or self._watcher is not None:
+            return
+
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "delete", "drop"]}}}]
+        if collections:
+            pipeline[0]["$match"]["ns.coll"] = {"$in": list(collections)}
+
+        def watch():
+            try:
+                with self.db.watch(pipeline) as stream:
+                    for change in stream:
+                        collection = change["ns"]["coll"]
+                        if change["operationType"] == "insert":
+                            self.mark_populated(collection)
+                        else:
+                            self.invalidate(collection)
+            except Exception as e:
+                print(f"⚠️  Demo-mode change stream stopped: {e}")
+            finally:
+                self._watcher = None
+
+        self._watcher = threading.Thread(target=watch, name="data-mode-watcher", daemon=True)
+        self._watcher.start()
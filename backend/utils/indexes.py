@@ -0,0 +1,148 @@
+import re
+from datetime import datetime
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+from utils.search import SEARCH_TYPES
+
+
+def _text_index(search_type):
+    # GET /api/search: one text index per collection, weighted like the in-process fallback
+    weights = SEARCH_TYPES[search_type]["weights"]
+    return IndexModel([(field, TEXT) for field in weights], weights=weights, name="search_text")
+
+
+# Indexes per collection, shaped after the queries the routes actually run
+INDEXES = {
+    "users": [
+        # login: find_one({"email": ...})
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("role", ASCENDING)], name="role"),
+        # autocomplete: anchored prefix regexes on name and username (email uses email_unique)
+        IndexModel([("name", ASCENDING)], name="name"),
+        IndexModel([("username", ASCENDING)], name="username"),
+        _text_index("user"),
+    ],
+    "projects": [
+        IndexModel([("created_by", ASCENDING)], name="created_by"),
+        IndexModel([("status", ASCENDING)], name="status"),
+        IndexModel([("deadline", ASCENDING)], name="deadline"),
+        IndexModel([("name", ASCENDING)], name="name"),
+        _text_index("project"),
+    ],
+    "tasks": [
+        # overdue: {"deadline": {"$lt": now}, "status": {"$ne": "Done"}}, plus ?status= filters
+        IndexModel([("status", ASCENDING), ("deadline", ASCENDING)], name="status_deadline"),
+        # ?assigned_to= and ?project_id= filters, optionally narrowed by status, and the
+        # /api/users/<id>/tasks and /api/projects/<id>/tasks feeds sorted by deadline
+        IndexModel([("assigned_to", ASCENDING), ("status", ASCENDING), ("deadline", ASCENDING)],
+                   name="assigned_to_status_deadline"),
+        IndexModel([("project_id", ASCENDING), ("status", ASCENDING), ("deadline", ASCENDING)],
+                   name="project_id_status_deadline"),
+        # GET /api/tasks?sort=deadline keyset pagination
+        IndexModel([("deadline", ASCENDING), ("_id", ASCENDING)], name="deadline_id"),
+        IndexModel([("title", ASCENDING)], name="title"),
+        _text_index("task"),
+    ],
+    "task_comments": [
+        # GET /api/tasks/<id>/comments: newest first, keyset on (created_at, _id)
+        IndexModel([("task_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                   name="task_id_created_at"),
+    ],
+    "user_stories": [
+        IndexModel([("project_id", ASCENDING), ("generated_at", ASCENDING)], name="project_id_generated_at"),
+    ],
+    "ai_jobs": [
+        # finished and abandoned jobs expire after a day
+        IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=24 * 3600),
+    ],
+}
+
+
+def _query_shapes():
+    """Representative find() calls issued by the routes, checked by check_query_shapes()."""
+    some_id = ObjectId()
+    return [
+        ("login by email", "users", {"email": "admin@example.com"}, None),
+        ("overdue tasks", "tasks", {"deadline": {"$lt": datetime.utcnow()}, "status": {"$ne": "Done"}}, [("deadline", 1)]),
+        ("tasks by status", "tasks", {"status": "To Do"}, [("_id", 1)]),
+        ("tasks by assignee", "tasks", {"assigned_to": {"$in": [some_id, str(some_id)]}}, None),
+        ("tasks by project", "tasks", {"project_id": {"$in": [some_id, str(some_id)]}}, None),
+        ("task feed of a user by status", "tasks", {"assigned_to": some_id, "status": "To Do"}, [("deadline", 1), ("_id", 1)]),
+        ("task feed of a project by status", "tasks", {"project_id": some_id, "status": "To Do"}, [("deadline", 1), ("_id", 1)]),
+        ("tasks sorted by deadline", "tasks", {}, [("deadline", 1), ("_id", 1)]),
+        ("comments of a task", "task_comments", {"task_id": some_id}, [("created_at", -1), ("_id", -1)]),
+        ("user stories by project", "user_stories", {"project_id": str(some_id)}, None),
+        ("search tasks", "tasks", {"$text": {"$search": "design"}}, None),
+        ("search projects", "projects", {"$text": {"$search": "website"}}, None),
+        ("search users", "users", {"$text": {"$search": "admin"}}, None),
+        ("autocomplete tasks by title", "tasks", {"title": re.compile("^Des")}, None),
+        ("autocomplete projects by name", "projects", {"name": re.compile("^Web")}, None),
+        ("autocomplete users by name", "users", {"name": re.compile("^Adm")}, None),
+        ("autocomplete users by username", "users", {"username": re.compile("^adm")}, None),
+    ]
+
+
+def _key_pattern(index):
+    """Comparable key of an index spec; text indexes are keyed by their fields."""
+    keys = list(dict(index["key"]).items())
+    if any(direction == TEXT for _, direction in keys) or ("_fts", TEXT) in keys:
+        return (TEXT, frozenset(index.get("weights") or {field: 1 for field, _ in keys}))
+    return tuple(keys)
+
+
+def ensure_indexes(db):
+    """Create every index in INDEXES; safe to run repeatedly.
+
+    Key patterns that already exist under another name (e.g. the default
+    ``email_1``) are left alone. Each index is created on its own, so one
+    that cannot be built (e.g. duplicate emails for the unique index, or an
+    existing index with the same name but other options) does not keep the
+    rest from being created. Returns {collection: [index names]}, or an
+    error string for collections where some index failed.
+    """
+    report = {}
+    for collection, models in INDEXES.items():
+        existing = {_key_pattern(index): name for name, index in db[collection].index_information().items()}
+        names, errors = [], []
+        for model in models:
+            name = existing.get(_key_pattern(model.document))
+            if name is None:
+                try:
+                    name, = db[collection].create_indexes([model])
+                except OperationFailure as e:
+                    errors.append(f"{model.document['name']}: {e.details.get('errmsg', e) if e.details else e}")
+                    continue
+            names.append(name)
+        report[collection] = f"error: {'; '.join(errors)}" if errors else names
+    return report
+
+
+def _plan_stages(plan):
+    if not plan:
+        return
+    yield plan
+    for key in ("inputStage", "queryPlan"):
+        yield from _plan_stages(plan.get(key))
+    for child in plan.get("inputStages", []):
+        yield from _plan_stages(child)
+
+
+def check_query_shapes(db):
+    """explain() every registered query shape and report how it is served."""
+    results = []
+    for name, collection, query, sort in _query_shapes():
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = cursor.explain().get("queryPlanner", {}).get("winningPlan", {})
+        stages = list(_plan_stages(plan))
+        indexes = [stage["indexName"] for stage in stages if "indexName" in stage]
+        results.append({
+            "name": name,
+            "collection": collection,
+            "indexes": indexes,
+            "collection_scan": any(stage.get("stage") == "COLLSCAN" for stage in stages),
+            "in_memory_sort": any(stage.get("stage") == "SORT" for stage in stages),
+        })
+    return results
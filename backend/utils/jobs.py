@@ -0,0 +1,114 @@
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+
+MAX_MEMORY_JOBS = 1000
+
+
+class QueueFull(Exception):
+    pass
+
+
+class JobQueue:
+    """Runs slow work (LLM calls) on a bounded thread pool.
+
+    Jobs are persisted in the ``ai_jobs`` collection so any worker process
+    can answer a status poll; without a database they are kept in memory.
+    When ``db`` is not given, ``app.db`` is looked up on use.
+    Each attempt gets ``timeout`` seconds (passed to the runner, which hands
+    it to its client) and failed attempts are retried with exponential
+    backoff and jitter up to ``max_attempts`` times.
+    """
+
+    def __init__(self, app, db=None, max_workers=4, max_pending=100, timeout=30.0,
+                 max_attempts=3, backoff=1.0):
+        self.app = app
+        self._db = db
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def db(self):
+        return self._db if self._db is not None else getattr(self.app, "db", None)
+
+    def submit(self, kind, payload, runner):
+        """Queue ``runner(payload, timeout)`` and return the new job document."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFull("Too many queued jobs, try again later")
+            self._pending += 1
+        now = datetime.utcnow()
+        job = {
+            "_id": uuid.uuid4().hex,
+            "kind": kind,
+            "status": "queued",
+            "attempts": 0,
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        self._save(job)
+        self._executor.submit(self._run, job["_id"], payload, runner)
+        return job
+
+    def get(self, job_id):
+        if self.db is not None:
+            return self.db.ai_jobs.find_one({"_id": job_id})
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _update(self, job_id, **fields):
+        fields["updated_at"] = datetime.utcnow()
+        if self.db is not None:
+            self.db.ai_jobs.update_one({"_id": job_id}, {"$set": fields})
+        else:
+            with self._lock:
+                if job_id in self._jobs:
+                    self._jobs[job_id].update(fields)
+
+    def _save(self, job):
+        if self.db is not None:
+            self.db.ai_jobs.insert_one(dict(job))
+            return
+        with self._lock:
+            self._jobs[job["_id"]] = dict(job)
+            # Keep the in-memory store bounded; the oldest jobs go first
+            while len(self._jobs) > MAX_MEMORY_JOBS:
+                self._jobs.pop(next(iter(self._jobs)))
+
+    def _run(self, job_id, payload, runner):
+        try:
+            with self.app.app_context():
+                for attempt in range(1, self.max_attempts + 1):
+                    self._update(job_id, status="running", attempts=attempt)
+                    try:
+                        result = runner(payload, self.timeout)
+                    except Exception as e:
+                        if attempt == self.max_attempts:
+                            self._update(job_id, status="failed", error=str(e))
+                            return
+                        delay = self.backoff * (2 ** (attempt - 1))
+                        time.sleep(delay + random.uniform(0, delay / 2))
+                    else:
+                        self._update(job_id, status="succeeded", result=result, error=None)
+                        return
+        except Exception as e:
+            print(f"❌ Job {job_id} crashed: {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -1,24 +1,88 @@
+import hashlib
+import time
+from functools import wraps
+
 import jwt
-import os
-from datetime import datetime, timedelta
-
-def encode_auth_token(user_id, role):
-    try:
-        payload = {
-            'exp': datetime.utcnow() + timedelta(days=1),
-            'iat': datetime.utcnow(),
-            'sub': user_id,
-            'role': role
-        }
-        return jwt.encode(payload, os.getenv('JWT_SECRET_KEY'), algorithm='HS256')
-    except Exception as e:
-        return None
-
-def decode_auth_token(auth_token):
-    try:
-        payload = jwt.decode(auth_token, os.getenv('JWT_SECRET_KEY'), algorithms=['HS256'])
-        return payload
-    except jwt.ExpiredSignatureError:
-        return 'Signature expired. Please log in again.'
-    except jwt.InvalidTokenError:
-        return 'Invalid token. Please log in again.'
+from flask import current_app, g, jsonify, request
+from utils.cache import LRUCache
+
+# Subject of the tokens demo login issues; they never authorize database writes
+DEMO_SUBJECT_PREFIX = "demo-"
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class AuthError(Exception):
+    def __init__(self, message, status=401):
+        super().__init__(message)
+        self.status = status
+
+
+class TokenVerifier:
+    """Verifies access tokens and caches their claims until they expire.
+
+    The signing key is read once from app config. Claims are cached by the
+    SHA-256 of the token, so a client sending the same token on every
+    request pays for the signature check only the first time.
+    """
+
+    def __init__(self, secret, algorithm="HS256", max_entries=4096):
+        self._key = secret
+        self.algorithms = [algorithm]
+        self._cache = LRUCache(max_entries=max_entries)
+
+    @staticmethod
+    def key(token):
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def verify(self, token):
+        """Return the claims of ``token`` or raise AuthError."""
+        key = self.key(token)
+        claims = self._cache.get(key)
+        if claims is None:
+            try:
+                claims = jwt.decode(token, self._key, algorithms=self.algorithms)
+            except jwt.ExpiredSignatureError:
+                raise AuthError("Token expired. Please log in again.")
+            except jwt.InvalidTokenError:
+                raise AuthError("Invalid token. Please log in again.")
+            if claims.get("type", "access") != "access":
+                raise AuthError("Access token required")
+            ttl = claims.get("exp", 0) - time.time()
+            # Tokens without an expiry are verified on every request
+            if ttl > 0:
+                self._cache.set(key, claims, ttl=ttl)
+        return claims
+
+
+def bearer_token():
+    header = request.headers.get("Authorization", "")
+    scheme, _, token = header.partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        raise AuthError("Missing authorization token")
+    return token.strip()
+
+
+def require_auth(*roles):
+    """Require a valid Bearer token, and with ``roles`` one of those roles.
+
+    The view finds the token claims (``sub`` is the user id, plus ``role``
+    and ``email``) in ``g.claims``, so authorizing needs no users lookup.
+    Demo tokens are refused on writes once a database is connected, since
+    demo login accepts any password while the users collection is empty.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                claims = current_app.token_verifier.verify(bearer_token())
+            except AuthError as e:
+                return jsonify({"error": str(e)}), e.status
+            if roles and claims.get("role") not in roles:
+                return jsonify({"error": "Insufficient permissions"}), 403
+            if str(claims.get("sub", "")).startswith(DEMO_SUBJECT_PREFIX) and \
+                    request.method not in READ_METHODS and current_app.db is not None:
+                return jsonify({"error": "Demo accounts cannot modify the database"}), 403
+            g.claims = claims
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,382 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from utils.metrics import LatencyHistogram
+
+_http_session = None
+_http_lock = threading.Lock()
+
+
+class LLMUnavailable(Exception):
+    """Every configured provider failed, was rate limited or is circuit-broken."""
+
+
+class RateLimited(Exception):
+    pass
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+def http_session():
+    """Process-wide pooled HTTP client shared by all providers."""
+    global _http_session
+    with _http_lock:
+        if _http_session is None:
+            import httpx
+            _http_session = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=int(os.getenv('LLM_HTTP_MAX_CONNECTIONS', '20')),
+                    max_keepalive_connections=int(os.getenv('LLM_HTTP_MAX_KEEPALIVE', '10')),
+                ),
+                timeout=float(os.getenv('LLM_HTTP_TIMEOUT', '60')),
+            )
+        return _http_session
+
+
+class RateLimiter:
+    """Token bucket: ``rate`` calls per second with bursts of up to ``burst``."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, wait=0.0):
+        """Take a token, waiting up to ``wait`` seconds; False if none was free."""
+        deadline = time.monotonic() + wait
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                needed = (1 - self._tokens) / self.rate
+            if now + needed > deadline:
+                return False
+            time.sleep(needed)
+
+
+class CircuitBreaker:
+    """Stops calling a provider after ``failure_threshold`` consecutive failures.
+
+    After ``reset_timeout`` seconds one trial call is let through (half-open);
+    success closes the circuit again, failure reopens it.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def cancel_trial(self):
+        """Give back a half-open trial that was allowed but never made."""
+        with self._lock:
+            self._trial = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+
+class LLMProvider:
+    """Base class: a chat model reachable through ``complete`` and ``stream``."""
+
+    def __init__(self, name, model, rate=None, burst=None, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.model = model
+        self.limiter = RateLimiter(rate, burst) if rate else None
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.latency = LatencyHistogram()
+        self.calls = 0
+        self.errors = 0
+
+    def complete(self, messages, temperature, max_tokens, timeout=None):
+        """Return the full completion text."""
+        raise NotImplementedError
+
+    def stream(self, messages, temperature, max_tokens, timeout=None):
+        """Yield the completion text in pieces as it is generated."""
+        yield self.complete(messages, temperature, max_tokens, timeout)
+
+    def stats(self):
+        return {
+            "name": self.name,
+            "model": self.model,
+            "circuit": self.breaker.state,
+            "calls": self.calls,
+            "errors": self.errors,
+            "latency_seconds": self.latency.snapshot(),
+        }
+
+
+class ChatClientProvider(LLMProvider):
+    """Any client with the OpenAI-style ``chat.completions.create`` interface."""
+
+    def __init__(self, name, client, model, **kwargs):
+        super().__init__(name, model, **kwargs)
+        self._client = client
+
+    @property
+    def client(self):
+        return self._client
+
+    def complete(self, messages, temperature, max_tokens, timeout=None):
+        completion = self.client.chat.completions.create(
+            messages=messages, model=self.model, temperature=temperature,
+            max_tokens=max_tokens, timeout=timeout,
+        )
+        return completion.choices[0].message.content
+
+    def stream(self, messages, temperature, max_tokens, timeout=None):
+        chunks = self.client.chat.completions.create(
+            messages=messages, model=self.model, temperature=temperature,
+            max_tokens=max_tokens, timeout=timeout, stream=True,
+        )
+        for chunk in chunks:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class GroqProvider(ChatClientProvider):
+    """Groq's hosted models; the SDK is only imported when first used."""
+
+    def __init__(self, api_key, model="llama-3.1-8b-instant", **kwargs):
+        super().__init__("groq", None, model, **kwargs)
+        self.api_key = api_key
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                from groq import Groq
+                self._client = Groq(api_key=self.api_key, http_client=http_session(), max_retries=0)
+            return self._client
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """A local model server speaking the OpenAI chat completions API (vLLM, llama.cpp, Ollama)."""
+
+    def __init__(self, base_url, model, api_key=None, name="local", **kwargs):
+        super().__init__(name, model, **kwargs)
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+
+    def _body(self, messages, temperature, max_tokens, stream=False):
+        return {"model": self.model, "messages": messages, "temperature": temperature,
+                "max_tokens": max_tokens, "stream": stream}
+
+    def complete(self, messages, temperature, max_tokens, timeout=None):
+        response = http_session().post(self.url, json=self._body(messages, temperature, max_tokens),
+                                       headers=self.headers, timeout=timeout)
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"]
+
+    def stream(self, messages, temperature, max_tokens, timeout=None):
+        body = self._body(messages, temperature, max_tokens, stream=True)
+        with http_session().stream("POST", self.url, json=body, headers=self.headers, timeout=timeout) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or [{}]
+                text = choices[0].get("delta", {}).get("content")
+                if text:
+                    yield text
+
+
+class StubProvider(LLMProvider):
+    """Deterministic in-process model for offline benchmarks and load tests.
+
+    Returns user stories derived from a hash of the prompt, optionally after
+    ``delay`` seconds to mimic a remote model.
+    """
+
+    ROLES = ("customer", "admin", "project manager", "developer", "guest")
+
+    def __init__(self, model="stub", delay=0.0, **kwargs):
+        super().__init__("stub", model, **kwargs)
+        self.delay = delay
+
+    def complete(self, messages, temperature, max_tokens, timeout=None):
+        if self.delay:
+            time.sleep(self.delay)
+        digest = hashlib.sha256(messages[-1]["content"].encode("utf-8")).hexdigest()
+        stories = [f"As a {self.ROLES[int(digest[i], 16) % len(self.ROLES)]}, I want to use feature {digest[i:i + 6]}, "
+                   f"so that I can get my work done."
+                   for i in range(0, 30, 6)]
+        return json.dumps(stories)
+
+    def stream(self, messages, temperature, max_tokens, timeout=None):
+        text = self.complete(messages, temperature, max_tokens, timeout)
+        for start in range(0, len(text), 16):
+            yield text[start:start + 16]
+
+
+class LLMRouter:
+    """Tries providers in order, skipping rate-limited and circuit-broken ones."""
+
+    def __init__(self, providers, rate_limit_wait=0.0):
+        self.providers = list(providers)
+        self.rate_limit_wait = rate_limit_wait
+
+    @property
+    def model(self):
+        return self.providers[0].model if self.providers else None
+
+    def _available(self):
+        for provider in self.providers:
+            if not provider.breaker.allow():
+                yield provider, CircuitOpen(f"{provider.name} circuit is open")
+            elif provider.limiter and not provider.limiter.acquire(self.rate_limit_wait):
+                provider.breaker.cancel_trial()
+                yield provider, RateLimited(f"{provider.name} is rate limited")
+            else:
+                yield provider, None
+
+    def _failed(self, provider, error):
+        provider.errors += 1
+        provider.breaker.record_failure()
+        print(f"⚠️ LLM provider {provider.name} failed: {error}")
+
+    def complete(self, messages, temperature, max_tokens, timeout=None, on_provider=None):
+        """Completion from the first working provider.
+
+        ``on_provider`` is called with the provider that answered, e.g. so
+        callers can tell a fallback's answer from the primary's.
+        """
+        errors = []
+        for provider, skipped in self._available():
+            if skipped:
+                errors.append(str(skipped))
+                continue
+            provider.calls += 1
+            started = time.monotonic()
+            try:
+                text = provider.complete(messages, temperature, max_tokens, timeout)
+            except Exception as e:
+                self._failed(provider, e)
+                errors.append(f"{provider.name}: {e}")
+                continue
+            provider.latency.observe(time.monotonic() - started)
+            provider.breaker.record_success()
+            if on_provider:
+                on_provider(provider)
+            return text
+        raise LLMUnavailable("; ".join(errors) or "No LLM provider configured")
+
+    def stream(self, messages, temperature, max_tokens, timeout=None, on_provider=None):
+        """Stream from the first working provider.
+
+        Failover only happens before the first piece has been yielded; a
+        failure mid-stream is raised to the caller. ``on_provider`` is called
+        with the provider once its stream has completed.
+        """
+        errors = []
+        for provider, skipped in self._available():
+            if skipped:
+                errors.append(str(skipped))
+                continue
+            provider.calls += 1
+            started = time.monotonic()
+            started_output = False
+            settled = False
+            pieces = provider.stream(messages, temperature, max_tokens, timeout)
+            try:
+                for text in pieces:
+                    started_output = True
+                    yield text
+                settled = True
+            except Exception as e:
+                settled = True
+                self._failed(provider, e)
+                if started_output:
+                    raise
+                errors.append(f"{provider.name}: {e}")
+                continue
+            finally:
+                if not settled:
+                    # Abandoned (GeneratorExit when the client disconnects) or interrupted:
+                    # neither a success nor a failure, so hand back a half-open trial
+                    provider.breaker.cancel_trial()
+                    pieces.close()
+            provider.latency.observe(time.monotonic() - started)
+            provider.breaker.record_success()
+            if on_provider:
+                on_provider(provider)
+            return
+        raise LLMUnavailable("; ".join(errors) or "No LLM provider configured")
+
+    def stats(self):
+        return [provider.stats() for provider in self.providers]
+
+
+def build_router_from_env():
+    """Providers from AI_PROVIDERS (comma separated, in failover order).
+
+    Defaults to Groq when GROQ_API_KEY is set, followed by the local server
+    when LOCAL_LLM_URL is set. The stub is only used when listed explicitly.
+    """
+    groq_api_key = os.getenv('GROQ_API_KEY')
+    if groq_api_key == 'your-groq-api-key-here':
+        groq_api_key = None
+    names = [name.strip() for name in os.getenv('AI_PROVIDERS', 'groq,local').split(',') if name.strip()]
+    limits = {
+        "failure_threshold": int(os.getenv('AI_CIRCUIT_FAILURES', '5')),
+        "reset_timeout": float(os.getenv('AI_CIRCUIT_RESET', '30')),
+    }
+
+    providers = []
+    for name in names:
+        rate = float(os.getenv(f'{name.upper()}_RATE_LIMIT', '0')) or None
+        if name == "groq" and groq_api_key:
+            providers.append(GroqProvider(groq_api_key, model=os.getenv('GROQ_MODEL', 'llama-3.1-8b-instant'),
+                                          rate=rate, **limits))
+        elif name == "local" and os.getenv('LOCAL_LLM_URL'):
+            providers.append(OpenAICompatibleProvider(os.getenv('LOCAL_LLM_URL'),
+                                                      model=os.getenv('LOCAL_LLM_MODEL', 'local-model'),
+                                                      api_key=os.getenv('LOCAL_LLM_API_KEY'), rate=rate, **limits))
+        elif name == "stub":
+            providers.append(StubProvider(delay=float(os.getenv('STUB_LLM_DELAY', '0')), rate=rate, **limits))
+    return LLMRouter(providers, rate_limit_wait=float(os.getenv('AI_RATE_LIMIT_WAIT', '1')))
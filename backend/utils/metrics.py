@@ -0,0 +1,242 @@
+import bisect
+import contextvars
+import threading
+import time
+from collections import Counter
+from flask import g, request
+from pymongo import monitoring
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class LatencyHistogram:
+    """Cumulative-bucket latency histogram in the Prometheus layout."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self._sum += seconds
+
+    def snapshot(self):
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative, running = {}, 0
+        for bound, count in zip(self.buckets + ("+Inf",), counts):
+            running += count
+            cumulative[str(bound)] = running
+        return {"buckets": cumulative, "count": running, "sum": round(total, 6)}
+
+
+# Upper bounds of the per-request MongoDB round-trip histogram
+DB_COMMAND_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+_current_trace = contextvars.ContextVar("request_trace", default=None)
+
+
+class LabeledHistograms:
+    """One LatencyHistogram per label tuple, created on first use."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            histogram = self._histograms.get(labels)
+            if histogram is None:
+                histogram = self._histograms[labels] = LatencyHistogram(self.buckets)
+        histogram.observe(value)
+
+    def items(self):
+        with self._lock:
+            return sorted(self._histograms.items())
+
+
+class RequestTrace:
+    """MongoDB commands issued while handling one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.commands = []
+        self._pending = {}
+
+    @property
+    def db_seconds(self):
+        return sum(command["seconds"] for command in self.commands)
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Counts and times MongoDB commands, attributing them to the current request."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.totals = Counter()
+        self.failures = Counter()
+        self.latency = LabeledHistograms()
+
+    def started(self, event):
+        trace = _current_trace.get()
+        if trace is not None:
+            target = event.command.get(event.command_name)
+            trace._pending[event.request_id] = (event.command_name, target if isinstance(target, str) else None)
+
+    def _finished(self, event, failed):
+        seconds = event.duration_micros / 1e6
+        with self._lock:
+            self.totals[event.command_name] += 1
+            if failed:
+                self.failures[event.command_name] += 1
+        self.latency.observe((event.command_name,), seconds)
+        trace = _current_trace.get()
+        if trace is not None:
+            name, collection = trace._pending.pop(event.request_id, (event.command_name, None))
+            trace.commands.append({"command": name, "collection": collection,
+                                   "seconds": seconds, "failed": failed})
+
+    def succeeded(self, event):
+        self._finished(event, False)
+
+    def failed(self, event):
+        self._finished(event, True)
+
+
+class RequestMetrics:
+    """Per-endpoint latency, status counts, in-flight gauge and DB round trips."""
+
+    def __init__(self, slow_request_seconds=0.5):
+        self.slow_request_seconds = slow_request_seconds
+        self.latency = LabeledHistograms()
+        self.db_commands = LabeledHistograms(DB_COMMAND_BUCKETS)
+        self.db_seconds = LabeledHistograms()
+        self.statuses = Counter()
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Install the before/teardown request hooks on ``app``."""
+
+        @app.before_request
+        def start_trace():
+            trace = RequestTrace()
+            g.request_trace = trace
+            _current_trace.set(trace)
+            with self._lock:
+                self.in_flight += 1
+
+        @app.after_request
+        def remember_status(response):
+            g.response_status = response.status_code
+            return response
+
+        # Runs after streamed responses have finished, so they are timed in full
+        @app.teardown_request
+        def finish_trace(error=None):
+            trace = g.pop("request_trace", None)
+            if trace is None:
+                return
+            _current_trace.set(None)
+            status = 500 if error is not None else g.pop("response_status", 500)
+            self.record(app, trace, status)
+
+    def record(self, app, trace, status):
+        seconds = time.perf_counter() - trace.started
+        endpoint = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+        labels = (endpoint, request.method)
+        with self._lock:
+            self.in_flight -= 1
+            self.statuses[labels + (str(status),)] += 1
+        self.latency.observe(labels, seconds)
+        self.db_commands.observe(labels, len(trace.commands))
+        self.db_seconds.observe(labels, trace.db_seconds)
+
+        if seconds >= self.slow_request_seconds:
+            commands = ", ".join(
+                f"{command['command']}{'.' + command['collection'] if command['collection'] else ''}"
+                f" {command['seconds'] * 1000:.1f}ms" for command in trace.commands)
+            app.logger.warning(
+                "Slow request %s %s -> %s in %.1fms, %d MongoDB commands (%.1fms): %s",
+                request.method, request.full_path.rstrip("?"), status, seconds * 1000,
+                len(trace.commands), trace.db_seconds * 1000, commands or "none")
+
+
+def _labels(names, values):
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in values)
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+
+def _histogram_lines(name, help_text, label_names, histograms):
+    """``histograms`` is a list of (label values, LatencyHistogram) pairs."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, histogram in histograms:
+        snapshot = histogram.snapshot()
+        base = _labels(label_names, labels)
+        bucket_prefix = f"{base}," if base else ""
+        suffix = f"{{{base}}}" if base else ""
+        for bound, count in snapshot["buckets"].items():
+            lines.append(f'{name}_bucket{{{bucket_prefix}le="{bound}"}} {count}')
+        lines.append(f"{name}_sum{suffix} {snapshot['sum']}")
+        lines.append(f"{name}_count{suffix} {snapshot['count']}")
+    return lines
+
+
+def _sample_lines(name, help_text, kind, label_names, samples):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in sorted(samples.items()):
+        lines.append(f"{name}{{{_labels(label_names, labels)}}} {value}" if labels else f"{name} {value}")
+    return lines
+
+
+def prometheus_text(request_metrics, command_metrics=None, pool_metrics=None, llm=None):
+    """Render all metrics in the Prometheus text exposition format."""
+    lines = []
+    lines += _histogram_lines("http_request_duration_seconds", "Request latency by endpoint.",
+                              ("endpoint", "method"), request_metrics.latency.items())
+    with request_metrics._lock:
+        statuses = dict(request_metrics.statuses)
+        in_flight = request_metrics.in_flight
+    lines += _sample_lines("http_requests_total", "Finished requests by endpoint and status.", "counter",
+                           ("endpoint", "method", "status"), statuses)
+    lines += _sample_lines("http_requests_in_flight", "Requests being handled right now.", "gauge",
+                           (), {(): in_flight})
+    lines += _histogram_lines("http_request_db_commands", "MongoDB commands issued per request.",
+                              ("endpoint", "method"), request_metrics.db_commands.items())
+    lines += _histogram_lines("http_request_db_seconds", "Time spent in MongoDB per request.",
+                              ("endpoint", "method"), request_metrics.db_seconds.items())
+
+    if command_metrics is not None:
+        with command_metrics._lock:
+            totals = {(name,): count for name, count in command_metrics.totals.items()}
+            failures = {(name,): count for name, count in command_metrics.failures.items()}
+        lines += _sample_lines("mongodb_commands_total", "MongoDB commands by name.", "counter",
+                               ("command",), totals)
+        lines += _sample_lines("mongodb_command_failures_total", "Failed MongoDB commands by name.", "counter",
+                               ("command",), failures)
+        lines += _histogram_lines("mongodb_command_duration_seconds", "MongoDB command latency.",
+                                  ("command",), command_metrics.latency.items())
+
+    if pool_metrics is not None:
+        pool = pool_metrics.snapshot()
+        for key in ("connections_open", "connections_in_use"):
+            lines += _sample_lines(f"mongodb_pool_{key}", f"Connection pool {key.replace('_', ' ')}.", "gauge",
+                                   (), {(): pool[key]})
+        for key in ("connections_created", "checkouts", "checkout_failures", "pools_cleared"):
+            lines += _sample_lines(f"mongodb_pool_{key}_total", f"Connection pool {key.replace('_', ' ')}.",
+                                   "counter", (), {(): pool[key]})
+        lines += _histogram_lines("mongodb_pool_checkout_wait_seconds", "Time waited for a pooled connection.",
+                                  (), [((), pool_metrics.wait_seconds)])
+
+    if llm is not None:
+        lines += _histogram_lines("llm_request_duration_seconds", "Successful LLM call latency by provider.",
+                                  ("provider",), [((provider.name,), provider.latency) for provider in llm.providers])
+        lines += _sample_lines("llm_errors_total", "Failed LLM calls by provider.", "counter", ("provider",),
+                               {(provider.name,): provider.errors for provider in llm.providers})
+    return "\n".join(lines) + "\n"
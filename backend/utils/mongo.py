@@ -0,0 +1,128 @@
+import os
+import threading
+import time
+from pymongo import monitoring
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+from utils.metrics import LatencyHistogram
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+
+def mongo_config():
+    """MongoClient settings from the environment, merged into app.config."""
+    return {
+        'MONGODB_URI': os.getenv('MONGODB_URI', 'mongodb://localhost:27017'),
+        'DATABASE_NAME': os.getenv('DATABASE_NAME', 'project_management_db'),
+        'MONGODB_TIMEOUT_MS': int(os.getenv('MONGODB_TIMEOUT_MS', '5000')),
+        'MONGODB_MAX_POOL_SIZE': int(os.getenv('MONGODB_MAX_POOL_SIZE', '100')),
+        'MONGODB_MIN_POOL_SIZE': int(os.getenv('MONGODB_MIN_POOL_SIZE', '0')),
+        # 0 waits for a free connection as long as serverSelectionTimeoutMS allows
+        'MONGODB_WAIT_QUEUE_TIMEOUT_MS': int(os.getenv('MONGODB_WAIT_QUEUE_TIMEOUT_MS', '0')),
+        # e.g. "zstd,snappy,zlib"; zstd and snappy need their Python packages
+        'MONGODB_COMPRESSORS': os.getenv('MONGODB_COMPRESSORS', ''),
+        'MONGODB_READ_PREFERENCE': os.getenv('MONGODB_READ_PREFERENCE', 'primary'),
+        # Used by reports and list views through app.analytics_db. Secondaries are
+        # opt-in: their reads can miss recent writes and refill the response cache
+        'MONGODB_ANALYTICS_READ_PREFERENCE': os.getenv('MONGODB_ANALYTICS_READ_PREFERENCE', 'primary'),
+        # At least 90 seconds, as required by the server
+        'MONGODB_MAX_STALENESS_SECONDS': int(os.getenv('MONGODB_MAX_STALENESS_SECONDS', '120')),
+    }
+
+
+def read_preference(name, max_staleness=-1):
+    """Build a read preference from its connection-string name."""
+    if name not in READ_PREFERENCES:
+        raise ValueError(f"Unknown read preference {name!r}; use one of {', '.join(READ_PREFERENCES)}")
+    if name == "primary":
+        return Primary()
+    return READ_PREFERENCES[name](max_staleness=max_staleness)
+
+
+def client_options(config, event_listeners=()):
+    """Keyword arguments for MongoClient from mongo_config() style settings."""
+    options = {
+        "serverSelectionTimeoutMS": config['MONGODB_TIMEOUT_MS'],
+        "maxPoolSize": config['MONGODB_MAX_POOL_SIZE'],
+        "minPoolSize": config['MONGODB_MIN_POOL_SIZE'],
+        "read_preference": read_preference(config['MONGODB_READ_PREFERENCE'],
+                                           config['MONGODB_MAX_STALENESS_SECONDS']),
+        "event_listeners": list(event_listeners),
+    }
+    if config['MONGODB_WAIT_QUEUE_TIMEOUT_MS']:
+        options["waitQueueTimeoutMS"] = config['MONGODB_WAIT_QUEUE_TIMEOUT_MS']
+    if config['MONGODB_COMPRESSORS']:
+        options["compressors"] = config['MONGODB_COMPRESSORS']
+    return options
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool counters and check-out wait times for all servers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waits = threading.local()
+        self.wait_seconds = LatencyHistogram(buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5))
+        self.counters = {
+            "pools_created": 0,
+            "pools_cleared": 0,
+            "connections_created": 0,
+            "connections_closed": 0,
+            "checkouts": 0,
+            "checkins": 0,
+            "checkout_failures": 0,
+        }
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self.counters)
+        counters["connections_open"] = counters["connections_created"] - counters["connections_closed"]
+        counters["connections_in_use"] = counters["checkouts"] - counters["checkins"]
+        counters["checkout_wait_seconds"] = self.wait_seconds.snapshot()
+        return counters
+
+    def pool_created(self, event):
+        self._count("pools_created")
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._count("pools_cleared")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._count("connections_created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._count("connections_closed")
+
+    def connection_check_out_started(self, event):
+        self._waits.started = time.monotonic()
+
+    def connection_check_out_failed(self, event):
+        self._count("checkout_failures")
+
+    def connection_checked_out(self, event):
+        started = getattr(self._waits, "started", None)
+        if started is not None:
+            self.wait_seconds.observe(time.monotonic() - started)
+            self._waits.started = None
+        self._count("checkouts")
+
+    def connection_checked_in(self, event):
+        self._count("checkins")
@@ -0,0 +1,119 @@
+import base64
+from datetime import datetime
+from bson import ObjectId, json_util
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# BSON sort order of the value types we store in sortable fields
+_TYPE_ORDER = ["null", "string", "date"]
+
+
+def parse_limit(args, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    try:
+        limit = int(args.get("limit", default))
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, maximum)
+
+
+def encode_cursor(sort_field, values):
+    raw = json_util.dumps({"s": sort_field, "v": values})
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(token, sort_field):
+    try:
+        data = json_util.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    # _id cursors hold [_id]; the others hold [value, _id]
+    expected = 1 if sort_field == "_id" else 2
+    if not isinstance(data, dict) or data.get("s") != sort_field or not isinstance(data.get("v"), list) \
+            or len(data["v"]) != expected:
+        raise ValueError("Invalid cursor")
+    return data["v"]
+
+
+def cursor_values(doc, sort_field):
+    if sort_field == "_id":
+        return [doc["_id"]]
+    return [doc.get(sort_field), doc["_id"]]
+
+
+def keyset_filter(sort_field, values):
+    """Filter matching documents after the cursor position, ascending order."""
+    if sort_field == "_id":
+        return {"_id": {"$gt": values[0]}}
+
+    last_value, last_id = values
+    kind = _type_of(last_value)
+    clauses = [{sort_field: last_value, "_id": {"$gt": last_id}}]
+    if kind != "null":
+        clauses.append({sort_field: {"$gt": last_value}})
+    later = _TYPE_ORDER[_TYPE_ORDER.index(kind) + 1:] if kind in _TYPE_ORDER else []
+    for later_kind in later:
+        clauses.append({sort_field: {"$type": later_kind}})
+    return {"$or": clauses}
+
+
+def sort_spec(sort_field):
+    if sort_field == "_id":
+        return [("_id", 1)]
+    return [(sort_field, 1), ("_id", 1)]
+
+
+def parse_projection(fields, required=()):
+    """Turn ?fields=a,b into a find() projection; None means all fields."""
+    if not fields:
+        return None
+    projection = {}
+    for name in fields.split(","):
+        name = name.strip()
+        if not name:
+            continue
+        if name.startswith("$"):
+            raise ValueError(f"Invalid field: {name}")
+        projection[name] = 1
+    for name in required:
+        projection[name] = 1
+    return projection
+
+
+def id_filter(value):
+    """Match a reference stored either as an ObjectId or as its string form."""
+    values = [v.strip() for v in value.split(",") if v.strip()]
+    candidates = []
+    for v in values:
+        if ObjectId.is_valid(v):
+            candidates.append(ObjectId(v))
+        candidates.append(v)
+    if len(candidates) == 1:
+        return candidates[0]
+    return {"$in": candidates}
+
+
+def value_filter(value):
+    values = [v.strip() for v in value.split(",") if v.strip()]
+    if len(values) == 1:
+        return values[0]
+    return {"$in": values}
+
+
+def parse_datetime(value):
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid date: {value}")
+
+
+def _type_of(value):
+    if value is None:
+        return "null"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, datetime):
+        return "date"
+    return None
@@ -0,0 +1,73 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Hash for new and rehashed passwords; raise the iterations as hardware gets faster
+PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+
+# Only the fields login needs; never returned to clients as-is. Users
+# created through the API store ``username`` instead of ``name``
+LOGIN_PROJECTION = {"name": 1, "username": 1, "email": 1, "role": 1, "password_hash": 1}
+
+
+class HasherBusy(Exception):
+    pass
+
+
+def hash_password(password, method=PASSWORD_HASH_METHOD):
+    return generate_password_hash(password, method=method)
+
+
+def needs_rehash(password_hash, method=PASSWORD_HASH_METHOD):
+    """True when ``password_hash`` was made with a different method or cost."""
+    return password_hash.split("$", 1)[0] != method
+
+
+class PasswordHasher:
+    """Verifies passwords on a small dedicated thread pool.
+
+    PBKDF2 is CPU-bound; running it here caps how many cores login storms
+    can take from the request threads, and ``max_pending`` rejects logins
+    instead of queueing them without bound.
+    """
+
+    def __init__(self, max_workers=2, max_pending=64, timeout=10.0, method=PASSWORD_HASH_METHOD):
+        self.method = method
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _submit(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HasherBusy("Too many login attempts in progress, try again shortly")
+            self._pending += 1
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._done)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            # The pool is saturated; the work still finishes and frees its slot
+            raise HasherBusy("Too many login attempts in progress, try again shortly")
+
+    def _done(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def verify(self, password_hash, password):
+        """Check ``password`` against a stored hash; a missing hash never matches."""
+        if not password_hash or not isinstance(password, str):
+            return False
+        return self._submit(check_password_hash, password_hash, password)
+
+    def hash(self, password):
+        return self._submit(hash_password, password, self.method)
+
+    def needs_rehash(self, password_hash):
+        return needs_rehash(password_hash, self.method)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,72 @@
+from collections import Counter
+from datetime import datetime
+
+# Counters for every task live in one document of the report_stats collection:
+# {"_id": "tasks", "total": n, "by_status": {...}, "by_assignee": {...}, "by_project": {...}}
+STATS_ID = "tasks"
+DIMENSIONS = {
+    "by_status": "status",
+    "by_assignee": "assigned_to",
+    "by_project": "project_id",
+}
+# Projection of the task fields the counters depend on
+TASK_STATS_FIELDS = {field: 1 for field in DIMENSIONS.values()}
+
+
+def _key(value):
+    # Counter names become Mongo field names, which cannot contain "." or start with "$"
+    key = "None" if value is None else str(value)
+    return key.replace(".", "\uff0e").replace("$", "\uff04")
+
+
+def _unkey(key):
+    return key.replace("\uff0e", ".").replace("\uff04", "$")
+
+
+def task_delta(before=None, after=None):
+    """$inc document moving one task from ``before`` to ``after``.
+
+    Pass only ``after`` for an insert and only ``before`` for a delete.
+    """
+    inc = Counter()
+    for doc, step in ((before, -1), (after, 1)):
+        if doc is None:
+            continue
+        inc["total"] += step
+        for dimension, field in DIMENSIONS.items():
+            inc[f"{dimension}.{_key(doc.get(field))}"] += step
+    return {name: value for name, value in inc.items() if value}
+
+
+def apply_task_change(db, before=None, after=None):
+    apply_delta(db, task_delta(before, after))
+
+
+def apply_delta(db, inc):
+    # No upsert: until rebuild() has run the counters do not exist and
+    # load() rebuilds them from scratch on first read.
+    if db is not None and inc:
+        db.report_stats.update_one({"_id": STATS_ID}, {"$inc": inc})
+
+
+def rebuild(db):
+    """Recompute all counters with one pass over the tasks collection."""
+    facets = {dimension: [{"$group": {"_id": f"${field}", "count": {"$sum": 1}}}]
+              for dimension, field in DIMENSIONS.items()}
+    result = next(db.tasks.aggregate([{"$facet": facets}]))
+    stats = {"_id": STATS_ID, "rebuilt_at": datetime.utcnow()}
+    for dimension in DIMENSIONS:
+        stats[dimension] = {_key(row["_id"]): row["count"] for row in result[dimension]}
+    stats["total"] = sum(stats["by_status"].values())
+    db.report_stats.replace_one({"_id": STATS_ID}, stats, upsert=True)
+    return stats
+
+
+def load(db):
+    """Current counters with zero entries dropped, rebuilding them if missing."""
+    stats = db.report_stats.find_one({"_id": STATS_ID}) or rebuild(db)
+    counters = {"total": stats.get("total", 0)}
+    for dimension in DIMENSIONS:
+        counters[dimension] = {_unkey(key): count
+                               for key, count in stats.get(dimension, {}).items() if count}
+    return counters
@@ -0,0 +1,128 @@
+import bisect
+import heapq
+import math
+import re
+import threading
+from collections import defaultdict
+
+# Searchable types: the collection, text-index weights, the fields matched by
+# prefix autocomplete and the fields returned with each result
+SEARCH_TYPES = {
+    "task": {
+        "collection": "tasks",
+        "weights": {"title": 5, "description": 1},
+        "prefix_fields": ("title",),
+        "label": ("title",),
+        "fields": ("title", "status", "priority", "project_id", "assigned_to", "deadline"),
+    },
+    "project": {
+        "collection": "projects",
+        "weights": {"name": 5, "description": 1},
+        "prefix_fields": ("name",),
+        "label": ("name",),
+        "fields": ("name", "status", "deadline"),
+    },
+    "user": {
+        "collection": "users",
+        # Users created through the API carry ``username`` instead of ``name``
+        "weights": {"name": 5, "username": 5, "email": 3},
+        "prefix_fields": ("name", "username", "email"),
+        "label": ("name", "username", "email"),
+        "fields": ("name", "username", "email", "role"),
+    },
+}
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    if not isinstance(text, str):
+        return []
+    return _TOKEN.findall(text.casefold())
+
+
+def label_of(search_type, doc):
+    return next((doc[field] for field in SEARCH_TYPES[search_type]["label"] if doc.get(field)), "")
+
+
+def prefix_patterns(prefix):
+    """Anchored regexes for ``prefix`` as typed, lower-cased and capitalized.
+
+    Each one is a case-sensitive ``^...`` match, which MongoDB answers with
+    an index range scan; a case-insensitive regex would scan the whole index.
+    """
+    variants = {prefix, prefix.lower(), prefix[:1].upper() + prefix[1:]}
+    return [re.compile("^" + re.escape(variant)) for variant in sorted(variants)]
+
+
+class InvertedIndex:
+    """In-process full-text and prefix index for searching without MongoDB.
+
+    Documents are scored like a weighted TF-IDF: every occurrence of a query
+    term adds its field weight, scaled by how rare the term is. Prefix
+    lookups bisect a sorted list of the case-folded prefix fields, so they
+    match from the start of a title, name or email just like the anchored
+    regexes used against MongoDB.
+    """
+
+    def __init__(self):
+        self._postings = defaultdict(dict)
+        self._docs = {}
+        self._prefixes = []
+        self._prefixes_sorted = True
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, search_type, doc):
+        key = (search_type, str(doc["_id"]))
+        spec = SEARCH_TYPES[search_type]
+        with self._lock:
+            self._docs[key] = doc
+            for field, weight in spec["weights"].items():
+                for term in tokenize(doc.get(field)):
+                    postings = self._postings[term]
+                    postings[key] = postings.get(key, 0) + weight
+            for field in dict.fromkeys(spec["prefix_fields"] + spec["label"]):
+                if isinstance(doc.get(field), str):
+                    self._prefixes.append((doc[field].casefold(), key))
+            self._prefixes_sorted = False
+
+    def search(self, query, types=None, limit=None):
+        """[(type, doc, score)] for documents matching any term of ``query``, best first."""
+        scores = defaultdict(float)
+        with self._lock:
+            total = len(self._docs)
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + total / len(postings))
+                for key, weight in postings.items():
+                    if types is None or key[0] in types:
+                        scores[key] += weight * idf
+            order = lambda item: (-item[1], item[0])
+            if limit is None:
+                ranked = sorted(scores.items(), key=order)
+            else:
+                ranked = heapq.nsmallest(limit, scores.items(), key=order)
+            return [(key[0], self._docs[key], score) for key, score in ranked]
+
+    def complete(self, prefix, types=None, limit=10):
+        """[(type, doc, None)] whose title, name or email starts with ``prefix``."""
+        prefix = prefix.casefold()
+        matches = []
+        with self._lock:
+            if not self._prefixes_sorted:
+                self._prefixes.sort()
+                self._prefixes_sorted = True
+            position = bisect.bisect_left(self._prefixes, (prefix,))
+            while position < len(self._prefixes) and len(matches) < limit:
+                value, key = self._prefixes[position]
+                if not value.startswith(prefix):
+                    break
+                if (types is None or key[0] in types) and key not in matches:
+                    matches.append(key)
+                position += 1
+            return [(key[0], self._docs[key], None) for key in matches]
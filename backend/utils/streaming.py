@@ -0,0 +1,74 @@
+from flask import Response, current_app, request, stream_with_context
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+SSE_MIMETYPE = "text/event-stream"
+
+# Documents fetched from Mongo per getMore while streaming
+STREAM_BATCH_SIZE = 200
+# Serialized bytes buffered before a chunk is written to the socket
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def streaming_format():
+    """Pick the streaming format requested by the client, if any.
+
+    ``Accept: application/x-ndjson`` selects newline-delimited JSON and
+    ``?stream=1`` a chunked JSON array; otherwise the endpoint answers with
+    a regular buffered response.
+    """
+    for mimetype, quality in request.accept_mimetypes:
+        if mimetype == NDJSON_MIMETYPE and quality > 0:
+            return "ndjson"
+    if request.args.get("stream", "").lower() in ("1", "true", "yes"):
+        return "json"
+    return None
+
+
+def stream_documents(documents, fmt):
+    """Stream an iterable of documents (usually a pymongo cursor)."""
+    if hasattr(documents, "batch_size"):
+        documents = documents.batch_size(STREAM_BATCH_SIZE)
+    dumps = current_app.json.dumps
+
+    def generate():
+        buffer = []
+        size = 0
+        if fmt == "json":
+            buffer.append("[")
+        first = True
+        for doc in documents:
+            chunk = dumps(doc)
+            if fmt == "ndjson":
+                chunk += "\n"
+            elif not first:
+                chunk = "," + chunk
+            first = False
+            buffer.append(chunk)
+            size += len(chunk)
+            if size >= STREAM_CHUNK_SIZE:
+                yield "".join(buffer)
+                buffer = []
+                size = 0
+        if fmt == "json":
+            buffer.append("]")
+        if buffer:
+            yield "".join(buffer)
+
+    mimetype = NDJSON_MIMETYPE if fmt == "ndjson" else "application/json"
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+
+def sse_event(event, data):
+    """Format one Server-Sent Events message with a JSON payload."""
+    return f"event: {event}\ndata: {current_app.json.dumps(data)}\n\n"
+
+
+def stream_events(events):
+    """Stream (event, data) pairs as Server-Sent Events, one write per event."""
+    def generate():
+        for event, data in events:
+            yield sse_event(event, data)
+
+    # X-Accel-Buffering stops nginx-style proxies from holding events back
+    return Response(stream_with_context(generate()), mimetype=SSE_MIMETYPE,
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,218 @@
+from collections import Counter
+from bson import ObjectId
+from pymongo import DeleteOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from utils.comments import delete_comments
+from utils.pagination import parse_datetime
+from utils.report_stats import TASK_STATS_FIELDS, apply_delta, task_delta
+
+MAX_BULK_TASKS = 1000
+BATCH_OPERATIONS = ("status", "assign", "update", "delete")
+
+
+def validate_task(doc):
+    if not isinstance(doc, dict):
+        return "Task must be an object"
+    if not doc.get("title"):
+        return "Title required"
+    if any(str(key).startswith("$") for key in doc):
+        return "Field names cannot start with $"
+    return None
+
+
+def normalize_deadline(fields):
+    """Store ``deadline`` as a date, so range filters and sorting compare it as one.
+
+    Clients send ISO 8601 strings; an empty string clears the deadline.
+    Returns an error message when the string is not a date.
+    """
+    deadline = fields.get("deadline")
+    if isinstance(deadline, str):
+        if not deadline.strip():
+            fields["deadline"] = None
+            return None
+        try:
+            fields["deadline"] = parse_datetime(deadline)
+        except ValueError:
+            return "deadline must be an ISO 8601 date"
+    return None
+
+
+def migrate_deadlines(db, batch_size=1000):
+    """Convert deadlines stored as strings by older versions into dates.
+
+    Matching on the old value keeps a concurrent update from being
+    overwritten, and the migration can be re-run. Returns (converted,
+    left as is because they are not dates).
+    """
+    converted = invalid = 0
+    requests = []
+    for task in db.tasks.find({"deadline": {"$type": "string"}}, {"deadline": 1}):
+        fields = {"deadline": task["deadline"]}
+        if normalize_deadline(fields):
+            invalid += 1
+            continue
+        requests.append(UpdateOne({"_id": task["_id"], "deadline": task["deadline"]}, {"$set": fields}))
+        if len(requests) >= batch_size:
+            converted += db.tasks.bulk_write(requests, ordered=False).modified_count
+            requests = []
+    if requests:
+        converted += db.tasks.bulk_write(requests, ordered=False).modified_count
+    return converted, invalid
+
+
+def insert_tasks(db, docs, ordered=True):
+    """Validate a batch of tasks and write the valid ones with one insert_many.
+
+    Returns one result per input item, in input order, with status
+    "created", "invalid", "failed" or "skipped". In ordered mode nothing
+    after the first invalid or failed item is written, matching the
+    semantics of an ordered insert_many. Report counters are updated with a
+    single $inc for the whole batch.
+    """
+    results = [None] * len(docs)
+    valid = []
+    for index, doc in enumerate(docs):
+        error = validate_task(doc) or normalize_deadline(doc)
+        if error:
+            results[index] = {"index": index, "status": "invalid", "error": error}
+        else:
+            doc.setdefault("status", "To Do")
+            doc.setdefault("comments", [])
+            doc.setdefault("comment_count", len(doc["comments"]))
+            valid.append((index, doc))
+
+    if ordered:
+        first_invalid = next((i for i, result in enumerate(results) if result), None)
+        if first_invalid is not None:
+            valid = [(index, doc) for index, doc in valid if index < first_invalid]
+
+    written = set(range(len(valid)))
+    if valid:
+        try:
+            db.tasks.insert_many([doc for _, doc in valid], ordered=ordered)
+        except BulkWriteError as e:
+            errors = {error["index"]: error for error in e.details.get("writeErrors", [])}
+            first_error = min(errors) if errors else len(valid)
+            for position, (index, _) in enumerate(valid):
+                if position in errors:
+                    results[index] = {"index": index, "status": "failed", "error": errors[position].get("errmsg")}
+                    written.discard(position)
+                elif ordered and position > first_error:
+                    written.discard(position)
+
+    delta = Counter()
+    for position in written:
+        index, doc = valid[position]
+        results[index] = {"index": index, "status": "created", "_id": doc["_id"]}
+        delta.update(task_delta(after=doc))
+    apply_delta(db, {name: value for name, value in delta.items() if value})
+
+    for index, result in enumerate(results):
+        if result is None:
+            results[index] = {"index": index, "status": "skipped", "error": "Not attempted after an earlier error"}
+    return results
+
+
+def _operation_update(op):
+    """Validate one batch operation; returns ($set document or None for delete, error)."""
+    kind = op.get("op")
+    if kind == "status":
+        if not op.get("status"):
+            return None, "Status required"
+        return {"status": op["status"]}, None
+    if kind == "assign":
+        if "assigned_to" not in op:
+            return None, "assigned_to required"
+        return {"assigned_to": op["assigned_to"]}, None
+    if kind == "update":
+        fields = op.get("fields")
+        if not isinstance(fields, dict) or not fields:
+            return None, "fields required"
+        if any(str(key).startswith("$") or key == "_id" for key in fields):
+            return None, "Field names cannot start with $ or be _id"
+        return fields, normalize_deadline(fields)
+    if kind == "delete":
+        return None, None
+    return None, f"op must be one of {', '.join(BATCH_OPERATIONS)}"
+
+
+def apply_task_operations(db, operations, ordered=True):
+    """Run status moves, reassignments, field updates and deletes as one bulk_write.
+
+    Every operation gets a result with the HTTP code its single-item
+    handler would have returned (200, 400 or 404). Existence is checked up
+    front with one find() so "Task not found" can be reported per item, and
+    the same before-images drive the report counter updates.
+    """
+    results = [None] * len(operations)
+    planned = []
+    for index, op in enumerate(operations):
+        if not isinstance(op, dict):
+            results[index] = {"index": index, "status": "invalid", "code": 400, "error": "Operation must be an object"}
+            continue
+        update, error = _operation_update(op)
+        if not error and not ObjectId.is_valid(str(op.get("id", ""))):
+            error = "Invalid task id"
+        if error:
+            results[index] = {"index": index, "op": op.get("op"), "status": "invalid", "code": 400, "error": error}
+            continue
+        planned.append((index, op["op"], ObjectId(str(op["id"])), update))
+
+    ids = list({task_id for _, _, task_id, _ in planned})
+    state = {doc["_id"]: doc for doc in db.tasks.find({"_id": {"$in": ids}}, TASK_STATS_FIELDS)} if ids else {}
+    before_images = dict(state)
+
+    requests, executed = [], []
+    for index, kind, task_id, update in planned:
+        if task_id not in state:
+            results[index] = {"index": index, "op": kind, "id": task_id, "status": "not_found", "code": 404,
+                              "error": "Task not found"}
+            continue
+        if kind == "delete":
+            requests.append(DeleteOne({"_id": task_id}))
+            del state[task_id]
+        else:
+            requests.append(UpdateOne({"_id": task_id}, {"$set": update}))
+            state[task_id] = {**state[task_id], **update}
+        executed.append((index, kind, task_id, update))
+
+    failed = set()
+    if requests:
+        try:
+            db.tasks.bulk_write(requests, ordered=ordered)
+        except BulkWriteError as e:
+            errors = {error["index"]: error for error in e.details.get("writeErrors", [])}
+            first_error = min(errors) if errors else len(requests)
+            for position, (index, kind, task_id, _) in enumerate(executed):
+                if position in errors:
+                    results[index] = {"index": index, "op": kind, "id": task_id, "status": "failed", "code": 400,
+                                      "error": errors[position].get("errmsg")}
+                    failed.add(position)
+                elif ordered and position > first_error:
+                    failed.add(position)
+
+    # Replay the operations that went through to update the report counters
+    current = before_images
+    delta = Counter()
+    deleted = set()
+    for position, (index, kind, task_id, update) in enumerate(executed):
+        if position in failed:
+            continue
+        before = current.get(task_id)
+        after = None if kind == "delete" else {**before, **update}
+        delta.update(task_delta(before, after))
+        if after is None:
+            current.pop(task_id, None)
+            deleted.add(task_id)
+        else:
+            current[task_id] = after
+        results[index] = {"index": index, "op": kind, "id": task_id, "status": "ok", "code": 200}
+    apply_delta(db, {name: value for name, value in delta.items() if value})
+    delete_comments(db, deleted)
+
+    for index, result in enumerate(results):
+        if result is None:
+            results[index] = {"index": index, "status": "skipped", "code": 400,
+                              "error": "Not attempted after an earlier error"}
+    return results
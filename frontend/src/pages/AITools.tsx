@@ -28,7 +28,7 @@ import {
   Psychology,
 } from '@mui/icons-material';
 import { Project } from '../types';
-import api from '../services/api';
+import api, { aiAPI } from '../services/api';
 
 const AITools: React.FC = () => {
   const [projectDescription, setProjectDescription] = useState('');
@@ -65,21 +65,21 @@ const AITools: React.FC = () => {
     setUserStories([]);
 
     try {
-      const response = await api.post('/api/ai/generate-user-stories', {
+      // Stories are shown one by one as the model produces them
+      const result = await aiAPI.streamUserStories({
         projectDescription: projectDescription.trim(),
         projectId: selectedProject || undefined,
         createTasks,
-      });
+      }, story => setUserStories(prev => [...prev, story]));
 
-      setUserStories(response.data.user_stories);
-      setSuccess(`Generated ${response.data.count} user stories successfully!`);
+      setSuccess(`Generated ${result.count} user stories successfully!`);
 
-      if (createTasks && response.data.count > 0) {
+      if (createTasks && result.count > 0) {
         setSuccess(prev => prev + ' Tasks have been created automatically.');
       }
     } catch (error: any) {
       console.error('Error generating user stories:', error);
-      setError(error.response?.data?.error || 'Failed to generate user stories. Please try again.');
+      setError(error.response?.data?.error || error.message || 'Failed to generate user stories. Please try again.');
     } finally {
       setLoading(false);
     }
@@ -30,7 +30,7 @@ import {
   Delete,
 } from '@mui/icons-material';
 import { Task, Project, User } from '../types';
-import api from '../services/api';
+import api, { taskAPI } from '../services/api';
 import { useAuth } from '../contexts/AuthContext';
 
 const Tasks: React.FC = () => {
@@ -65,8 +65,7 @@ const Tasks: React.FC = () => {
   // Corrected fetchTasks function
   const fetchTasks = async () => {
     try {
-      const response = await api.get('/api/tasks');
-      setTasks(response.data);
+      setTasks(await taskAPI.getAllTasks());
     } catch (error) {
       console.error('Error fetching tasks:', error);
     } finally {
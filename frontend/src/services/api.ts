@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { LoginData, SignupData, AuthResponse } from '../types';
+import { LoginData, SignupData, AuthResponse, ProjectDetail, SearchResponse, SearchResult, TaskFeed } from '../types';
 
 // For production deployment, point to your Render backend
 const API_BASE_URL = process.env.REACT_APP_API_URL || '';
@@ -49,6 +49,9 @@ export const authAPI = {
 export const userAPI = {
   getUsers: () => api.get('/api/users').then(res => res.data),
   getProfile: () => api.get('/api/users/profile').then(res => res.data),
+  getUserTasks: (id: string, params?: Record<string, string>): Promise<TaskFeed> =>
+    api.get(`/api/users/${id}/tasks`, { params })
+      .then(res => ({ ...res.data, nextCursor: res.headers['x-next-cursor'] as string | undefined })),
   updateUser: (id: string, data: any) => 
     api.put(`/api/users/${id}`, data).then(res => res.data),
   deleteUser: (id: string) => 
@@ -57,7 +60,12 @@ export const userAPI = {
 
 export const projectAPI = {
   getProjects: () => api.get('/api/projects').then(res => res.data),
-  getProject: (id: string) => api.get(`/api/projects/${id}`).then(res => res.data),
+  getProject: (id: string, params?: Record<string, string>): Promise<ProjectDetail> =>
+    api.get(`/api/projects/${id}`, { params })
+      .then(res => ({ ...res.data, nextCursor: res.headers['x-next-cursor'] as string | undefined })),
+  getProjectTasks: (id: string, params?: Record<string, string>): Promise<TaskFeed> =>
+    api.get(`/api/projects/${id}/tasks`, { params })
+      .then(res => ({ ...res.data, nextCursor: res.headers['x-next-cursor'] as string | undefined })),
   createProject: (data: any) => api.post('/api/projects', data).then(res => res.data),
   updateProject: (id: string, data: any) => 
     api.put(`/api/projects/${id}`, data).then(res => res.data),
@@ -74,6 +82,17 @@ export const taskAPI = {
     const queryString = params ? `?${new URLSearchParams(params).toString()}` : '';
     return api.get(`/api/tasks${queryString}`).then(res => res.data);
   },
+  // GET /api/tasks returns one page; follow X-Next-Cursor until every task is loaded
+  getAllTasks: async (params: Record<string, string> = {}) => {
+    const tasks: any[] = [];
+    let cursor: string | undefined;
+    do {
+      const res = await api.get('/api/tasks', { params: { limit: '500', ...params, ...(cursor ? { cursor } : {}) } });
+      tasks.push(...res.data);
+      cursor = res.headers['x-next-cursor'] as string | undefined;
+    } while (cursor);
+    return tasks;
+  },
   getTask: (id: string) => api.get(`/api/tasks/${id}`).then(res => res.data),
   createTask: (data: any) => api.post('/api/tasks', data).then(res => res.data),
   updateTask: (id: string, data: any) => 
@@ -82,6 +101,9 @@ export const taskAPI = {
     api.patch(`/api/tasks/${id}/status`, { status }).then(res => res.data),
   addComment: (id: string, comment: string) =>
     api.post(`/api/tasks/${id}/comments`, { comment }).then(res => res.data),
+  getComments: (id: string, cursor?: string) =>
+    api.get(`/api/tasks/${id}/comments`, { params: cursor ? { cursor } : {} })
+      .then(res => ({ comments: res.data, nextCursor: res.headers['x-next-cursor'] as string | undefined })),
   deleteTask: (id: string) => 
     api.delete(`/api/tasks/${id}`).then(res => res.data),
 };
@@ -93,4 +115,49 @@ export const reportAPI = {
   getUserWorkload: () => api.get('/api/reports/user-workload').then(res => res.data),
 };
 
+export const searchAPI = {
+  search: (q: string, params?: Record<string, string>): Promise<SearchResponse> =>
+    api.get('/api/search', { params: { ...params, q } }).then(res => res.data),
+  autocomplete: (q: string, type?: string): Promise<SearchResult[]> =>
+    api.get('/api/search/autocomplete', { params: type ? { q, type } : { q } }).then(res => res.data),
+};
+
+export const aiAPI = {
+  // Reads the Server-Sent Events stream and calls onStory for each story as it arrives
+  streamUserStories: async (data: any, onStory: (story: string) => void) => {
+    const token = localStorage.getItem('token');
+    const response = await fetch(`${API_BASE_URL}/api/ai/generate-user-stories/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        ...(token ? { Authorization: `Bearer ${token}` } : {}),
+      },
+      body: JSON.stringify(data),
+    });
+    if (!response.ok || !response.body) {
+      const body = await response.json().catch(() => ({}));
+      throw new Error(body.error || 'Failed to generate user stories');
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const messages = buffer.split('\n\n');
+      buffer = messages.pop() || '';
+      for (const message of messages) {
+        const event = message.match(/^event: (.*)$/m)?.[1];
+        const payload = JSON.parse(message.match(/^data: (.*)$/m)?.[1] || '{}');
+        if (event === 'story') onStory(payload.story);
+        if (event === 'error') throw new Error(payload.error);
+        if (event === 'done') return payload as { count: number; project_id: string };
+      }
+    }
+    throw new Error('Stream ended before all user stories were received');
+  },
+};
+
 export default api;
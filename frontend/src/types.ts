@@ -37,6 +37,15 @@ export interface Project {
   created_at: string;
 }
 
+// GET /api/projects/<id>
+export interface ProjectDetail extends Project {
+  members: User[];
+  tasks: Task[];
+  task_counts: Record<string, number>;
+  task_total: number;
+  nextCursor?: string;
+}
+
 export interface Task {
   _id: string;
   title: string;
@@ -47,7 +56,16 @@ export interface Task {
   project_id: string;
   deadline: string;
   created_at: string;
-  comments: Comment[];
+  comments: Comment[]; // latest few only; use taskAPI.getComments for the rest
+  comment_count?: number;
+}
+
+// GET /api/users/<id>/tasks and /api/projects/<id>/tasks
+export interface TaskFeed {
+  tasks: Task[];
+  counts: Record<string, number>;
+  total: number;
+  nextCursor?: string;
 }
 
 export interface Comment {
@@ -72,3 +90,20 @@ export interface ReportData {
   overdue_tasks: Task[];
   user_workload: { [key: string]: number };
 }
+
+// GET /api/search and /api/search/autocomplete
+export interface SearchResult {
+  type: 'task' | 'project' | 'user';
+  _id: string;
+  label: string;
+  score?: number;
+  [field: string]: unknown;
+}
+
+export interface SearchResponse {
+  query: string;
+  results: SearchResult[];
+  offset: number;
+  limit: number;
+  has_more: boolean;
+}